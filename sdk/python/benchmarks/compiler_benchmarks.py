@@ -0,0 +1,370 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Scalability benchmarks of kfp.compiler.Compiler.
+
+Usage (from sdk/python):
+  python -m benchmarks.compiler_benchmarks run --output results.json
+  python -m benchmarks.compiler_benchmarks compare benchmarks/compiler_baseline.json results.json
+"""
+
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import OrderedDict, defaultdict
+
+import kfp.dsl as dsl
+import kfp.compiler as compiler
+from kubernetes import client as k8s_client
+
+
+def _producer_op(name, *args):
+  return dsl.ContainerOp(
+    name=name,
+    image='busybox',
+    command=['sh', '-c'],
+    arguments=['echo %s | tee /tmp/output' % ' '.join(str(arg) for arg in args)],
+    file_outputs={'output': '/tmp/output'},
+  )
+
+
+def fanout_pipeline(width: int):
+  """One producer consumed by `width` ContainerOps with the same name."""
+  @dsl.pipeline(name='Fan-out', description='Wide fan-out pipeline.')
+  def pipeline(message, count='10'):
+    producer = _producer_op('producer', message)
+    for _ in range(width):
+      _producer_op('worker', producer.output, message, count)
+  return pipeline
+
+
+def condition_tree_pipeline(depth: int, branching: int):
+  """A full tree of nested dsl.Conditions with an op in every group."""
+  @dsl.pipeline(name='Condition tree', description='Nested conditions.')
+  def pipeline(flag):
+    root = _producer_op('root', flag)
+
+    def _add_level(level, parent_output):
+      if level == depth:
+        return
+      for branch in range(branching):
+        with dsl.Condition(parent_output == str(branch)):
+          op = _producer_op('level-%d' % level, parent_output, flag, root.output)
+          _add_level(level + 1, op.output)
+
+    _add_level(0, root.output)
+  return pipeline
+
+
+def deep_condition_pipeline(depth: int):
+  """A single chain of `depth` nested dsl.Conditions consuming outputs of the top."""
+  @dsl.pipeline(name='Deep conditions', description='Deeply nested conditions.')
+  def pipeline(flag):
+    root = _producer_op('root', flag)
+    with contextlib.ExitStack() as stack:
+      for level in range(depth):
+        stack.enter_context(dsl.Condition(flag == str(level)))
+        _producer_op('level', root.output, flag)
+  return pipeline
+
+
+@dsl._component.graph_component
+def _retry_until_done(status):
+  with dsl.Condition(status == 'retry'):
+    op = _producer_op('attempt', status)
+    _retry_until_done(op.output)
+
+
+def recursive_graph_pipeline(count: int):
+  """`count` instances of a recursive graph_component."""
+  @dsl.pipeline(name='Recursive graphs', description='Recursive graph components.')
+  def pipeline(status):
+    start = _producer_op('start', status)
+    for _ in range(count):
+      _retry_until_done(start.output)
+  return pipeline
+
+
+def sidecars_volumes_pipeline(ops: int, sidecars: int, volumes: int):
+  """`ops` ContainerOps with many sidecars, volumes and environment variables each."""
+  @dsl.pipeline(name='Sidecars and volumes', description='Ops with large k8s objects.')
+  def pipeline(tag, bucket):
+    for op_index in range(ops):
+      op = _producer_op('op', tag, bucket)
+      for sidecar_index in range(sidecars):
+        op.add_sidecar(
+          dsl.Sidecar('sidecar-%d' % sidecar_index, 'redis:%s' % tag,
+                      args=['--bucket', str(bucket)]).add_env_variable(
+                        k8s_client.V1EnvVar(name='TAG', value=str(tag))))
+      for volume_index in range(volumes):
+        volume_name = 'volume-%d' % volume_index
+        op.add_volume(k8s_client.V1Volume(
+          name=volume_name,
+          empty_dir=k8s_client.V1EmptyDirVolumeSource()))
+        op.container.add_volume_mount(k8s_client.V1VolumeMount(
+          name=volume_name,
+          mount_path='/mnt/%s/%s' % (volume_name, tag)))
+        op.container.add_env_variable(k8s_client.V1EnvVar(
+          name='VOLUME_%d' % volume_index, value='/mnt/%s' % volume_name))
+  return pipeline
+
+
+SCENARIOS = OrderedDict([
+  ('fanout_1k', lambda: fanout_pipeline(width=1000)),
+  ('fanout_10k', lambda: fanout_pipeline(width=10000)),
+  ('condition_tree', lambda: condition_tree_pipeline(depth=7, branching=2)),
+  ('deep_conditions', lambda: deep_condition_pipeline(depth=300)),
+  ('recursive_graphs', lambda: recursive_graph_pipeline(count=100)),
+  ('sidecars_volumes', lambda: sidecars_volumes_pipeline(ops=200, sidecars=10, volumes=10)),
+])
+
+
+# Functions that are timed as compilation phases: (phase name, module, attribute name).
+# The phase times are inclusive, e.g. "op_to_template" includes "process_ops".
+_PHASES = [
+  ('compile', 'kfp.compiler.compiler', 'Compiler._compile'),
+  ('create_templates', 'kfp.compiler.compiler', 'Compiler._create_templates'),
+  ('op_to_template', 'kfp.compiler.compiler', '_op_to_template'),
+  ('process_ops', 'kfp.compiler._op_to_template', '_process_base_ops'),
+  ('yaml_dump', 'yaml', 'dump'),
+]
+
+
+class _PhaseTimer(object):
+  """Patches the phase functions to accumulate their wall time.
+
+  Recursive and nested calls of the same phase are only counted once.
+  The "build_pipeline" phase is the time spent inside the dsl.Pipeline context,
+  i.e. running the pipeline function.
+  """
+
+  def __init__(self):
+    self.times = defaultdict(float)
+    self._active = set()
+    self._patches = []
+
+  def _wrap(self, phase, func):
+    def _timed(*args, **kwargs):
+      if phase in self._active:
+        return func(*args, **kwargs)
+      self._active.add(phase)
+      start_time = time.perf_counter()
+      try:
+        return func(*args, **kwargs)
+      finally:
+        self.times[phase] += time.perf_counter() - start_time
+        self._active.discard(phase)
+    return _timed
+
+  def __enter__(self):
+    for phase, module_name, attribute_path in _PHASES:
+      try:
+        owner = importlib.import_module(module_name)
+      except ImportError:
+        continue
+      *owner_path, attribute_name = attribute_path.split('.')
+      for name in owner_path:
+        owner = getattr(owner, name)
+      func = getattr(owner, attribute_name, None)
+      if func is None:
+        # The phase does not exist in this version of the compiler.
+        continue
+      setattr(owner, attribute_name, self._wrap(phase, func))
+      self._patches.append((owner, attribute_name, func))
+
+    pipeline_enter = dsl.Pipeline.__enter__
+    pipeline_exit = dsl.Pipeline.__exit__
+    def _timed_enter(pipeline):
+      self._build_start_time = time.perf_counter()
+      return pipeline_enter(pipeline)
+    def _timed_exit(pipeline, *args):
+      self.times['build_pipeline'] += time.perf_counter() - self._build_start_time
+      return pipeline_exit(pipeline, *args)
+    dsl.Pipeline.__enter__ = _timed_enter
+    dsl.Pipeline.__exit__ = _timed_exit
+    self._patches.append((dsl.Pipeline, '__enter__', pipeline_enter))
+    self._patches.append((dsl.Pipeline, '__exit__', pipeline_exit))
+    return self
+
+  def __exit__(self, *args):
+    for owner, attribute_name, func in reversed(self._patches):
+      setattr(owner, attribute_name, func)
+    self._patches = []
+
+
+def _compile_once(pipeline_func, package_path):
+  with _PhaseTimer() as timer:
+    start_time = time.perf_counter()
+    compiler.Compiler().compile(pipeline_func, package_path)
+    timer.times['total'] = time.perf_counter() - start_time
+  return dict(timer.times)
+
+
+def run_scenario(name, repeat=3):
+  """Compiles the scenario pipeline `repeat` times and returns the best phase times and the peak memory."""
+  pipeline_func = SCENARIOS[name]()
+  tmpdir = tempfile.mkdtemp()
+  try:
+    package_path = os.path.join(tmpdir, 'pipeline.yaml')
+    best_times = None
+    for _ in range(repeat):
+      times = _compile_once(pipeline_func, package_path)
+      if best_times is None or times['total'] < best_times['total']:
+        best_times = times
+
+    # Memory is measured in a separate run because tracing allocations slows down the compilation.
+    tracemalloc.start()
+    try:
+      compiler.Compiler().compile(pipeline_func, package_path)
+      _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+      tracemalloc.stop()
+
+    return OrderedDict([
+      ('phases', OrderedDict(sorted((phase, round(seconds, 4)) for phase, seconds in best_times.items()))),
+      ('peak_memory_bytes', peak_memory),
+      ('package_bytes', os.path.getsize(package_path)),
+    ])
+  finally:
+    shutil.rmtree(tmpdir)
+
+
+def run(scenario_names, repeat, output_path=None):
+  results = OrderedDict([
+    ('python', platform.python_version()),
+    ('platform', platform.platform()),
+    ('scenarios', OrderedDict()),
+  ])
+  for name in scenario_names:
+    print('Running {}...'.format(name), file=sys.stderr)
+    results['scenarios'][name] = run_scenario(name, repeat)
+    print('  {}'.format(json.dumps(results['scenarios'][name])), file=sys.stderr)
+  text = json.dumps(results, indent=2) + '\n'
+  if output_path:
+    with open(output_path, 'w') as f:
+      f.write(text)
+  else:
+    sys.stdout.write(text)
+  return results
+
+
+def compare(baseline, current, time_tolerance=0.25, memory_tolerance=0.25, min_time_delta=0.05):
+  """Compares two benchmark results.
+
+  A phase regresses when it is slower than the baseline by more than `time_tolerance`
+  (relative) and `min_time_delta` seconds. The peak memory regresses when it grows by
+  more than `memory_tolerance`.
+
+  Returns:
+    A list of regression descriptions. The list is empty when there are no regressions.
+  """
+  regressions = []
+  for name, baseline_result in baseline['scenarios'].items():
+    current_result = current['scenarios'].get(name, None)
+    if current_result is None:
+      continue
+    for phase, baseline_time in baseline_result['phases'].items():
+      current_time = current_result['phases'].get(phase, None)
+      if current_time is None:
+        continue
+      if current_time > baseline_time * (1 + time_tolerance) and current_time - baseline_time > min_time_delta:
+        regressions.append('{}: {} took {:.3f}s, baseline {:.3f}s'.format(name, phase, current_time, baseline_time))
+    baseline_memory = baseline_result['peak_memory_bytes']
+    current_memory = current_result['peak_memory_bytes']
+    if current_memory > baseline_memory * (1 + memory_tolerance):
+      regressions.append('{}: peak memory {} bytes, baseline {} bytes'.format(name, current_memory, baseline_memory))
+  return regressions
+
+
+def _print_comparison(baseline, current):
+  row_format = '{:<20} {:<18} {:>12} {:>12} {:>8}'
+  print(row_format.format('scenario', 'metric', 'baseline', 'current', 'ratio'))
+  for name, current_result in current['scenarios'].items():
+    baseline_result = baseline['scenarios'].get(name, None)
+    if baseline_result is None:
+      print(row_format.format(name, '(not in baseline)', '', '', ''))
+      continue
+    metrics = [(phase, baseline_result['phases'].get(phase, None), seconds)
+               for phase, seconds in current_result['phases'].items()]
+    metrics.append(('peak_memory_bytes', baseline_result['peak_memory_bytes'], current_result['peak_memory_bytes']))
+    for metric, baseline_value, current_value in metrics:
+      ratio = '{:.2f}'.format(current_value / baseline_value) if baseline_value else ''
+      print(row_format.format(name, metric, '' if baseline_value is None else baseline_value, current_value, ratio))
+
+
+def parse_arguments(argv=None):
+  """Parse command line arguments."""
+
+  parser = argparse.ArgumentParser(description='Compiler scalability benchmarks.')
+  subparsers = parser.add_subparsers(dest='command')
+  subparsers.required = True
+
+  run_parser = subparsers.add_parser('run', help='run the benchmarks.')
+  run_parser.add_argument('--scenario',
+                          action='append',
+                          choices=list(SCENARIOS.keys()),
+                          help='scenario to run. Can be repeated. Defaults to all scenarios.')
+  run_parser.add_argument('--repeat',
+                          type=int,
+                          default=3,
+                          help='number of timed compilations of each scenario. The best time is reported.')
+  run_parser.add_argument('--output',
+                          type=str,
+                          help='local path to the output JSON file. Defaults to stdout.')
+
+  compare_parser = subparsers.add_parser('compare', help='compare results with a baseline. Fails on regressions.')
+  compare_parser.add_argument('baseline', type=str, help='local path to the baseline JSON file.')
+  compare_parser.add_argument('current', type=str, help='local path to the current results JSON file.')
+  compare_parser.add_argument('--time-tolerance',
+                              type=float,
+                              default=0.25,
+                              help='allowed relative slowdown of a phase, default: 0.25.')
+  compare_parser.add_argument('--memory-tolerance',
+                              type=float,
+                              default=0.25,
+                              help='allowed relative growth of the peak memory, default: 0.25.')
+  compare_parser.add_argument('--min-time-delta',
+                              type=float,
+                              default=0.05,
+                              help='slowdowns below this number of seconds are ignored, default: 0.05.')
+  return parser.parse_args(argv)
+
+
+def main(argv=None):
+  args = parse_arguments(argv)
+  if args.command == 'run':
+    run(args.scenario or list(SCENARIOS.keys()), args.repeat, args.output)
+    return 0
+
+  with open(args.baseline) as f:
+    baseline = json.load(f)
+  with open(args.current) as f:
+    current = json.load(f)
+  _print_comparison(baseline, current)
+  regressions = compare(baseline, current, args.time_tolerance, args.memory_tolerance, args.min_time_delta)
+  for regression in regressions:
+    print('REGRESSION: ' + regression, file=sys.stderr)
+  return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
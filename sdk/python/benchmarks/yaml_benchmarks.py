@@ -0,0 +1,95 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Micro-benchmark of the ordered YAML loader and dumper of kfp.components.
+
+Loads and dumps the component.yaml files of the repository with the pure-Python
+and the libyaml-based ordered loaders and dumpers, and checks that both produce
+the same documents.
+
+Usage (from sdk/python):
+  python -m benchmarks.yaml_benchmarks
+  python -m benchmarks.yaml_benchmarks --components-dir ../../components --repeat 10
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import yaml
+
+from kfp.components import _yaml_utils
+
+_DEFAULT_COMPONENTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'components')
+
+
+def _best_time(func, repeat):
+  best = float('inf')
+  for _ in range(repeat):
+    start = time.perf_counter()
+    func()
+    best = min(best, time.perf_counter() - start)
+  return best
+
+
+def run(components_dir, repeat):
+  if not getattr(yaml, '__with_libyaml__', False):
+    raise RuntimeError('PyYAML is not built with libyaml.')
+  texts = []
+  for path in sorted(glob.glob(os.path.join(components_dir, '**', 'component.yaml'), recursive=True)):
+    with open(path) as component_file:
+      texts.append(component_file.read())
+  if not texts:
+    raise RuntimeError('No component.yaml files found in ' + components_dir)
+
+  variants = [
+    ('pure-python', _yaml_utils._create_ordered_loader(yaml.SafeLoader), _yaml_utils._create_ordered_dumper(yaml.Dumper)),
+    ('libyaml', _yaml_utils._create_ordered_loader(yaml.CSafeLoader), _yaml_utils._create_ordered_dumper(yaml.CDumper)),
+  ]
+  results = {}
+  for name, loader, dumper in variants:
+    documents = [yaml.load(text, loader) for text in texts]
+    load_seconds = _best_time(lambda: [yaml.load(text, loader) for text in texts], repeat)
+    dump_seconds = _best_time(lambda: [yaml.dump(document, None, dumper) for document in documents], repeat)
+    results[name] = (documents, load_seconds, dump_seconds)
+
+  pure_documents, pure_load_seconds, pure_dump_seconds = results['pure-python']
+  libyaml_documents, libyaml_load_seconds, libyaml_dump_seconds = results['libyaml']
+  if pure_documents != libyaml_documents:
+    raise AssertionError('The loaders produced different documents.')
+  reloaded_documents = [yaml.load(yaml.dump(document, None, variants[1][2]), variants[0][1]) for document in pure_documents]
+  if reloaded_documents != pure_documents:
+    raise AssertionError('The libyaml dumper does not round-trip the documents.')
+
+  print('%d component files, best of %d runs' % (len(texts), repeat))
+  print('%-8s %14s %14s %9s' % ('', 'pure-python ms', 'libyaml ms', 'speedup'))
+  for operation, pure_seconds, libyaml_seconds in [
+      ('load', pure_load_seconds, libyaml_load_seconds),
+      ('dump', pure_dump_seconds, libyaml_dump_seconds)]:
+    print('%-8s %14.1f %14.1f %8.1fx' % (operation, pure_seconds * 1000, libyaml_seconds * 1000, pure_seconds / libyaml_seconds))
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description='Ordered YAML loader and dumper micro-benchmark.')
+  parser.add_argument('--components-dir', type=str, default=_DEFAULT_COMPONENTS_DIR,
+                      help='directory searched for component.yaml files.')
+  parser.add_argument('--repeat', type=int, default=5, help='number of runs.')
+  args = parser.parse_args(argv)
+  run(args.components_dir, args.repeat)
+
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -13,5 +13,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from ._client import Client
-from ._config import *
\ No newline at end of file
+from ._config import *
+from . import _lazy_import
+
+# The client pulls in kfp_server_api, the compiler and the kubernetes client,
+# so it is only imported when it is used. The subpackages used to be imported by the client.
+_lazy_import.install_lazy_attributes(globals(), {
+  'AsyncClient': '._async_client',
+  'Client': '._client',
+  'compiler': '.compiler',
+  'components': '.components',
+  'dsl': '.dsl',
+})
@@ -0,0 +1,309 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import namedtuple
+
+import kfp_server_api
+from kfp_server_api.rest import ApiException
+
+from ._client import Client
+
+try:
+  import aiohttp
+except ImportError:
+  aiohttp = None
+
+# Responses with these statuses are retried: too many requests and the server errors.
+_RETRYABLE_STATUSES = frozenset([429, 500, 502, 503, 504])
+# Non-idempotent requests, e.g. creating a run, may have been processed when the server failed or
+# timed out, so they are only retried when the server rejected them: too many requests and unavailable.
+_NON_IDEMPOTENT_RETRYABLE_STATUSES = frozenset([429, 503])
+
+# The swagger ApiClient deserializes the objects that have the response body in the data attribute.
+_ResponseData = namedtuple('_ResponseData', ['data'])
+
+
+class AsyncClient(object):
+  """Asyncio API client for Kubeflow Pipelines.
+
+  It has the same experiment and run methods as kfp.Client, but they are coroutines that share
+  a pool of HTTP connections, so thousands of runs can be submitted and monitored concurrently
+  from a single thread. Requires the aiohttp package.
+
+  Example usage:
+  ```python
+  async def sweep(learning_rates):
+    async with kfp.AsyncClient(host) as client:
+      experiment = await client.create_experiment('sweep')
+      runs = await asyncio.gather(*[
+          client.run_pipeline(experiment.id, 'lr-%s' % lr, 'pipeline.zip', {'lr': lr})
+          for lr in learning_rates])
+      return await asyncio.gather(*[client.wait_for_run_completion(run.id, timeout=3600) for run in runs])
+  ```
+  """
+
+  def __init__(self, host=None, client_id=None, namespace='kubeflow', max_concurrency=64,
+               max_retries=5, retry_backoff_seconds=0.5, max_retry_backoff_seconds=30,
+               request_timeout_seconds=60):
+    """Create a new instance of the asyncio kfp client.
+
+    Args:
+      host: the host name to use to talk to Kubeflow Pipelines. See kfp.Client.
+      client_id: The client ID used by Identity-Aware Proxy.
+      namespace: the namespace of the Kubeflow Pipelines service.
+      max_concurrency: the maximum number of concurrent requests and open connections.
+      max_retries: the maximum number of retries of a request that failed with a connection error,
+          the 429 status or a 5xx status. POST requests are only retried when the connection could
+          not be established or on the 429 and 503 statuses, so that they are never sent twice.
+      retry_backoff_seconds: the delay before the first retry. The delay is doubled for every
+          retry and randomized (full jitter). Retry-After response headers are respected.
+      max_retry_backoff_seconds: the maximum delay between the retries.
+      request_timeout_seconds: the timeout of a single request attempt.
+    """
+    if aiohttp is None:
+      raise ImportError('AsyncClient requires the aiohttp package. Install it with "pip install aiohttp".')
+
+    config = Client._load_config(host, client_id, namespace)
+    self._host = host
+    self._base_url = config.host if '://' in config.host else 'http://' + config.host
+    self._base_url = self._base_url.rstrip('/')
+    self._config = config
+    # Only used to serialize the requests and deserialize the responses.
+    self._api_client = kfp_server_api.api_client.ApiClient(config)
+    self._max_concurrency = max_concurrency
+    self._max_retries = max_retries
+    self._retry_backoff_seconds = retry_backoff_seconds
+    self._max_retry_backoff_seconds = max_retry_backoff_seconds
+    self._request_timeout_seconds = request_timeout_seconds
+    # The session and the semaphore are bound to the event loop, so they are created on first use.
+    self._session = None
+    self._semaphore = None
+
+  async def __aenter__(self):
+    return self
+
+  async def __aexit__(self, *args):
+    await self.close()
+
+  async def close(self):
+    """Closes the connections. The client can still be used afterwards."""
+    if self._session is not None:
+      session, self._session = self._session, None
+      self._semaphore = None
+      await session.close()
+
+  def _get_session(self):
+    if self._session is None:
+      self._session = aiohttp.ClientSession(
+          connector=aiohttp.TCPConnector(limit=self._max_concurrency, ssl=self._create_ssl_context()),
+          timeout=aiohttp.ClientTimeout(total=self._request_timeout_seconds))
+      self._semaphore = asyncio.Semaphore(self._max_concurrency)
+    return self._session
+
+  def _create_ssl_context(self):
+    config = self._config
+    if not config.verify_ssl:
+      return False
+    if not config.ssl_ca_cert and not config.cert_file:
+      return None
+    import ssl
+    ssl_context = ssl.create_default_context(cafile=config.ssl_ca_cert)
+    if config.cert_file:
+      ssl_context.load_cert_chain(config.cert_file, config.key_file)
+    return ssl_context
+
+  def _get_retry_delay(self, attempt, retry_after):
+    delay = min(self._max_retry_backoff_seconds, self._retry_backoff_seconds * (2 ** attempt))
+    delay = random.uniform(0, delay)
+    if retry_after:
+      try:
+        delay = max(delay, min(self._max_retry_backoff_seconds, float(retry_after)))
+      except ValueError:
+        pass # HTTP-date values are not supported
+    return delay
+
+  async def _request(self, method, path, response_type=None, query_params=None, body=None, idempotent=None):
+    """Sends the request, retrying it on connection errors and on the 429 and 5xx statuses.
+
+    Args:
+      idempotent: whether the request can be safely repeated. Defaults to True for GET requests.
+          Non-idempotent requests are only retried when they were not sent (connection could not be
+          established) or were rejected with the 429 or 503 status.
+    Returns:
+      The response deserialized into the swagger model type.
+    Raises:
+      kfp_server_api.rest.ApiException if the request fails.
+    """
+    session = self._get_session()
+    url = self._base_url + path
+    headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
+    params = [(key, str(value)) for key, value in (query_params or []) if value is not None]
+    self._api_client.update_params_for_auth(headers, params, ['Bearer'])
+    data = json.dumps(self._api_client.sanitize_for_serialization(body)) if body is not None else None
+    if idempotent is None:
+      idempotent = method == 'GET'
+    if idempotent:
+      retryable_errors = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+      retryable_statuses = _RETRYABLE_STATUSES
+    else:
+      retryable_errors = aiohttp.ClientConnectorError
+      retryable_statuses = _NON_IDEMPOTENT_RETRYABLE_STATUSES
+
+    attempt = 0
+    while True:
+      retry_after = None
+      try:
+        async with self._semaphore:
+          async with session.request(method, url, params=params, data=data, headers=headers) as response:
+            status = response.status
+            response_text = await response.text()
+            retry_after = response.headers.get('Retry-After', None)
+      except retryable_errors:
+        if attempt >= self._max_retries:
+          raise
+        logging.info('Retrying {} {} after a connection error.'.format(method, path))
+      else:
+        if status < 400:
+          if response_type is None:
+            return None
+          return self._api_client.deserialize(_ResponseData(response_text), response_type)
+        if status not in retryable_statuses or attempt >= self._max_retries:
+          exception = ApiException(status=status, reason=response.reason)
+          exception.body = response_text
+          exception.headers = response.headers
+          raise exception
+        logging.info('Retrying {} {} after the status {}.'.format(method, path, status))
+      await asyncio.sleep(self._get_retry_delay(attempt, retry_after))
+      attempt += 1
+
+  async def create_experiment(self, name):
+    """Create a new experiment or get the existing experiment with the name.
+    Args:
+      name: the name of the experiment.
+    Returns:
+      An Experiment object. Most important field is id.
+    """
+    try:
+      return await self.get_experiment(experiment_name=name)
+    except ValueError:
+      # Ignore error if the experiment does not exist.
+      pass
+    logging.info('Creating experiment {}.'.format(name))
+    experiment = kfp_server_api.models.ApiExperiment(name=name)
+    return await self._request('POST', '/apis/v1beta1/experiments', 'ApiExperiment', body=experiment)
+
+  async def list_experiments(self, page_token='', page_size=10, sort_by=''):
+    """List experiments.
+    Args:
+      page_token: token for starting of the page.
+      page_size: size of the page.
+      sort_by: can be '[field_name]', '[field_name] des'. For example, 'name des'.
+    Returns:
+      A response object including a list of experiments and next page token.
+    """
+    query_params = [('page_token', page_token), ('page_size', page_size), ('sort_by', sort_by)]
+    return await self._request('GET', '/apis/v1beta1/experiments', 'ApiListExperimentsResponse', query_params)
+
+  async def get_experiment(self, experiment_id=None, experiment_name=None):
+    """Get details of an experiment
+    Either experiment_id or experiment_name is required
+    Args:
+      experiment_id: id of the experiment. (Optional)
+      experiment_name: name of the experiment. (Optional)
+    Returns:
+      A response object including details of a experiment.
+    Throws:
+      ValueError if experiment is not found or None of the arguments is provided
+    """
+    if experiment_id is None and experiment_name is None:
+      raise ValueError('Either experiment_id or experiment_name is required')
+    if experiment_id is not None:
+      return await self._request('GET', '/apis/v1beta1/experiments/' + experiment_id, 'ApiExperiment')
+    next_page_token = ''
+    while next_page_token is not None:
+      list_experiments_response = await self.list_experiments(page_size=100, page_token=next_page_token)
+      next_page_token = list_experiments_response.next_page_token
+      for experiment in list_experiments_response.experiments or []:
+        if experiment.name == experiment_name:
+          return experiment
+    raise ValueError('No experiment is found with name {}.'.format(experiment_name))
+
+  async def run_pipeline(self, experiment_id, job_name, pipeline_package_path=None, params={}, pipeline_id=None):
+    """Run a specified pipeline.
+
+    Args:
+      experiment_id: The string id of an experiment.
+      job_name: name of the job.
+      pipeline_package_path: local path of the pipeline package(the filename should end with one of the following .tar.gz, .tgz, .zip, .yaml, .yml, .json).
+      params: a dictionary with key (string) as param name and value (string) as as param value.
+      pipeline_id: the string ID of a pipeline.
+
+    Returns:
+      A run object. Most important field is id.
+    """
+    run_body = Client._create_run_body(experiment_id, job_name, pipeline_package_path, params, pipeline_id)
+    run_detail = await self._request('POST', '/apis/v1beta1/runs', 'ApiRunDetail', body=run_body)
+    return run_detail.run
+
+  async def list_runs(self, page_token='', page_size=10, sort_by='', experiment_id=None):
+    """List runs.
+    Args:
+      page_token: token for starting of the page.
+      page_size: size of the page.
+      sort_by: one of 'field_name', 'field_name des'. For example, 'name des'.
+      experiment_id: experiment id to filter upon
+    Returns:
+      A response object including a list of runs and next page token.
+    """
+    query_params = [('page_token', page_token), ('page_size', page_size), ('sort_by', sort_by)]
+    if experiment_id is not None:
+      query_params.append(('resource_reference_key.type', kfp_server_api.models.ApiResourceType.EXPERIMENT))
+      query_params.append(('resource_reference_key.id', experiment_id))
+    return await self._request('GET', '/apis/v1beta1/runs', 'ApiListRunsResponse', query_params)
+
+  async def get_run(self, run_id):
+    """Get run details.
+    Args:
+      id of the run.
+    Returns:
+      A response object including details of a run.
+    Throws:
+      kfp_server_api.rest.ApiException if run is not found.
+    """
+    return await self._request('GET', '/apis/v1beta1/runs/' + run_id, 'ApiRunDetail')
+
+  async def wait_for_run_completion(self, run_id, timeout, poll_interval_seconds=5):
+    """Wait for a run to complete.
+    Args:
+      run_id: run id, returned from run_pipeline.
+      timeout: timeout in seconds.
+      poll_interval_seconds: the interval between the run status requests.
+    Returns:
+      A run detail object: Most important fields are run and pipeline_runtime
+    """
+    start_time = time.time()
+    while True:
+      get_run_response = await self.get_run(run_id)
+      status = get_run_response.run.status
+      if status is not None and status.lower() in ['succeeded', 'failed', 'skipped', 'error']:
+        return get_run_response
+      if time.time() - start_time > timeout:
+        raise TimeoutError('Run timeout')
+      logging.info('Waiting for the job to complete...')
+      await asyncio.sleep(poll_interval_seconds)
@@ -17,20 +17,37 @@ import time
 import logging
 import json
 import os
+import random
 import tarfile
 import tempfile
 import zipfile
 import yaml
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Mapping, Callable
 
 import kfp_server_api
+from kfp_server_api.rest import ApiException
 
 from .compiler import compiler
 from .compiler import _k8s_helper
 
 from ._auth import get_auth_token
 
+RunPipelineBatchResult = namedtuple('RunPipelineBatchResult', 'pipeline_id runs failures')
+
+_RUN_TERMINAL_STATES = ['succeeded', 'failed', 'skipped', 'error']
+
+def _is_run_finished(run):
+  return run.status is not None and run.status.lower() in _RUN_TERMINAL_STATES
+
+def _get_run_experiment_id(run):
+  for reference in run.resource_references or []:
+    if reference.key.type == kfp_server_api.models.ApiResourceType.EXPERIMENT:
+      return reference.key.id
+  return None
+
 class Client(object):
   """ API Client for KubeFlow Pipeline.
   """
@@ -39,7 +56,7 @@ class Client(object):
   IN_CLUSTER_DNS_NAME = 'ml-pipeline.{}.svc.cluster.local:8888'
   KUBE_PROXY_PATH = 'api/v1/namespaces/{}/services/ml-pipeline:http/proxy/'
 
-  def __init__(self, host=None, client_id=None, namespace='kubeflow'):
+  def __init__(self, host=None, client_id=None, namespace='kubeflow', experiment_cache_ttl_seconds=300):
     """Create a new instance of kfp client.
 
     Args:
@@ -51,15 +68,23 @@ class Client(object):
           If you connect to an IAP enabled cluster, set it to
           https://<your-deployment>.endpoints.<your-project>.cloud.goog/pipeline".
       client_id: The client ID used by Identity-Aware Proxy.
+      experiment_cache_ttl_seconds: how long the experiments found by name are cached. Set to 0 to disable the cache.
     """
 
     self._host = host
+    self._experiment_cache_ttl_seconds = experiment_cache_ttl_seconds
+    # Maps the experiment names to the (experiment, expiration time) tuples.
+    self._experiment_cache = {}
+    # Set to False when the server ignores or rejects the experiment name filter.
+    self._experiment_name_filter_supported = True
     config = self._load_config(host, client_id, namespace)
     api_client = kfp_server_api.api_client.ApiClient(config)
     self._run_api = kfp_server_api.api.run_service_api.RunServiceApi(api_client)
     self._experiment_api = kfp_server_api.api.experiment_service_api.ExperimentServiceApi(api_client)
+    self._upload_api = kfp_server_api.api.pipeline_upload_service_api.PipelineUploadServiceApi(api_client)
 
-  def _load_config(self, host, client_id, namespace):
+  @staticmethod
+  def _load_config(host, client_id, namespace):
     config = kfp_server_api.configuration.Configuration()
     if host:
       config.host = host
@@ -142,6 +167,7 @@ class Client(object):
       logging.info('Creating experiment {}.'.format(name))
       experiment = kfp_server_api.models.ApiExperiment(name=name)
       experiment = self._experiment_api.create_experiment(body=experiment)
+      self._cache_experiment(experiment)
     
     if self._is_ipython():
       import IPython
@@ -164,6 +190,20 @@ class Client(object):
         page_token=page_token, page_size=page_size, sort_by=sort_by)
     return response
 
+  def iter_experiments(self, sort_by='', limit=None, page_size=100):
+    """Iterates over the experiments, fetching them page by page.
+
+    The next page is fetched on a background thread while the items of the current page are consumed.
+    Args:
+      sort_by: can be '[field_name]', '[field_name] des'. For example, 'name des'.
+      limit: the maximum number of the experiments. All experiments are returned when not specified.
+      page_size: size of the fetched pages.
+    Returns:
+      A generator of the experiment objects.
+    """
+    list_page = lambda page_token, page_size: self.list_experiments(page_token=page_token, page_size=page_size, sort_by=sort_by)
+    return self._iter_list_items(list_page, 'experiments', page_size, limit)
+
   def get_experiment(self, experiment_id=None, experiment_name=None):
     """Get details of an experiment
     Either experiment_id or experiment_name is required
@@ -179,16 +219,52 @@ class Client(object):
       raise ValueError('Either experiment_id or experiment_name is required')
     if experiment_id is not None:
       return self._experiment_api.get_experiment(id=experiment_id)
+    experiment = self._get_cached_experiment(experiment_name) or self._find_experiment_by_name(experiment_name)
+    if experiment is None:
+      raise ValueError('No experiment is found with name {}.'.format(experiment_name))
+    return experiment
+
+  def _cache_experiment(self, experiment):
+    if self._experiment_cache_ttl_seconds > 0:
+      self._experiment_cache[experiment.name] = (experiment, time.time() + self._experiment_cache_ttl_seconds)
+
+  def _get_cached_experiment(self, experiment_name):
+    experiment, expiration_time = self._experiment_cache.get(experiment_name, (None, None))
+    if experiment is not None and expiration_time < time.time():
+      del self._experiment_cache[experiment_name]
+      return None
+    return experiment
+
+  def _find_experiment_by_name(self, experiment_name):
+    """Finds the experiment using the server-side name filter or by scanning the experiments, caching the experiments that are seen."""
+    if self._experiment_name_filter_supported:
+      name_filter = json.dumps({'predicates': [{'key': 'name', 'op': 'EQUALS', 'string_value': experiment_name}]})
+      try:
+        experiments = self._experiment_api.list_experiment(page_size=10, filter=name_filter).experiments or []
+      except ApiException as e:
+        if e.status not in [400, 501]:
+          raise
+        experiments = None
+      # Older servers ignore the filter and return the first page of all experiments
+      if experiments is not None and all(experiment.name == experiment_name for experiment in experiments):
+        for experiment in experiments:
+          self._cache_experiment(experiment)
+        return experiments[0] if experiments else None
+      logging.info('The server does not support the experiment name filter. Falling back to scanning the experiments.')
+      self._experiment_name_filter_supported = False
+
     next_page_token = ''
     while next_page_token is not None:
       list_experiments_response = self.list_experiments(page_size=100, page_token=next_page_token)
       next_page_token = list_experiments_response.next_page_token
-      for experiment in list_experiments_response.experiments:
+      for experiment in list_experiments_response.experiments or []:
+        self._cache_experiment(experiment)
         if experiment.name == experiment_name:
-          return self._experiment_api.get_experiment(id=experiment.id)
-    raise ValueError('No experiment is found with name {}.'.format(experiment_name))
+          return experiment
+    return None
 
-  def _extract_pipeline_yaml(self, package_file):
+  @staticmethod
+  def _extract_pipeline_yaml(package_file):
     def _choose_pipeline_yaml_file(file_list) -> str:
       yaml_files = [file for file in file_list if file.endswith('.yaml')]
       if len(yaml_files) == 0:
@@ -215,8 +291,11 @@ class Client(object):
     elif package_file.endswith('.yaml') or package_file.endswith('.yml'):
       with open(package_file, 'r') as f:
         return yaml.safe_load(f)
+    elif package_file.endswith('.json'):
+      with open(package_file, 'r') as f:
+        return json.load(f)
     else:
-      raise ValueError('The package_file '+ package_file + ' should ends with one of the following formats: [.tar.gz, .tgz, .zip, .yaml, .yml]')
+      raise ValueError('The package_file '+ package_file + ' should ends with one of the following formats: [.tar.gz, .tgz, .zip, .yaml, .yml, .json]')
 
   def run_pipeline(self, experiment_id, job_name, pipeline_package_path=None, params={}, pipeline_id=None):
     """Run a specified pipeline.
@@ -224,7 +303,7 @@ class Client(object):
     Args:
       experiment_id: The string id of an experiment.
       job_name: name of the job.
-      pipeline_package_path: local path of the pipeline package(the filename should end with one of the following .tar.gz, .tgz, .zip, .yaml, .yml).
+      pipeline_package_path: local path of the pipeline package(the filename should end with one of the following .tar.gz, .tgz, .zip, .yaml, .yml, .json).
       params: a dictionary with key (string) as param name and value (string) as as param value.
       pipeline_id: the string ID of a pipeline.
 
@@ -232,9 +311,21 @@ class Client(object):
       A run object. Most important field is id.
     """
 
+    run_body = self._create_run_body(experiment_id, job_name, pipeline_package_path, params, pipeline_id)
+    response = self._run_api.create_run(body=run_body)
+    
+    if self._is_ipython():
+      import IPython
+      html = ('Run link <a href="%s/#/runs/details/%s" target="_blank" >here</a>'
+              % (self._get_url_prefix(), response.run.id))
+      IPython.display.display(IPython.display.HTML(html))
+    return response.run
+
+  @staticmethod
+  def _create_run_body(experiment_id, job_name, pipeline_package_path=None, params={}, pipeline_id=None):
     pipeline_json_string = None
     if pipeline_package_path:
-      pipeline_obj = self._extract_pipeline_yaml(pipeline_package_path)
+      pipeline_obj = Client._extract_pipeline_yaml(pipeline_package_path)
       pipeline_json_string = json.dumps(pipeline_obj)
     api_params = [kfp_server_api.ApiParameter(name=_k8s_helper.K8sHelper.sanitize_k8s_name(k), value=str(v))
                   for k,v in params.items()]
@@ -245,17 +336,75 @@ class Client(object):
         pipeline_id=pipeline_id,
         workflow_manifest=pipeline_json_string, 
         parameters=api_params)
-    run_body = kfp_server_api.models.ApiRun(
+    return kfp_server_api.models.ApiRun(
         pipeline_spec=spec, resource_references=[reference], name=job_name)
 
-    response = self._run_api.create_run(body=run_body)
-    
-    if self._is_ipython():
-      import IPython
-      html = ('Run link <a href="%s/#/runs/details/%s" target="_blank" >here</a>'
-              % (self._get_url_prefix(), response.run.id))
-      IPython.display.display(IPython.display.HTML(html))
-    return response.run
+  def upload_pipeline(self, pipeline_package_path, pipeline_name=None):
+    """Uploads the pipeline package to the server.
+
+    Args:
+      pipeline_package_path: local path of the pipeline package(the filename should end with one of the following .tar.gz, .tgz, .zip, .yaml, .yml).
+      pipeline_name: name of the pipeline. Pipeline names must be unique. Defaults to the package file name.
+
+    Returns:
+      A pipeline object. Most important field is id.
+    """
+    return self._upload_api.upload_pipeline(pipeline_package_path, name=pipeline_name)
+
+  def run_pipeline_batch(self, experiment_id, package_or_func, param_list, job_name_prefix=None, pipeline_name=None, max_parallelism=16):
+    """Runs a pipeline with each of the parameter sets, e.g. for a parameter sweep.
+
+    The pipeline is uploaded once and the runs reference it by ID, so the workflow is not sent with every run.
+    The runs are created concurrently. Failing to create a run does not stop the creation of the other runs.
+
+    Args:
+      experiment_id: The string id of an experiment.
+      package_or_func: local path of the pipeline package or the pipeline function that is compiled to a package.
+      param_list: list of the parameter dictionaries of the runs. See run_pipeline.
+      job_name_prefix: prefix of the names of the jobs. The job names are the prefix followed by the index of the parameter set.
+      pipeline_name: name of the uploaded pipeline. Pipeline names must be unique. Defaults to the package name (or the pipeline function name) followed by the current time.
+      max_parallelism: the maximum number of runs created at the same time.
+
+    Returns:
+      A RunPipelineBatchResult with pipeline_id, runs - the run objects in the order of param_list (None for the runs that could not be created) and failures - a dictionary mapping the indexes of those runs to the exceptions.
+    """
+    param_list = list(param_list)
+    if callable(package_or_func):
+      base_name = package_or_func.__name__
+      pipeline_package_path = None
+    else:
+      base_name = os.path.basename(package_or_func).split('.')[0]
+      pipeline_package_path = package_or_func
+    pipeline_name = pipeline_name or base_name + ' ' + datetime.now().strftime('%Y-%m-%d %H-%M-%S')
+    job_name_prefix = job_name_prefix or base_name
+
+    if pipeline_package_path is None:
+      (fd, pipeline_package_path) = tempfile.mkstemp(suffix='.zip')
+      os.close(fd)
+      try:
+        compiler.Compiler().compile(package_or_func, pipeline_package_path)
+        pipeline = self.upload_pipeline(pipeline_package_path, pipeline_name)
+      finally:
+        os.remove(pipeline_package_path)
+    else:
+      pipeline = self.upload_pipeline(pipeline_package_path, pipeline_name)
+
+    def create_run(index):
+      run_body = self._create_run_body(experiment_id, '{} {}'.format(job_name_prefix, index), params=param_list[index], pipeline_id=pipeline.id)
+      return self._run_api.create_run(body=run_body).run
+
+    runs = [None] * len(param_list)
+    failures = {}
+    if param_list:
+      with ThreadPoolExecutor(max_workers=min(max_parallelism, len(param_list))) as executor:
+        futures = [executor.submit(create_run, index) for index in range(len(param_list))]
+        for index, future in enumerate(futures):
+          try:
+            runs[index] = future.result()
+          except Exception as e:
+            logging.warning('Failed to create the run {} of the pipeline {}: {}'.format(index, pipeline.id, e))
+            failures[index] = e
+    return RunPipelineBatchResult(pipeline.id, runs, failures)
 
   def create_run_from_pipeline_func(self, pipeline_func: Callable, arguments: Mapping[str, str], run_name=None, experiment_name=None):
     '''Runs pipeline on KFP-enabled Kubernetes cluster.
@@ -275,8 +424,8 @@ class Client(object):
         self.run_id = run_info.id
 
       def wait_for_run_completion(self, timeout=None):
-        timeout = timeout or datetime.datetime.max - datetime.datetime.min
-        return self._client.wait_for_run_completion(timeout)
+        timeout = timeout or float('inf')
+        return self._client.wait_for_run_completion(self.run_id, timeout)
 
       def __str__(self):
         return '<RunPipelineResult(run_id={})>'.format(self.run_id)
@@ -288,12 +437,48 @@ class Client(object):
     experiment = self.create_experiment(name=experiment_name)
     try:
       (_, pipeline_package_path) = tempfile.mkstemp(suffix='.zip')
-      kfp.compiler.Compiler().compile(pipeline_func, pipeline_package_path)
+      compiler.Compiler().compile(pipeline_func, pipeline_package_path)
       run_info = self.run_pipeline(experiment.id, run_name, pipeline_package_path, arguments)
       return RunPipelineResult(self, run_info)
     finally:
       os.remove(pipeline_package_path)
 
+  def iter_runs(self, experiment_id=None, sort_by='', limit=None, page_size=100):
+    """Iterates over the runs, fetching them page by page.
+
+    The next page is fetched on a background thread while the items of the current page are consumed.
+    Args:
+      experiment_id: experiment id to filter upon
+      sort_by: one of 'field_name', 'field_name des'. For example, 'created_at desc'.
+      limit: the maximum number of the runs. All runs are returned when not specified.
+      page_size: size of the fetched pages.
+    Returns:
+      A generator of the run objects.
+    """
+    list_page = lambda page_token, page_size: self.list_runs(page_token=page_token, page_size=page_size, sort_by=sort_by, experiment_id=experiment_id)
+    return self._iter_list_items(list_page, 'runs', page_size, limit)
+
+  @staticmethod
+  def _iter_list_items(list_page, items_field, page_size, limit):
+    if limit is not None:
+      if limit <= 0:
+        return
+      page_size = min(page_size, limit)
+    item_count = 0
+    with ThreadPoolExecutor(max_workers=1) as executor:
+      page_future = executor.submit(list_page, '', page_size)
+      while page_future is not None:
+        response = page_future.result()
+        items = getattr(response, items_field) or []
+        page_future = None
+        if response.next_page_token and (limit is None or item_count + len(items) < limit):
+          page_future = executor.submit(list_page, response.next_page_token, page_size)
+        for item in items:
+          yield item
+          item_count += 1
+          if limit is not None and item_count >= limit:
+            return
+
   def list_runs(self, page_token='', page_size=10, sort_by='', experiment_id=None):
     """List runs.
     Args:
@@ -329,17 +514,89 @@ class Client(object):
     Returns:
       A run detail object: Most important fields are run and pipeline_runtime
     """
-    status = 'Running:'
     start_time = datetime.now()
-    while status is None or status.lower() not in ['succeeded', 'failed', 'skipped', 'error']:
+    while True:
       get_run_response = self._run_api.get_run(run_id=run_id)
-      status = get_run_response.run.status
-      elapsed_time = (datetime.now() - start_time).seconds
+      if _is_run_finished(get_run_response.run):
+        return get_run_response
+      elapsed_time = (datetime.now() - start_time).total_seconds()
       logging.info('Waiting for the job to complete...')
       if elapsed_time > timeout:
         raise TimeoutError('Run timeout')
       time.sleep(5)
-    return get_run_response
+
+  def wait_for_runs(self, run_ids, timeout, experiment_id=None, callback=None, min_poll_interval_seconds=1, max_poll_interval_seconds=60):
+    """Wait for multiple runs to complete.
+
+    The run statuses are polled by listing the runs of their experiments page by page instead of getting every run,
+    so the workflow manifests are not fetched. The polling interval starts at min_poll_interval_seconds and is doubled
+    (with random jitter) up to max_poll_interval_seconds while no run finishes.
+
+    Args:
+      run_ids: ids of the runs or the run objects returned from run_pipeline.
+      timeout: timeout in seconds.
+      experiment_id: id of the experiment of the runs. When not specified, the experiments are taken from the run objects
+          or fetched with one get_run call per run.
+      callback: function that is called with every run object as soon as the run finishes.
+      min_poll_interval_seconds: the initial interval between the polls.
+      max_poll_interval_seconds: the maximum interval between the polls.
+    Returns:
+      A dictionary mapping the run ids to the finished run objects.
+    Throws:
+      TimeoutError if some runs have not finished before the timeout.
+    """
+    # Maps the ids of the pending runs to their experiment ids. None means that the experiment is not known yet.
+    pending_runs = {}
+    for run in run_ids:
+      if isinstance(run, str):
+        pending_runs[run] = experiment_id
+      else:
+        pending_runs[run.id] = experiment_id or _get_run_experiment_id(run)
+    finished_runs = {}
+
+    def finish_run(run):
+      del pending_runs[run.id]
+      finished_runs[run.id] = run
+      if callback:
+        callback(run)
+
+    def poll_runs():
+      # The runs with unknown experiment are fetched once to find their experiment. The runs without experiment cannot be listed.
+      for run_id in [run_id for run_id, run_experiment_id in pending_runs.items() if not run_experiment_id]:
+        run = self.get_run(run_id).run
+        if pending_runs[run_id] is None:
+          pending_runs[run_id] = _get_run_experiment_id(run) or ''
+        if _is_run_finished(run):
+          finish_run(run)
+      for polled_experiment_id in set(pending_runs.values()) - {''}:
+        unseen_run_ids = set(run_id for run_id, run_experiment_id in pending_runs.items() if run_experiment_id == polled_experiment_id)
+        next_page_token = ''
+        # The newest runs are listed first, so the scan usually stops at the first page
+        while unseen_run_ids and next_page_token is not None:
+          list_runs_response = self.list_runs(page_token=next_page_token, page_size=100, sort_by='created_at desc', experiment_id=polled_experiment_id)
+          next_page_token = list_runs_response.next_page_token
+          for run in list_runs_response.runs or []:
+            if run.id in unseen_run_ids:
+              unseen_run_ids.remove(run.id)
+              if _is_run_finished(run):
+                finish_run(run)
+
+    start_time = time.time()
+    poll_interval_seconds = min_poll_interval_seconds
+    while True:
+      finished_run_count = len(finished_runs)
+      poll_runs()
+      if not pending_runs:
+        return finished_runs
+      remaining_seconds = timeout - (time.time() - start_time)
+      if remaining_seconds <= 0:
+        raise TimeoutError('{} of {} runs have not finished before the timeout.'.format(len(pending_runs), len(pending_runs) + len(finished_runs)))
+      if len(finished_runs) > finished_run_count:
+        poll_interval_seconds = min_poll_interval_seconds
+      else:
+        poll_interval_seconds = min(poll_interval_seconds * 2, max_poll_interval_seconds)
+      logging.info('Waiting for {} runs to complete...'.format(len(pending_runs)))
+      time.sleep(min(random.uniform(poll_interval_seconds / 2, poll_interval_seconds), remaining_seconds))
 
   def _get_workflow_json(self, run_id):
     """Get the workflow json.
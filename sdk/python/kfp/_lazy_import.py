@@ -0,0 +1,67 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import importlib
+import sys
+import types
+from typing import Mapping
+
+
+def install_lazy_attributes(module_globals: dict, attribute_modules: Mapping[str, str]):
+  """Makes the attributes of a package importable from their submodules on first access.
+
+  Uses the module level __getattr__ (PEP 562). Python versions before 3.7 do not support it,
+  so the class of the package module is replaced with a subclass that defines __getattr__ there.
+
+  Args:
+    module_globals: globals() of the package.
+    attribute_modules: maps the attribute names to the relative names of the submodules
+        they are imported from, e.g. {'Client': '._client'}. An attribute named after its
+        submodule, e.g. {'dsl': '.dsl'}, is the submodule itself.
+  """
+  package_name = module_globals['__name__']
+
+  def _load_attribute(name):
+    module_name = attribute_modules[name]
+    module = importlib.import_module(module_name, package_name)
+    value = module if module_name == '.' + name else getattr(module, name)
+    module_globals[name] = value
+    return value
+
+  # Star imports do not call __getattr__, so they need the names of the lazy attributes.
+  if '__all__' not in module_globals:
+    public_names = set(name for name in module_globals.keys() if not name.startswith('_'))
+    module_globals['__all__'] = sorted(public_names | set(attribute_modules.keys()))
+
+  def __getattr__(name):
+    if name in attribute_modules:
+      return _load_attribute(name)
+    raise AttributeError('module {!r} has no attribute {!r}'.format(package_name, name))
+
+  def __dir__():
+    return sorted(set(module_globals.keys()) | set(attribute_modules.keys()))
+
+  if sys.version_info < (3, 7):
+    class _LazyModule(types.ModuleType):
+      def __getattr__(self, name):
+        return __getattr__(name)
+
+      def __dir__(self):
+        return __dir__()
+
+    sys.modules[package_name].__class__ = _LazyModule
+    return
+
+  module_globals['__getattr__'] = __getattr__
+  module_globals['__dir__'] = __dir__
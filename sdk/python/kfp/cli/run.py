@@ -34,9 +34,9 @@ def run():
 def list(ctx, experiment_id, max_size):
     """list recent KFP runs"""
     client = ctx.obj['client']
-    response = client.list_runs(experiment_id=experiment_id, page_size=max_size, sort_by='created_at desc')
-    if response and response.runs:
-        _print_runs(response.runs)
+    runs = [run for run in client.iter_runs(experiment_id=experiment_id, sort_by='created_at desc', limit=max_size)]
+    if runs:
+        _print_runs(runs)
     else:
         print('No runs found.')
 
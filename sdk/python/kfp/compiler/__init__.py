@@ -13,5 +13,13 @@
 # limitations under the License.
 
 
-from .compiler import Compiler
-from ._component_builder import build_python_component, build_docker_image, VersionedDependency
\ No newline at end of file
+from .. import _lazy_import
+
+# The compiler imports the DSL ops and the kubernetes client, so it is only imported when it is used.
+_lazy_import.install_lazy_attributes(globals(), {
+  'Compiler': '.compiler',
+  'compiler': '.compiler',
+  'build_python_component': '._component_builder',
+  'build_docker_image': '._component_builder',
+  'VersionedDependency': '._component_builder',
+})
@@ -0,0 +1,333 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Content-addressed on-disk cache for compiled pipeline packages.
+
+The cache key is a sha256 fingerprint of everything that can influence the
+compiled workflow: the pipeline function's source, its defaults, annotations,
+closure and referenced globals (followed recursively into user-defined helper
+functions and classes), the ComponentSpecs behind loaded task factories, the
+type_check flag, the compiler options and the compiler version (the kfp sources
+and PyYAML version).
+
+The fingerprint does not cover the inputs the pipeline function reads while it
+runs, e.g. component files loaded inside the function body or os.environ. Changes
+to them are not detected; components should be loaded at the module level, where
+the loaded task factories are fingerprinted by their ComponentSpecs.
+
+Op names are assigned deterministically by dsl.Pipeline.add_op during
+compilation, so fingerprints never depend on op IDs. Objects that cannot be
+fingerprinted deterministically (e.g. their only representation embeds a memory
+address) make the pipeline uncacheable; such pipelines are always compiled.
+"""
+
+import functools
+import hashlib
+import inspect
+import os
+import shutil
+import sys
+import tempfile
+import types
+import warnings
+
+from ._library_files import is_library_file
+
+_CACHE_FORMAT_VERSION = '1'
+
+_PACKAGE_EXTENSIONS = {
+  '.tar.gz': '.tar.gz',
+  '.tgz': '.tar.gz',
+  '.zip': '.zip',
+  '.yaml': '.yaml',
+  '.yml': '.yaml',
+  '.json': '.json',
+}
+
+
+class CompileCacheStats(object):
+  """Hit/miss counters of a compile cache."""
+
+  def __init__(self, hits: int = 0, misses: int = 0):
+    self.hits = hits
+    self.misses = misses
+
+  def to_dict(self):
+    return {'hits': self.hits, 'misses': self.misses}
+
+  def __repr__(self):
+    return 'CompileCacheStats(hits=%d, misses=%d)' % (self.hits, self.misses)
+
+
+class _UnfingerprintableError(Exception):
+  pass
+
+
+def _package_extension(package_path):
+  """Returns the normalized package extension or None if it is not supported."""
+  for extension, normalized_extension in _PACKAGE_EXTENSIONS.items():
+    if package_path.endswith(extension):
+      return normalized_extension
+  return None
+
+
+@functools.lru_cache(maxsize=None)
+def _compiler_version_digest():
+  """Digest of the kfp sources and of the libraries that affect the compiled output."""
+  import yaml
+  import kfp
+  h = hashlib.sha256()
+  h.update(_CACHE_FORMAT_VERSION.encode())
+  h.update(getattr(yaml, '__version__', '').encode())
+  kfp_dir = os.path.dirname(os.path.abspath(kfp.__file__))
+  for root, dirs, files in os.walk(kfp_dir):
+    dirs.sort()
+    for file_name in sorted(files):
+      if file_name.endswith('.py'):
+        file_path = os.path.join(root, file_name)
+        h.update(os.path.relpath(file_path, kfp_dir).encode())
+        with open(file_path, 'rb') as f:
+          h.update(f.read())
+  return h.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def _is_library_module(module_name):
+  """Library code is identified by name only; user code is fingerprinted by content.
+
+  Only kfp, the built-in modules and the modules installed in the stdlib or site-packages
+  directories are libraries. Modules without files, e.g. __main__ in notebooks or
+  "python -c", are user code.
+  """
+  if not module_name:
+    return False
+  if module_name.split('.')[0] in ('kfp', 'builtins') or module_name in sys.builtin_module_names:
+    return True
+  module = sys.modules.get(module_name)
+  if getattr(getattr(module, '__spec__', None), 'origin', None) in ('built-in', 'frozen'):
+    return True
+  module_file = getattr(module, '__file__', None)
+  if not module_file:
+    return False
+  return is_library_file(module_file)
+
+
+class _Fingerprinter(object):
+  """Computes a stable digest of Python objects referenced by a pipeline function."""
+
+  def __init__(self):
+    self._memo = {}
+    self._in_progress = set()
+
+  def digest(self, value) -> str:
+    key = id(value)
+    if key in self._memo:
+      return self._memo[key][1]
+    if key in self._in_progress:
+      # Reference cycle. The enclosing object is fingerprinted anyway.
+      return 'cycle'
+    self._in_progress.add(key)
+    try:
+      h = hashlib.sha256()
+      for token in self._tokens(value):
+        h.update(token.encode('utf-8', 'surrogatepass'))
+        h.update(b'\0')
+      result = h.hexdigest()
+    finally:
+      self._in_progress.discard(key)
+    # The object is kept alive so that its id cannot be reused for another object.
+    self._memo[key] = (value, result)
+    return result
+
+  def _tokens(self, value):
+    yield type(value).__module__ + '.' + type(value).__qualname__
+
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+      yield repr(value)
+      return
+
+    if isinstance(value, (list, tuple)):
+      for item in value:
+        yield self.digest(item)
+      return
+
+    if isinstance(value, (set, frozenset)):
+      yield from sorted(self.digest(item) for item in value)
+      return
+
+    if isinstance(value, dict):
+      yield from sorted(self.digest(k) + ':' + self.digest(v) for k, v in value.items())
+      return
+
+    if isinstance(value, types.ModuleType):
+      yield value.__name__
+      if not _is_library_module(value.__name__):
+        if not getattr(value, '__file__', None):
+          raise _UnfingerprintableError('Cannot get the source of module {}'.format(value.__name__))
+        with open(value.__file__, 'rb') as f:
+          yield hashlib.sha256(f.read()).hexdigest()
+      return
+
+    if isinstance(value, functools.partial):
+      yield self.digest(value.func)
+      yield self.digest(value.args)
+      yield self.digest(value.keywords)
+      return
+
+    from ..dsl import PipelineParam
+    if isinstance(value, PipelineParam):
+      yield str(value)
+      return
+
+    component_spec = getattr(value, 'component_spec', None)
+    if callable(value) and component_spec is not None:
+      # Task factory created from a component. Only the spec influences the compiled output.
+      yield self.digest(component_spec.to_dict())
+      return
+
+    if isinstance(value, types.MethodType):
+      yield self.digest(value.__func__)
+      yield self.digest(value.__self__)
+      return
+
+    if isinstance(value, types.FunctionType):
+      yield from self._function_tokens(value)
+      return
+
+    if isinstance(value, type):
+      yield value.__module__ + '.' + value.__qualname__
+      if not _is_library_module(value.__module__):
+        try:
+          yield inspect.getsource(value)
+        except (OSError, TypeError):
+          raise _UnfingerprintableError('Cannot get the source of class {}'.format(value.__qualname__))
+      return
+
+    if isinstance(value, (types.BuiltinFunctionType, types.BuiltinMethodType)):
+      yield getattr(value, '__module__', None) or ''
+      yield value.__qualname__
+      return
+
+    to_dict = getattr(value, 'to_dict', None)
+    if callable(to_dict):
+      # ModelBase structures and kubernetes/argo swagger models
+      yield self.digest(type(value))
+      yield self.digest(to_dict())
+      return
+
+    if hasattr(value, '__dict__') and not callable(value):
+      yield self.digest(type(value))
+      yield self.digest(vars(value))
+      return
+
+    raise _UnfingerprintableError('Cannot fingerprint object of type {}'.format(type(value)))
+
+  def _function_tokens(self, func):
+    yield func.__module__ or ''
+    yield func.__qualname__
+    if _is_library_module(func.__module__):
+      return
+    try:
+      yield inspect.getsource(func)
+    except (OSError, TypeError):
+      yield from self._code_tokens(func.__code__)
+    yield self.digest(func.__defaults__)
+    yield self.digest(func.__kwdefaults__)
+    yield self.digest(getattr(func, '__annotations__', None))
+    yield self.digest({
+      key: value for key, value in vars(func).items()
+      if key not in ('__wrapped__',)
+    })
+    for cell in func.__closure__ or ():
+      try:
+        cell_contents = cell.cell_contents
+      except ValueError: # Empty cell
+        cell_contents = None
+      yield self.digest(cell_contents)
+    # Globals referenced by the function, including the ones in nested code objects.
+    for name in sorted(self._referenced_names(func.__code__)):
+      if name in func.__globals__:
+        yield name
+        yield self.digest(func.__globals__[name])
+
+  def _code_tokens(self, code):
+    yield code.co_code.hex()
+    yield repr((code.co_names, code.co_varnames, code.co_freevars, code.co_cellvars))
+    for const in code.co_consts:
+      if isinstance(const, types.CodeType):
+        yield from self._code_tokens(const)
+      else:
+        yield self.digest(const)
+
+  def _referenced_names(self, code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+      if isinstance(const, types.CodeType):
+        names |= self._referenced_names(const)
+    return names
+
+
+def fingerprint_pipeline(pipeline_func, type_check: bool, deduplicate_templates: bool = False):
+  """Returns the fingerprint of the pipeline function or None if it cannot be fingerprinted."""
+  try:
+    h = hashlib.sha256()
+    h.update(_compiler_version_digest().encode())
+    h.update(repr(bool(type_check)).encode())
+    if deduplicate_templates:
+      h.update(b'deduplicate_templates')
+    h.update(_Fingerprinter().digest(pipeline_func).encode())
+    return h.hexdigest()
+  except (_UnfingerprintableError, OSError) as e:
+    warnings.warn('Pipeline function {} cannot be fingerprinted, the compile cache is not used for it: {}'.format(
+      getattr(pipeline_func, '__name__', pipeline_func), e))
+    return None
+
+
+class CompileCache(object):
+  """On-disk store of compiled pipeline packages keyed by the pipeline fingerprint."""
+
+  def __init__(self, cache_dir: str):
+    self.cache_dir = os.path.expanduser(cache_dir)
+    self.stats = CompileCacheStats()
+
+  def _entry_path(self, fingerprint, extension):
+    return os.path.join(self.cache_dir, fingerprint[:2], fingerprint + extension)
+
+  def restore(self, fingerprint, package_path) -> bool:
+    """Writes the cached package to package_path. Returns whether the cache had the entry."""
+    extension = _package_extension(package_path)
+    entry_path = self._entry_path(fingerprint, extension) if extension else None
+    if entry_path is None or not os.path.exists(entry_path):
+      self.stats.misses += 1
+      return False
+    shutil.copyfile(entry_path, package_path)
+    self.stats.hits += 1
+    return True
+
+  def store(self, fingerprint, package_path):
+    """Stores the compiled package. The entry is written atomically."""
+    extension = _package_extension(package_path)
+    if not extension:
+      return
+    entry_path = self._entry_path(fingerprint, extension)
+    entry_dir = os.path.dirname(entry_path)
+    os.makedirs(entry_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=entry_dir, suffix='.tmp')
+    try:
+      with os.fdopen(fd, 'wb') as tmp_file, open(package_path, 'rb') as package_file:
+        shutil.copyfileobj(package_file, tmp_file)
+      os.replace(tmp_path, entry_path)
+    except:
+      os.remove(tmp_path)
+      raise
@@ -0,0 +1,36 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tells the files of the installed libraries apart from the user code."""
+
+import functools
+import os
+import sysconfig
+
+
+@functools.lru_cache(maxsize=None)
+def get_library_paths():
+  """Returns the stdlib and site-packages directories, each ending with a path separator."""
+  paths = set()
+  for key in ('stdlib', 'platstdlib', 'purelib', 'platlib'):
+    path = sysconfig.get_paths().get(key)
+    if path:
+      paths.add(os.path.realpath(path) + os.sep)
+  return tuple(paths)
+
+
+def is_library_file(file_path):
+  """Returns whether the file is installed in the stdlib or site-packages directories."""
+  file_path = os.path.realpath(file_path)
+  return any(file_path.startswith(path) for path in get_library_paths())
@@ -12,7 +12,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import re
 import warnings
 import yaml
 from collections import OrderedDict
@@ -22,6 +21,7 @@ from ._k8s_helper import K8sHelper
 from .. import dsl
 from ..dsl._container_op import BaseOp
 from ..dsl._artifact_location import ArtifactLocation
+from ..dsl._pipeline_param import _substitute_serialized_pipelineparams
 
 # generics
 T = TypeVar('T')
@@ -39,13 +39,8 @@ def _process_obj(obj: Any, map_to_tmpl_var: dict):
     """
     # serialized str might be unsanitized
     if isinstance(obj, str):
-        # get signature
-        param_tuples = dsl.match_serialized_pipelineparam(obj)
-        if not param_tuples:
-            return obj
         # replace all unsanitized signature with template var
-        for param_tuple in param_tuples:
-            obj = re.sub(param_tuple.pattern, map_to_tmpl_var[param_tuple.pattern], obj)
+        return _substitute_serialized_pipelineparams(obj, map_to_tmpl_var)
 
     # list
     if isinstance(obj, list):
@@ -0,0 +1,196 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Deduplication of identical op templates in a compiled workflow.
+
+Op templates that only differ in their name, in the op name prefix of their output
+parameters and in plain string values are replaced by one shared template. The
+differing string values are lifted into input parameters of the shared template and
+are passed as arguments by the DAG tasks. References to the renamed output parameters
+in the DAG templates are rewritten.
+
+Strings are never lifted from "name" fields, from the inputs and outputs sections or
+when they contain a template variable ("{{...}}"), because the variables of task
+arguments are resolved in the scope of the DAG instead of the op.
+"""
+
+import json
+import re
+from collections import OrderedDict
+
+_LIFTED_VALUE = '\0'
+_LIFTED_PARAMETER_NAME_FORMAT = 'shared-value-%d'
+_TASK_OUTPUT_REFERENCE_REGEX = re.compile(r'{{tasks\.([^.{}]+)\.outputs\.parameters\.([^{}]+)}}')
+
+
+def _is_liftable(key, value):
+  return isinstance(value, str) and key != 'name' and '{{' not in value
+
+
+def _extract_shape(obj, lifted_values, key=None):
+  """Returns a copy of obj with the liftable strings replaced by _LIFTED_VALUE.
+
+  The replaced strings are appended to lifted_values in traversal order.
+  """
+  if isinstance(obj, dict):
+    return {k: _extract_shape(v, lifted_values, k) for k, v in obj.items()}
+  if isinstance(obj, list):
+    return [_extract_shape(item, lifted_values) for item in obj]
+  if _is_liftable(key, obj):
+    lifted_values.append(obj)
+    return _LIFTED_VALUE
+  return obj
+
+
+def _fill_shape(obj, slot_values, key=None):
+  """Inverse of _extract_shape. slot_values is an iterator of the values of the lifted strings."""
+  if isinstance(obj, dict):
+    return {k: _fill_shape(v, slot_values, k) for k, v in obj.items()}
+  if isinstance(obj, list):
+    return [_fill_shape(item, slot_values) for item in obj]
+  if _is_liftable(key, obj) and obj == _LIFTED_VALUE:
+    return next(slot_values)
+  return obj
+
+
+def _canonicalize_op_template(template):
+  """Returns the shape of the template, its lifted values and the output parameter renames."""
+  op_name = template['name']
+  output_renames = {}
+  shape = {}
+  lifted_values = []
+  for key, value in template.items():
+    if key == 'name':
+      continue
+    if key in ('inputs', 'outputs'):
+      shape[key] = value
+    else:
+      shape[key] = _extract_shape(value, lifted_values, key)
+
+  output_parameters = template.get('outputs', {}).get('parameters', [])
+  if output_parameters:
+    prefix = op_name + '-'
+    canonical_output_parameters = []
+    for parameter in output_parameters:
+      name = parameter['name']
+      if name.startswith(prefix):
+        output_renames[name] = name[len(prefix):]
+        parameter = dict(parameter, name=name[len(prefix):])
+      canonical_output_parameters.append(parameter)
+    shape['outputs'] = dict(shape['outputs'], parameters=canonical_output_parameters)
+  return shape, lifted_values, output_renames
+
+
+def _rewrite_task_output_references(obj, output_renames):
+  if isinstance(obj, dict):
+    return {k: _rewrite_task_output_references(v, output_renames) for k, v in obj.items()}
+  if isinstance(obj, list):
+    return [_rewrite_task_output_references(item, output_renames) for item in obj]
+  if isinstance(obj, str) and '{{tasks.' in obj:
+    def _rename(match):
+      task_name, parameter_name = match.group(1), match.group(2)
+      new_parameter_name = output_renames.get(task_name, {}).get(parameter_name, parameter_name)
+      return '{{tasks.%s.outputs.parameters.%s}}' % (task_name, new_parameter_name)
+    return _TASK_OUTPUT_REFERENCE_REGEX.sub(_rename, obj)
+  return obj
+
+
+def deduplicate_op_templates(templates, op_names, excluded_op_names=()):
+  """Replaces the identical op templates with shared templates.
+
+  Args:
+    templates: list of all the templates of the workflow.
+    op_names: names of the ops. The template and the DAG task of each op are named after the op.
+    excluded_op_names: ops whose templates are never shared, e.g. the exit handler op.
+
+  Returns:
+    The list of templates of the workflow with the shared templates.
+  """
+  templates_by_name = OrderedDict((template['name'], template) for template in templates)
+  excluded_op_names = set(excluded_op_names)
+
+  candidates = OrderedDict()
+  for op_name in sorted(op_names):
+    template = templates_by_name.get(op_name, None)
+    if template is None or op_name in excluded_op_names:
+      continue
+    shape, lifted_values, output_renames = _canonicalize_op_template(template)
+    shape_key = json.dumps(shape, sort_keys=True)
+    candidates.setdefault(shape_key, []).append((op_name, shape, lifted_values, output_renames))
+
+  # op name -> (shared template name, task arguments)
+  task_rewrites = {}
+  # op name -> {old output parameter name -> new output parameter name}
+  output_renames_by_op = {}
+  for members in candidates.values():
+    if len(members) < 2:
+      continue
+    shared_name, shape, representative_values, _ = members[0]
+    input_parameters = list(shape.get('inputs', {}).get('parameters', []))
+    used_parameter_names = set(parameter['name'] for parameter in input_parameters)
+
+    # Slots with the same value in all templates keep their value. The others become inputs.
+    slot_values = []
+    lifted_parameter_names = {}
+    for slot, value in enumerate(representative_values):
+      if all(member[2][slot] == value for member in members):
+        slot_values.append(value)
+        continue
+      index = len(lifted_parameter_names) + 1
+      parameter_name = _LIFTED_PARAMETER_NAME_FORMAT % index
+      while parameter_name in used_parameter_names:
+        index += 1
+        parameter_name = _LIFTED_PARAMETER_NAME_FORMAT % index
+      used_parameter_names.add(parameter_name)
+      lifted_parameter_names[slot] = parameter_name
+      input_parameters.append({'name': parameter_name})
+      slot_values.append('{{inputs.parameters.%s}}' % parameter_name)
+
+    slot_values = iter(slot_values)
+    shared_template = {'name': shared_name}
+    for key, value in shape.items():
+      shared_template[key] = value if key in ('inputs', 'outputs') else _fill_shape(value, slot_values, key)
+    if input_parameters:
+      input_parameters.sort(key=lambda x: x['name'])
+      shared_template['inputs'] = dict(shape.get('inputs', {}), parameters=input_parameters)
+    templates_by_name[shared_name] = shared_template
+
+    for op_name, _, lifted_values, output_renames in members:
+      arguments = [{'name': parameter_name, 'value': lifted_values[slot]}
+                   for slot, parameter_name in lifted_parameter_names.items()]
+      task_rewrites[op_name] = (shared_name, arguments)
+      if output_renames:
+        output_renames_by_op[op_name] = output_renames
+      if op_name != shared_name:
+        del templates_by_name[op_name]
+
+  if not task_rewrites:
+    return templates
+
+  deduplicated_templates = []
+  for template in templates_by_name.values():
+    if 'dag' in template:
+      template = _rewrite_task_output_references(template, output_renames_by_op)
+      for task in template['dag']['tasks']:
+        rewrite = task_rewrites.get(task['template'], None)
+        if rewrite is None:
+          continue
+        shared_name, arguments = rewrite
+        task['template'] = shared_name
+        if arguments:
+          task_arguments = task.setdefault('arguments', {}).setdefault('parameters', [])
+          task_arguments.extend(arguments)
+          task_arguments.sort(key=lambda x: x['name'])
+    deduplicated_templates.append(template)
+  return deduplicated_templates
@@ -0,0 +1,110 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Serialization of compiled workflows into pipeline packages.
+
+Workflows are written straight into the package file or archive member instead of
+being rendered into an intermediate string. YAML is emitted with libyaml's C emitter
+when PyYAML was built with it.
+"""
+
+import io
+import json
+import os
+import sys
+import tarfile
+import tempfile
+import zipfile
+
+import yaml
+
+_SUPPORTED_PACKAGE_FORMATS = '[.tar.gz, .tgz, .zip, .yaml, .yml, .json]'
+
+
+class _NoAliasDumper(yaml.Dumper):
+  """Pure-Python YAML dumper that never emits anchors and aliases."""
+
+  def ignore_aliases(self, data):
+    return True
+
+
+if getattr(yaml, '__with_libyaml__', False):
+  class _NoAliasCDumper(yaml.CDumper):
+    """libyaml-based YAML dumper that never emits anchors and aliases."""
+
+    def ignore_aliases(self, data):
+      return True
+
+  _DUMPER = _NoAliasCDumper
+else:
+  _DUMPER = _NoAliasDumper
+
+
+def dump_workflow(workflow, stream, serialization_format='yaml'):
+  """Writes the workflow to a text stream.
+
+  Args:
+    workflow: the compiled workflow dict.
+    stream: text stream to write to.
+    serialization_format: 'yaml' or 'json'.
+  """
+  if serialization_format == 'yaml':
+    yaml.dump(workflow, stream, Dumper=_DUMPER, default_flow_style=False)
+  elif serialization_format == 'json':
+    json.dump(workflow, stream, sort_keys=True)
+  else:
+    raise ValueError('Unsupported serialization format: ' + str(serialization_format))
+
+
+def write_workflow_package(workflow, package_path):
+  """Writes the workflow to a pipeline package.
+
+  The package format is chosen by the package_path extension: .tar.gz/.tgz and .zip archives
+  contain a pipeline.yaml member, .yaml/.yml and .json are plain YAML or JSON files.
+  """
+  if package_path.endswith('.tar.gz') or package_path.endswith('.tgz'):
+    # Tar members need their size upfront, so the YAML is spooled to an anonymous
+    # temporary file rather than kept in memory.
+    with tempfile.TemporaryFile() as yaml_file:
+      with io.TextIOWrapper(yaml_file, encoding='utf-8', write_through=True) as yaml_text_file:
+        dump_workflow(workflow, yaml_text_file)
+        yaml_text_file.flush()
+        tarinfo = tarfile.TarInfo('pipeline.yaml')
+        tarinfo.size = yaml_file.tell()
+        yaml_file.seek(0)
+        with tarfile.open(package_path, "w:gz") as tar:
+          tar.addfile(tarinfo, fileobj=yaml_file)
+  elif package_path.endswith('.zip'):
+    with zipfile.ZipFile(package_path, "w") as zip:
+      if sys.version_info >= (3, 6):
+        zipinfo = zipfile.ZipInfo('pipeline.yaml')
+        zipinfo.compress_type = zipfile.ZIP_DEFLATED
+        with zip.open(zipinfo, 'w') as yaml_file:
+          with io.TextIOWrapper(yaml_file, encoding='utf-8', write_through=True) as yaml_text_file:
+            dump_workflow(workflow, yaml_text_file)
+      else:
+        # ZipFile.open(..., 'w') requires Python 3.6, so the YAML is spooled to a temporary file.
+        with tempfile.TemporaryDirectory() as tmp_dir:
+          yaml_path = os.path.join(tmp_dir, 'pipeline.yaml')
+          with open(yaml_path, 'w', encoding='utf-8') as yaml_file:
+            dump_workflow(workflow, yaml_file)
+          zip.write(yaml_path, 'pipeline.yaml', zipfile.ZIP_DEFLATED)
+  elif package_path.endswith('.yaml') or package_path.endswith('.yml'):
+    with open(package_path, 'w') as yaml_file:
+      dump_workflow(workflow, yaml_file)
+  elif package_path.endswith('.json'):
+    with open(package_path, 'w') as json_file:
+      dump_workflow(workflow, json_file, serialization_format='json')
+  else:
+    raise ValueError('The output path '+ package_path + ' should ends with one of the following formats: ' + _SUPPORTED_PACKAGE_FORMATS)
@@ -16,17 +16,102 @@
 from collections import defaultdict
 import inspect
 import re
-import tarfile
-import zipfile
-import yaml
 
 from .. import dsl
 from ._k8s_helper import K8sHelper
 from ._op_to_template import _op_to_template
+from ._compile_cache import CompileCache, fingerprint_pipeline
+from ._workflow_serializer import write_workflow_package
+from ._template_deduplication import deduplicate_op_templates
 
 from ..dsl._metadata import TypeMeta, _extract_pipeline_metadata
 from ..dsl._ops_group import OpsGroup
 
+class _GroupAncestry(object):
+  """Index of the ancestor groups of all ops and opsgroups in a pipeline.
+
+  Each op and opsgroup is interned as an integer node id with its parent id and depth.
+  The first uncommon ancestors of two nodes (the children of their lowest common ancestor)
+  are found with binary lifting in O(log(depth)) instead of comparing full ancestor lists.
+  Ops and recursive opsgroups are looked up before the (non-root) opsgroups.
+  """
+
+  def __init__(self, root_group):
+    self.names = []
+    self.parents = []
+    self.depths = []
+    self._op_ids = {}
+    self._group_ids = {}
+    # _jumps[k][node_id] is the 2^k-th ancestor of the node or -1.
+    self._jumps = None
+
+    def _add_node(name, parent_id):
+      self.names.append(name)
+      self.parents.append(parent_id)
+      self.depths.append(self.depths[parent_id] + 1 if parent_id >= 0 else 0)
+      return len(self.names) - 1
+
+    def _add_children(group, group_id):
+      for g in group.groups:
+        # Add recursive opsgroup in the ops index
+        # such that the i/o dependency can be propagated to the ancester opsgroups
+        if g.recursive_ref:
+          self._op_ids[g.name] = _add_node(g.name, group_id)
+          continue
+        subgroup_id = _add_node(g.name, group_id)
+        self._group_ids[g.name] = subgroup_id
+        _add_children(g, subgroup_id)
+      for op in group.ops:
+        self._op_ids[op.name] = _add_node(op.name, group_id)
+
+    _add_children(root_group, _add_node(root_group.name, -1))
+
+  def get_node_id(self, name):
+    node_id = self._op_ids.get(name, None)
+    if node_id is None:
+      node_id = self._group_ids.get(name, None)
+    if node_id is None:
+      raise ValueError(name + ' does not exist.')
+    return node_id
+
+  def _build_jumps(self):
+    self._jumps = [self.parents]
+    max_depth = max(self.depths)
+    while (1 << len(self._jumps)) <= max_depth:
+      previous = self._jumps[-1]
+      self._jumps.append([previous[ancestor] if ancestor >= 0 else -1 for ancestor in previous])
+
+  def _get_ancestor_at_depth(self, node_id, depth):
+    if self._jumps is None:
+      self._build_jumps()
+    distance = self.depths[node_id] - depth
+    level = 0
+    while distance:
+      if distance & 1:
+        node_id = self._jumps[level][node_id]
+      distance >>= 1
+      level += 1
+    return node_id
+
+  def get_first_uncommon_ancestors(self, id1, id2):
+    """Gets the first unique ancestors between two ops/opsgroups.
+
+    For example, op1's ancestor groups are [root, G1, G2, G3, op1], op2's ancestor groups are
+    [root, G1, G4, op2], then it returns the ids of (G2, G4).
+    """
+    depth = min(self.depths[id1], self.depths[id2])
+    ancestor1 = self._get_ancestor_at_depth(id1, depth)
+    ancestor2 = self._get_ancestor_at_depth(id2, depth)
+    if ancestor1 == ancestor2:
+      raise ValueError('{} and {} cannot depend on each other because one contains the other.'.format(
+          self.names[id1], self.names[id2]))
+    for level in reversed(range(len(self._jumps))):
+      if self._jumps[level][ancestor1] != self._jumps[level][ancestor2]:
+        ancestor1 = self._jumps[level][ancestor1]
+        ancestor2 = self._jumps[level][ancestor2]
+    return ancestor1, ancestor2
+
+
 class Compiler(object):
   """DSL Compiler.
 
@@ -41,8 +126,43 @@ class Compiler(object):
 
   Compiler().compile(my_pipeline, 'path/to/workflow.yaml')
   ```
+
+  Recompiling unchanged pipelines can be skipped by passing a cache directory:
+  ```python
+  compiler = Compiler(cache_dir='~/.cache/kfp/compiler')
+  compiler.compile(my_pipeline, 'path/to/workflow.yaml')
+  print(compiler.cache_stats)
+  ```
+
+  Wide pipelines built from the same component can share their op templates:
+  ```python
+  Compiler(deduplicate_templates=True).compile(my_pipeline, 'path/to/workflow.yaml')
+  ```
   """
 
+  def __init__(self, cache_dir: str = None, deduplicate_templates: bool = False):
+    """Create a new instance of Compiler.
+
+    Args:
+      cache_dir: optional directory of the on-disk compile cache. When set, packages of
+          pipelines whose fingerprint (source, closure, defaults, referenced globals including
+          the components loaded into them, and compiler version) is already cached are copied
+          instead of being recompiled. The fingerprint does not cover what the pipeline function
+          reads while it runs, e.g. the files of components loaded inside the function body with
+          load_component_from_file or os.environ. Changes to those are not detected and the stale
+          cached package is used, so load such components at the module level or do not use the cache.
+      deduplicate_templates: whether the op templates that only differ in their name and in
+          plain string values are replaced by a shared template, default: False. The differing
+          values are passed to the shared template as input parameters by the DAG tasks.
+    """
+    self._compile_cache = CompileCache(cache_dir) if cache_dir else None
+    self._deduplicate_templates = deduplicate_templates
+
+  @property
+  def cache_stats(self):
+    """CompileCacheStats with the compile cache hits and misses or None if the cache is disabled."""
+    return self._compile_cache.stats if self._compile_cache else None
+
   def _pipelineparam_full_name(self, param):
     """_pipelineparam_full_name converts the names of pipeline parameters
       to unique names in the argo yaml
@@ -54,105 +174,20 @@ class Compiler(object):
       return param.op_name + '-' + param.name
     return param.name
 
-  def _get_groups_for_ops(self, root_group):
-    """Helper function to get belonging groups for each op.
-
-    Each pipeline has a root group. Each group has a list of operators (leaf) and groups.
-    This function traverse the tree and get all ancestor groups for all operators.
-
-    Returns:
-      A dict. Key is the operator's name. Value is a list of ancestor groups including the
-              op itself. The list of a given operator is sorted in a way that the farthest
-              group is the first and operator itself is the last.
-    """
-    def _get_op_groups_helper(current_groups, ops_to_groups):
-      root_group = current_groups[-1]
-      for g in root_group.groups:
-        # Add recursive opsgroup in the ops_to_groups
-        # such that the i/o dependency can be propagated to the ancester opsgroups
-        if g.recursive_ref:
-          ops_to_groups[g.name] = [x.name for x in current_groups] + [g.name]
-          continue
-        current_groups.append(g)
-        _get_op_groups_helper(current_groups, ops_to_groups)
-        del current_groups[-1]
-      for op in root_group.ops:
-        ops_to_groups[op.name] = [x.name for x in current_groups] + [op.name]
-
-    ops_to_groups = {}
-    current_groups = [root_group]
-    _get_op_groups_helper(current_groups, ops_to_groups)
-    return ops_to_groups
-
-  #TODO: combine with the _get_groups_for_ops
-  def _get_groups_for_opsgroups(self, root_group):
-    """Helper function to get belonging groups for each opsgroup.
-
-    Each pipeline has a root group. Each group has a list of operators (leaf) and groups.
-    This function traverse the tree and get all ancestor groups for all opsgroups.
-
-    Returns:
-      A dict. Key is the opsgroup's name. Value is a list of ancestor groups including the
-              opsgroup itself. The list of a given opsgroup is sorted in a way that the farthest
-              group is the first and opsgroup itself is the last.
-    """
-    def _get_opsgroup_groups_helper(current_groups, opsgroups_to_groups):
-      root_group = current_groups[-1]
-      for g in root_group.groups:
-        # Add recursive opsgroup in the ops_to_groups
-        # such that the i/o dependency can be propagated to the ancester opsgroups
-        if g.recursive_ref:
-          continue
-        opsgroups_to_groups[g.name] = [x.name for x in current_groups] + [g.name]
-        current_groups.append(g)
-        _get_opsgroup_groups_helper(current_groups, opsgroups_to_groups)
-        del current_groups[-1]
-
-    opsgroups_to_groups = {}
-    current_groups = [root_group]
-    _get_opsgroup_groups_helper(current_groups, opsgroups_to_groups)
-    return opsgroups_to_groups
-
   def _get_groups(self, root_group):
     """Helper function to get all groups (not including ops) in a pipeline."""
 
+    groups = {}
     def _get_groups_helper(group):
-      groups = {group.name: group}
+      groups[group.name] = group
       for g in group.groups:
         # Skip the recursive opsgroup because no templates
         # need to be generated for the recursive opsgroups.
         if not g.recursive_ref:
-          groups.update(_get_groups_helper(g))
-      return groups
+          _get_groups_helper(g)
 
-    return _get_groups_helper(root_group)
-
-  def _get_uncommon_ancestors(self, op_groups, opsgroup_groups, op1, op2):
-    """Helper function to get unique ancestors between two ops.
-
-    For example, op1's ancestor groups are [root, G1, G2, G3, op1], op2's ancestor groups are
-    [root, G1, G4, op2], then it returns a tuple ([G2, G3, op1], [G4, op2]).
-    """
-    #TODO: extract a function for the following two code module
-    if op1.name in op_groups:
-      op1_groups = op_groups[op1.name]
-    elif op1.name in opsgroup_groups:
-      op1_groups = opsgroup_groups[op1.name]
-    else:
-      raise ValueError(op1.name + ' does not exist.')
-
-    if op2.name in op_groups:
-      op2_groups = op_groups[op2.name]
-    elif op2.name in opsgroup_groups:
-      op2_groups = opsgroup_groups[op2.name]
-    else:
-      raise ValueError(op1.name + ' does not exist.')
-
-    both_groups = [op1_groups, op2_groups]
-    common_groups_len = sum(1 for x in zip(*both_groups) if x==(x[0],)*len(x))
-    group1 = op1_groups[common_groups_len:]
-    group2 = op2_groups[common_groups_len:]
-    return (group1, group2)
+    _get_groups_helper(root_group)
+    return groups
 
   def _get_condition_params_for_ops(self, root_group):
     """Get parameters referenced in conditions of ops."""
@@ -181,18 +216,96 @@ class Compiler(object):
     _get_condition_params_for_ops_helper(root_group, [])
     return conditions
 
-  def _get_inputs_outputs(self, pipeline, root_group, op_groups, opsgroup_groups, condition_params):
+  def _get_inputs_outputs(self, pipeline, root_group, group_ancestry, condition_params):
     """Get inputs and outputs of each group and op.
 
     Returns:
-      A tuple (inputs, outputs).
+      A tuple (inputs, outputs, loop_items).
       inputs and outputs are dicts with key being the group/op names and values being list of
       tuples (param_name, producing_op_name). producing_op_name is the name of the op that
       produces the param. If the param is a pipeline param (no producer op), then
       producing_op_name is None.
+      loop_items is a dict with key being the names of the loops over pipeline params and values
+      being the tuple (param_name, producing_op_name) of the items in the parent group of the loop.
     """
     inputs = defaultdict(set)
     outputs = defaultdict(set)
+    loop_items = {}
+
+    names = group_ancestry.names
+    parents = group_ancestry.parents
+    depths = group_ancestry.depths
+
+    # Every param is passed along the same ancestor chains, so the paths that were
+    # already visited for a param are not walked again:
+    #   (node id, param name) of the nodes that received a pipeline param from the root.
+    pipeline_param_nodes = set()
+    #   (node id, param name) of the nodes that received an output from the first
+    #   uncommon upstream group. The downstream groups are the same for all its consumers.
+    passed_down_nodes = set()
+    #   param name -> the highest node that already exposes the output of the producing op.
+    exposed_output_nodes = {}
+
+    # The loop item params are provided by the loop tasks, so they are only passed down
+    # from the loop groups.
+    loop_groups = [group for group in self._get_groups(root_group).values() if group.type == 'for_loop']
+    loop_item_groups = {}
+    for group in loop_groups:
+      for param_name in group.loop_args.to_item_references():
+        loop_item_groups[param_name] = group.name
+
+    def _add_pipeline_param_input(op_name, full_name):
+      loop_group_name = loop_item_groups.get(full_name, None)
+      node_id = group_ancestry.get_node_id(op_name)
+      while node_id >= 0 and (node_id, full_name) not in pipeline_param_nodes:
+        pipeline_param_nodes.add((node_id, full_name))
+        inputs[names[node_id]].add((full_name, None))
+        if names[node_id] == loop_group_name:
+          break
+        node_id = parents[node_id]
+      if loop_group_name is not None and node_id < 0:
+        raise ValueError('The loop item {} of {} is used outside of the loop by {}.'.format(
+            full_name, loop_group_name, op_name))
+
+    def _add_task_output_input(upstream_op_name, downstream_name, full_name, is_condition_param=False):
+      upstream_id = group_ancestry.get_node_id(upstream_op_name)
+      downstream_id = group_ancestry.get_node_id(downstream_name)
+      first_upstream_id, first_downstream_id = group_ancestry.get_first_uncommon_ancestors(
+          upstream_id, downstream_id)
+      first_upstream_group = names[first_upstream_id]
+
+      node_id = downstream_id
+      while (node_id, full_name) not in passed_down_nodes:
+        if node_id == first_downstream_id:
+          # If it is the first uncommon downstream group, then the input comes from
+          # the first uncommon upstream group.
+          inputs[names[node_id]].add((full_name, first_upstream_group))
+          passed_down_nodes.add((node_id, full_name))
+          break
+        # There is no need to pass the condition param as argument to the downstream
+        # recursive opsgroup itself.
+        if not (node_id == downstream_id and is_condition_param):
+          # If not the first downstream group, then the input is passed down from
+          # its ancestor groups so the upstream group is None.
+          inputs[names[node_id]].add((full_name, None))
+          passed_down_nodes.add((node_id, full_name))
+        node_id = parents[node_id]
+
+      _expose_task_output(upstream_op_name, first_upstream_id, full_name)
+
+    def _expose_task_output(upstream_op_name, first_upstream_id, full_name):
+      upstream_id = group_ancestry.get_node_id(upstream_op_name)
+      node_id = exposed_output_nodes.get(full_name, None)
+      if node_id is None:
+        # The last upstream group is the operator and output comes from container.
+        outputs[upstream_op_name].add((full_name, None))
+        node_id = upstream_id
+      while depths[node_id] > depths[first_upstream_id]:
+        # If not last upstream group, output value comes from one of its child.
+        outputs[names[parents[node_id]]].add((full_name, names[node_id]))
+        node_id = parents[node_id]
+      if depths[node_id] <= depths[exposed_output_nodes.get(full_name, node_id)]:
+        exposed_output_nodes[full_name] = node_id
 
     for op in pipeline.ops.values():
       # op's inputs and all params used in conditions for that op are both considered.
@@ -204,28 +317,31 @@ class Compiler(object):
         full_name = self._pipelineparam_full_name(param)
         if param.op_name:
           upstream_op = pipeline.ops[param.op_name]
-          upstream_groups, downstream_groups = self._get_uncommon_ancestors(
-              op_groups, opsgroup_groups, upstream_op, op)
-          for i, g in enumerate(downstream_groups):
-            if i == 0:
-              # If it is the first uncommon downstream group, then the input comes from
-              # the first uncommon upstream group.
-              inputs[g].add((full_name, upstream_groups[0]))
-            else:
-              # If not the first downstream group, then the input is passed down from
-              # its ancestor groups so the upstream group is None.
-              inputs[g].add((full_name, None))
-          for i, g in enumerate(upstream_groups):
-            if i == len(upstream_groups) - 1:
-              # If last upstream group, it is an operator and output comes from container.
-              outputs[g].add((full_name, None))
-            else:
-              # If not last upstream group, output value comes from one of its child.
-              outputs[g].add((full_name, upstream_groups[i+1]))
+          _add_task_output_input(upstream_op.name, op.name, full_name)
         else:
           if not op.is_exit_handler:
-            for g in op_groups[op.name]:
-              inputs[g].add((full_name, None))
+            _add_pipeline_param_input(op.name, full_name)
+
+    # The items of the loops over pipeline params are only read by the loop tasks in the parent
+    # groups. They are not inputs of the loop groups, so the iterations do not get a copy of all items.
+    for group in loop_groups:
+      if isinstance(group.items, dsl.PipelineParam) and not group.items.value:
+        full_name = self._pipelineparam_full_name(group.items)
+        group_id = group_ancestry.get_node_id(group.name)
+        parent_name = names[parents[group_id]]
+        if not group.items.op_name:
+          _add_pipeline_param_input(parent_name, full_name)
+          loop_items[group.name] = (full_name, None)
+          continue
+        first_upstream_id, first_downstream_id = group_ancestry.get_first_uncommon_ancestors(
+            group_ancestry.get_node_id(group.items.op_name), group_id)
+        if first_downstream_id == group_id:
+          # The items are produced by a sibling of the loop group.
+          _expose_task_output(group.items.op_name, first_upstream_id, full_name)
+          loop_items[group.name] = (full_name, names[first_upstream_id])
+        else:
+          _add_task_output_input(group.items.op_name, parent_name, full_name)
+          loop_items[group.name] = (full_name, None)
 
     # Generate the input/output for recursive opsgroups
     # It propagates the recursive opsgroups IO to their ancester opsgroups
@@ -240,33 +356,17 @@ class Compiler(object):
           full_name = self._pipelineparam_full_name(param)
           if param.op_name:
             upstream_op = pipeline.ops[param.op_name]
-            upstream_groups, downstream_groups = self._get_uncommon_ancestors(
-              op_groups, opsgroup_groups, upstream_op, group)
-            for i, g in enumerate(downstream_groups):
-              if i == 0:
-                inputs[g].add((full_name, upstream_groups[0]))
-              # There is no need to pass the condition param as argument to the downstream ops.
-              #TODO: this might also apply to ops. add a TODO here and think about it.
-              elif i == len(downstream_groups) - 1 and is_condition_param:
-                continue
-              else:
-                inputs[g].add((full_name, None))
-            for i, g in enumerate(upstream_groups):
-              if i == len(upstream_groups) - 1:
-                outputs[g].add((full_name, None))
-              else:
-                outputs[g].add((full_name, upstream_groups[i+1]))
+            _add_task_output_input(upstream_op.name, group.name, full_name, is_condition_param)
           else:
             if not op.is_exit_handler:
-              for g in op_groups[op.name]:
-                inputs[g].add((full_name, None))
+              _add_pipeline_param_input(op.name, full_name)
       for subgroup in group.groups:
         _get_inputs_outputs_recursive_opsgroup(subgroup)
 
     _get_inputs_outputs_recursive_opsgroup(root_group)
-    return inputs, outputs
+    return inputs, outputs, loop_items
 
-  def _get_dependencies(self, pipeline, root_group, op_groups, opsgroups_groups, opsgroups, condition_params):
+  def _get_dependencies(self, pipeline, root_group, group_ancestry, opsgroups, condition_params):
     """Get dependent groups and ops for all ops and groups.
 
     Returns:
@@ -277,6 +377,15 @@ class Compiler(object):
       ancesters in their ancesters chain. Only sibling groups/ops can have dependencies.
     """
     dependencies = defaultdict(set)
+
+    def _add_dependency(upstream_name, downstream_name):
+      # the dependent op could be either a BaseOp or an opsgroup
+      if upstream_name not in pipeline.ops and upstream_name not in opsgroups:
+        raise ValueError('compiler cannot find the ' + upstream_name)
+      first_upstream_id, first_downstream_id = group_ancestry.get_first_uncommon_ancestors(
+          group_ancestry.get_node_id(upstream_name), group_ancestry.get_node_id(downstream_name))
+      dependencies[group_ancestry.names[first_downstream_id]].add(group_ancestry.names[first_upstream_id])
+
     for op in pipeline.ops.values():
       upstream_op_names = set()
       for param in op.inputs + list(condition_params[op.name]):
@@ -285,21 +394,11 @@ class Compiler(object):
       upstream_op_names |= set(op.dependent_names)
 
       for op_name in upstream_op_names:
-        # the dependent op could be either a BaseOp or an opsgroup
-        if op_name in pipeline.ops:
-          upstream_op = pipeline.ops[op_name]
-        elif op_name in opsgroups:
-          upstream_op = opsgroups[op_name]
-        else:
-          raise ValueError('compiler cannot find the ' + op_name)
-
-        upstream_groups, downstream_groups = self._get_uncommon_ancestors(
-            op_groups, opsgroups_groups, upstream_op, op)
-        dependencies[downstream_groups[0]].add(upstream_groups[0])
+        _add_dependency(op_name, op.name)
 
     # Generate dependencies based on the recursive opsgroups
     #TODO: refactor the following codes with the above
-    def _get_dependency_opsgroup(group, dependencies):
+    def _get_dependency_opsgroup(group):
       upstream_op_names = set()
       if group.recursive_ref:
         for param in group.inputs + list(condition_params[group.name]):
@@ -307,22 +406,16 @@ class Compiler(object):
             upstream_op_names.add(param.op_name)
       else:
         upstream_op_names = set([dependency.name for dependency in group.dependencies])
+        if group.type == 'for_loop' and isinstance(group.items, dsl.PipelineParam) and group.items.op_name:
+          upstream_op_names.add(group.items.op_name)
 
       for op_name in upstream_op_names:
-        if op_name in pipeline.ops:
-          upstream_op = pipeline.ops[op_name]
-        elif op_name in opsgroups_groups:
-          upstream_op = opsgroups_groups[op_name]
-        else:
-          raise ValueError('compiler cannot find the ' + op_name)
-        upstream_groups, downstream_groups = self._get_uncommon_ancestors(
-            op_groups, opsgroups_groups, upstream_op, group)
-        dependencies[downstream_groups[0]].add(upstream_groups[0])
+        _add_dependency(op_name, group.name)
 
       for subgroup in group.groups:
-        _get_dependency_opsgroup(subgroup, dependencies)
+        _get_dependency_opsgroup(subgroup)
 
-    _get_dependency_opsgroup(root_group, dependencies)
+    _get_dependency_opsgroup(root_group)
 
     return dependencies
 
@@ -349,10 +442,10 @@ class Compiler(object):
     else:
       return str(value_or_reference)
 
-  def _group_to_template(self, group, inputs, outputs, dependencies):
+  def _group_to_template(self, group, inputs, outputs, dependencies, loop_items=None):
     """Generate template given an OpsGroup.
 
-    inputs, outputs, dependencies are all helper dicts.
+    inputs, outputs, dependencies and loop_items are all helper dicts.
     """
     template = {'name': group.name}
 
@@ -398,6 +491,16 @@ class Compiler(object):
         operand2_value = self._resolve_value_or_reference(condition.operand2, subgroup_inputs)
         task['when'] = '{} {} {}'.format(operand1_value, condition.operator, operand2_value)
 
+      # The loop items are passed to the loop template by the task, which is run for every item.
+      item_references = {}
+      if isinstance(sub_group, dsl.OpsGroup) and sub_group.type == 'for_loop':
+        if isinstance(sub_group.items, dsl.PipelineParam):
+          task['withParam'] = sub_group.items.value or self._resolve_value_or_reference(
+              sub_group.items, [loop_items[sub_group.name]] if loop_items else [])
+        else:
+          task['withItems'] = sub_group.items
+        item_references = sub_group.loop_args.to_item_references()
+
       # Generate dependencies section for this task.
       if dependencies.get(sub_group.name, None):
         group_dependencies = list(dependencies[sub_group.name])
@@ -442,7 +545,7 @@ class Compiler(object):
             else:
               arguments.append({
                 'name': param_name,
-                'value': '{{inputs.parameters.%s}}' % param_name
+                'value': item_references.get(param_name, '{{inputs.parameters.%s}}' % param_name)
               })
         arguments.sort(key=lambda x: x['name'])
         task['arguments'] = {'parameters': arguments}
@@ -471,25 +574,24 @@ class Compiler(object):
         transformer(op)
 
     # Generate core data structures to prepare for argo yaml generation
-    #   op_groups: op name -> list of ancestor groups including the current op
+    #   group_ancestry: index of the ancestor groups of every op and opsgroup
     #   opsgroups: a dictionary of ospgroup.name -> opsgroup
     #   inputs, outputs: group/op names -> list of tuples (full_param_name, producing_op_name)
     #   condition_params: recursive_group/op names -> list of pipelineparam
     #   dependencies: group/op name -> list of dependent groups/ops.
     # Special Handling for the recursive opsgroup
-    #   op_groups also contains the recursive opsgroups
+    #   group_ancestry indexes the recursive opsgroups together with the ops
     #   condition_params from _get_condition_params_for_ops also contains the recursive opsgroups
     #   groups does not include the recursive opsgroups
     opsgroups = self._get_groups(new_root_group)
-    op_groups = self._get_groups_for_ops(new_root_group)
-    opsgroups_groups = self._get_groups_for_opsgroups(new_root_group)
+    group_ancestry = _GroupAncestry(new_root_group)
     condition_params = self._get_condition_params_for_ops(new_root_group)
-    inputs, outputs = self._get_inputs_outputs(pipeline, new_root_group, op_groups, opsgroups_groups, condition_params)
-    dependencies = self._get_dependencies(pipeline, new_root_group, op_groups, opsgroups_groups, opsgroups, condition_params)
+    inputs, outputs, loop_items = self._get_inputs_outputs(pipeline, new_root_group, group_ancestry, condition_params)
+    dependencies = self._get_dependencies(pipeline, new_root_group, group_ancestry, opsgroups, condition_params)
 
     templates = []
     for opsgroup in opsgroups.keys():
-      template = self._group_to_template(opsgroups[opsgroup], inputs, outputs, dependencies)
+      template = self._group_to_template(opsgroups[opsgroup], inputs, outputs, dependencies, loop_items)
       templates.append(template)
 
     for op in pipeline.ops.values():
@@ -522,10 +624,6 @@ class Compiler(object):
         param['value'] = str(arg.value)
       input_params.append(param)
 
-    # Templates
-    templates = self._create_templates(pipeline, op_transformers)
-    templates.sort(key=lambda x: x['name'])
-
     # Exit Handler
     exit_handler = None
     if pipeline.groups[0].groups:
@@ -533,6 +631,14 @@ class Compiler(object):
       if first_group.type == 'exit_handler':
         exit_handler = first_group.exit_op
 
+    # Templates
+    templates = self._create_templates(pipeline, op_transformers)
+    if self._deduplicate_templates:
+      # The exit handler template is referenced by onExit, which cannot pass arguments.
+      templates = deduplicate_op_templates(templates, pipeline.ops.keys(),
+                                           [exit_handler.name] if exit_handler else [])
+    templates.sort(key=lambda x: x['name'])
+
     # Volumes
     volumes = self._create_volumes(pipeline)
 
@@ -660,36 +766,28 @@ class Compiler(object):
 
     Args:
       pipeline_func: pipeline functions with @dsl.pipeline decorator.
-      package_path: the output workflow tar.gz file path. for example, "~/a.tar.gz"
+      package_path: the output workflow tar.gz file path. for example, "~/a.tar.gz".
+        Packages ending with .json are written as a JSON workflow.
       type_check: whether to enable the type check or not, default: False.
     """
+    fingerprint = None
+    if self._compile_cache:
+      fingerprint = fingerprint_pipeline(pipeline_func, type_check, self._deduplicate_templates)
+      if fingerprint is None:
+        self._compile_cache.stats.misses += 1
+      elif self._compile_cache.restore(fingerprint, package_path):
+        return
+
     import kfp
     type_check_old_value = kfp.TYPE_CHECK
     try:
       kfp.TYPE_CHECK = type_check
       workflow = self._compile(pipeline_func)
-      yaml.Dumper.ignore_aliases = lambda *args : True
-      yaml_text = yaml.dump(workflow, default_flow_style=False)
-
-      if package_path.endswith('.tar.gz') or package_path.endswith('.tgz'):
-        from contextlib import closing
-        from io import BytesIO
-        with tarfile.open(package_path, "w:gz") as tar:
-          with closing(BytesIO(yaml_text.encode())) as yaml_file:
-            tarinfo = tarfile.TarInfo('pipeline.yaml')
-            tarinfo.size = len(yaml_file.getvalue())
-            tar.addfile(tarinfo, fileobj=yaml_file)
-      elif package_path.endswith('.zip'):
-        with zipfile.ZipFile(package_path, "w") as zip:
-          zipinfo = zipfile.ZipInfo('pipeline.yaml')
-          zipinfo.compress_type = zipfile.ZIP_DEFLATED
-          zip.writestr(zipinfo, yaml_text)
-      elif package_path.endswith('.yaml') or package_path.endswith('.yml'):
-          with open(package_path, 'w') as yaml_file:
-            yaml_file.write(yaml_text)
-      else:
-        raise ValueError('The output path '+ package_path + ' should ends with one of the following formats: [.tar.gz, .tgz, .zip, .yaml, .yml]')
+      write_workflow_package(workflow, package_path)
     finally:
       kfp.TYPE_CHECK = type_check_old_value
 
+    if fingerprint:
+      self._compile_cache.store(fingerprint, package_path)
+
 
@@ -14,14 +14,26 @@
 
 
 import argparse
+import concurrent.futures
+import contextlib
+import glob
+import json
+import re
 import kfp.dsl as dsl
 import kfp.compiler
+from kfp.compiler._library_files import is_library_file
 import os
 import shutil
 import subprocess
 import sys
 import tempfile
+import time
+import traceback
 
+# Package and build files are never pipeline modules and some of them exit when they are imported.
+_BATCH_SKIPPED_FILE_NAMES = ('__init__.py', 'setup.py')
+# Matches the pipeline decorator, e.g. "@dsl.pipeline(" or "@pipeline(".
+_PIPELINE_DECORATOR_REGEX = re.compile(r'\bpipeline\s*\(')
 
 def parse_arguments():
   """Parse command line arguments."""
@@ -39,19 +51,49 @@ def parse_arguments():
   parser.add_argument('--namespace',
                       type=str,
                       help='The namespace for the pipeline function')
+  parser.add_argument('--batch',
+                      type=str,
+                      help='local directory or glob pattern of py files. Every pipeline function '
+                           'in them is compiled into --output-dir.')
   parser.add_argument('--output',
                       type=str,
-                      required=True,
                       help='local path to the output workflow yaml file.')
+  parser.add_argument('--output-dir',
+                      type=str,
+                      help='local directory of the output workflow files in the batch mode.')
+  parser.add_argument('--output-format',
+                      type=str,
+                      default='yaml',
+                      choices=['tar.gz', 'zip', 'yaml', 'json'],
+                      help='format of the output workflow files in the batch mode, default: yaml.')
+  parser.add_argument('--jobs',
+                      type=int,
+                      help='number of parallel compile processes in the batch mode. '
+                           'Defaults to the number of CPUs.')
+  parser.add_argument('--report',
+                      type=str,
+                      help='local path to the JSON report of the batch mode. '
+                           'Defaults to compile_report.json in --output-dir.')
   parser.add_argument('--disable-type-check',
                       action='store_true',
                       help='disable the type check, default is enabled.')
+  parser.add_argument('--cache-dir',
+                      type=str,
+                      help='local directory of the compile cache. '
+                           'Unchanged pipelines are not recompiled when it is set. Files and environment '
+                           'variables read inside the pipeline functions, e.g. component files loaded in the '
+                           'function body, are not tracked, so their changes are not picked up.')
+  parser.add_argument('--deduplicate-templates',
+                      action='store_true',
+                      help='share one template between the ops whose templates only differ '
+                           'in their name and in plain string values.')
 
   args = parser.parse_args()
   return args
 
 
-def _compile_pipeline_function(pipeline_funcs, function_name, output_path, type_check):
+def _compile_pipeline_function(pipeline_funcs, function_name, output_path, type_check, cache_dir=None,
+                               deduplicate_templates=False):
   if len(pipeline_funcs) == 0:
     raise ValueError('A function with @dsl.pipeline decorator is required in the py file.')
 
@@ -67,7 +109,11 @@ def _compile_pipeline_function(pipeline_funcs, function_name, output_path, type_
   else:
     pipeline_func = pipeline_funcs[0]
 
-  kfp.compiler.Compiler().compile(pipeline_func, output_path, type_check)
+  compiler = kfp.compiler.Compiler(cache_dir=cache_dir, deduplicate_templates=deduplicate_templates)
+  compiler.compile(pipeline_func, output_path, type_check)
+  if compiler.cache_stats:
+    print('Compile cache: {} hit(s), {} miss(es)'.format(
+        compiler.cache_stats.hits, compiler.cache_stats.misses), file=sys.stderr)
 
 
 class PipelineCollectorContext():
@@ -84,39 +130,235 @@ class PipelineCollectorContext():
     dsl._pipeline._pipeline_decorator_handler = self.old_handler
 
 
-def compile_package(package_path, namespace, function_name, output_path, type_check):
+def compile_package(package_path, namespace, function_name, output_path, type_check, cache_dir=None,
+                    deduplicate_templates=False):
   tmpdir = tempfile.mkdtemp()
   sys.path.insert(0, tmpdir)
   try:
     subprocess.check_call(['python3', '-m', 'pip', 'install', package_path, '-t', tmpdir])
     with PipelineCollectorContext() as pipeline_funcs:
       __import__(namespace)
-    _compile_pipeline_function(pipeline_funcs, function_name, output_path, type_check)
+    _compile_pipeline_function(pipeline_funcs, function_name, output_path, type_check, cache_dir,
+                               deduplicate_templates)
   finally:
     del sys.path[0]
     shutil.rmtree(tmpdir)
 
 
-def compile_pyfile(pyfile, function_name, output_path, type_check):
+def compile_pyfile(pyfile, function_name, output_path, type_check, cache_dir=None, deduplicate_templates=False):
   sys.path.insert(0, os.path.dirname(pyfile))
   try:
     filename = os.path.basename(pyfile)
     with PipelineCollectorContext() as pipeline_funcs:
       __import__(os.path.splitext(filename)[0])
-    _compile_pipeline_function(pipeline_funcs, function_name, output_path, type_check)
+    _compile_pipeline_function(pipeline_funcs, function_name, output_path, type_check, cache_dir,
+                               deduplicate_templates)
   finally:
     del sys.path[0]
 
 
+def _find_batch_pyfiles(batch):
+  """Returns the py files in the directory (recursively) or matching the glob pattern.
+
+  The package and build files (__init__.py and setup.py) are left out.
+  """
+  if os.path.isdir(batch):
+    pattern = os.path.join(batch, '**', '*.py')
+  else:
+    pattern = batch
+  return sorted(path for path in glob.glob(pattern, recursive=True)
+                if path.endswith('.py') and os.path.isfile(path)
+                and os.path.basename(path) not in _BATCH_SKIPPED_FILE_NAMES)
+
+
+def _is_pipeline_pyfile(pyfile):
+  """Returns whether the source of the py file uses the pipeline decorator."""
+  try:
+    with open(pyfile, 'r') as f:
+      return _PIPELINE_DECORATOR_REGEX.search(f.read()) is not None
+  except (OSError, UnicodeDecodeError):
+    return True
+
+
+def _is_user_module(module):
+  """Returns whether the module is imported from a file outside of kfp and the library directories."""
+  module_file = getattr(module, '__file__', None)
+  if not module_file:
+    return False
+  kfp_dir = os.path.realpath(os.path.dirname(kfp.__file__)) + os.sep
+  return not os.path.realpath(module_file).startswith(kfp_dir) and not is_library_file(module_file)
+
+
+@contextlib.contextmanager
+def _isolated_import_state(import_dir):
+  """Makes the modules importable from the directory and forgets the user modules imported in the context.
+
+  Batch worker processes are reused, so the modules imported for one py file, e.g. a sibling "helpers" module,
+  must not be used for the py files in the other directories.
+  """
+  saved_path = list(sys.path)
+  saved_modules = dict(sys.modules)
+  sys.path.insert(0, import_dir)
+  try:
+    yield
+  finally:
+    sys.path[:] = saved_path
+    for name, module in list(sys.modules.items()):
+      saved_module = saved_modules.get(name)
+      if saved_module is None:
+        if _is_user_module(module):
+          del sys.modules[name]
+      elif saved_module is not module:
+        sys.modules[name] = saved_module
+
+
+def _compile_batch_pyfile(pyfile, output_prefix, output_format, type_check, cache_dir=None,
+                          deduplicate_templates=False):
+  """Compiles all pipeline functions in a py file. Runs in the batch worker processes.
+
+  Modules exiting at import time, e.g. scripts calling sys.exit(), are reported instead of stopping the batch.
+
+  Returns:
+    A list of the report entries of the pipelines. The py files without pipelines and the py files that
+    failed to import but do not use the pipeline decorator get a single entry with the "skipped" reason.
+  """
+  module_name = os.path.splitext(os.path.basename(pyfile))[0]
+  results = []
+  start_time = time.time()
+  with _isolated_import_state(os.path.dirname(os.path.abspath(pyfile))):
+    try:
+      sys.modules.pop(module_name, None)
+      with PipelineCollectorContext() as pipeline_funcs:
+        __import__(module_name)
+    except BaseException as e:
+      if not pipeline_funcs and not _is_pipeline_pyfile(pyfile):
+        return [{'module': pyfile, 'skipped': 'Not a pipeline module. Failed to import: {!r}'.format(e)}]
+      return [{
+        'module': pyfile,
+        'function': None,
+        'output': None,
+        'seconds': round(time.time() - start_time, 3),
+        'error': traceback.format_exc(),
+      }]
+    if not pipeline_funcs:
+      return [{'module': pyfile, 'skipped': 'No pipeline functions.'}]
+
+    compiler = kfp.compiler.Compiler(cache_dir=cache_dir, deduplicate_templates=deduplicate_templates)
+    for pipeline_func in pipeline_funcs:
+      output_path = '{}.{}.{}'.format(output_prefix, pipeline_func.__name__, output_format)
+      error = None
+      start_time = time.time()
+      try:
+        compiler.compile(pipeline_func, output_path, type_check)
+      except BaseException:
+        error = traceback.format_exc()
+      results.append({
+        'module': pyfile,
+        'function': pipeline_func.__name__,
+        'output': None if error else output_path,
+        'seconds': round(time.time() - start_time, 3),
+        'error': error,
+      })
+  return results
+
+
+def compile_batch(batch, output_dir, output_format, type_check, jobs=None, report_path=None, cache_dir=None,
+                  deduplicate_templates=False):
+  """Compiles every pipeline function in the py files of the batch across a process pool.
+
+  The package of the function "func" in "dir/module.py" is written to
+  "<output_dir>/dir.module.func.<output_format>", where "dir" is relative to the batch directory.
+
+  Args:
+    batch: local directory (searched recursively) or glob pattern of py files.
+    output_dir: local directory of the output packages.
+    output_format: one of tar.gz, zip, yaml and json.
+    type_check: whether to enable the type check or not.
+    jobs: number of worker processes. Defaults to the number of CPUs.
+    report_path: local path to the JSON report. Defaults to compile_report.json in output_dir.
+    cache_dir: optional directory of the compile cache.
+    deduplicate_templates: whether to share identical op templates.
+
+  Returns:
+    The report dict with an entry for every pipeline and for every pipeline module that failed to import.
+    The other py files without pipelines are listed in the "skipped" entries.
+  """
+  pyfiles = _find_batch_pyfiles(batch)
+  if os.path.isdir(batch):
+    base_dir = batch
+  elif pyfiles:
+    base_dir = os.path.commonpath([os.path.dirname(os.path.abspath(pyfile)) for pyfile in pyfiles])
+  else:
+    base_dir = '.'
+  os.makedirs(output_dir, exist_ok=True)
+
+  start_time = time.time()
+  pipelines = []
+  skipped = []
+  with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+    futures = []
+    for pyfile in pyfiles:
+      relative_path = os.path.relpath(os.path.abspath(pyfile), os.path.abspath(base_dir))
+      output_prefix = os.path.join(output_dir, os.path.splitext(relative_path)[0].replace(os.sep, '.'))
+      futures.append(executor.submit(_compile_batch_pyfile, pyfile, output_prefix, output_format, type_check,
+                                     cache_dir, deduplicate_templates))
+    for pyfile, future in zip(pyfiles, futures):
+      try:
+        results = future.result()
+      except KeyboardInterrupt:
+        raise
+      except BaseException:
+        # The worker process died.
+        results = [{'module': pyfile, 'function': None, 'output': None, 'seconds': None,
+                    'error': traceback.format_exc()}]
+      for result in results:
+        if 'skipped' in result:
+          skipped.append({'module': result['module'], 'reason': result['skipped']})
+        else:
+          pipelines.append(result)
+
+  report = {
+    'pipelines': pipelines,
+    'succeeded': sum(1 for pipeline in pipelines if not pipeline['error']),
+    'failed': sum(1 for pipeline in pipelines if pipeline['error']),
+    'skipped': skipped,
+    'seconds': round(time.time() - start_time, 3),
+  }
+  with open(report_path or os.path.join(output_dir, 'compile_report.json'), 'w') as f:
+    json.dump(report, f, indent=2)
+  return report
+
+
 def main():
   args = parse_arguments()
+  if args.batch:
+    if args.py or args.package or args.output or args.function:
+      raise ValueError('--batch cannot be used with --py, --package, --output or --function.')
+    if not args.output_dir:
+      raise ValueError('--output-dir is required for the batch mode.')
+    report = compile_batch(args.batch, args.output_dir, args.output_format, not args.disable_type_check,
+                           args.jobs, args.report, args.cache_dir, args.deduplicate_templates)
+    for pipeline in report['pipelines']:
+      if pipeline['error']:
+        name = pipeline['module'] + (':' + pipeline['function'] if pipeline['function'] else '')
+        print('Failed to compile {}:\n{}'.format(name, pipeline['error']), file=sys.stderr)
+    print('Compiled {} pipeline(s), {} failure(s), {} skipped py file(s) in {}s'.format(
+        report['succeeded'], report['failed'], len(report['skipped']), report['seconds']), file=sys.stderr)
+    if report['failed']:
+      sys.exit(1)
+    return
+
   if ((args.py is None and args.package is None) or
       (args.py is not None and args.package is not None)):
     raise ValueError('Either --py or --package is needed but not both.')
+  if args.output is None:
+    raise ValueError('--output is required.')
   if args.py:
-    compile_pyfile(args.py, args.function, args.output, not args.disable_type_check)
+    compile_pyfile(args.py, args.function, args.output, not args.disable_type_check, args.cache_dir,
+                   args.deduplicate_templates)
   else:
     if args.namespace is None:
       raise ValueError('--namespace is required for compiling packages.')
-    compile_package(args.package, args.namespace, args.function, args.output, not args.disable_type_check)
+    compile_package(args.package, args.namespace, args.function, args.output, not args.disable_type_check,
+                    args.cache_dir, args.deduplicate_templates)
   
@@ -15,3 +15,6 @@
 from ._components import *
 from ._python_op import *
 from ._component_store import *
+from ._http_cache import *
+from ._task_factory_cache import *
+from ._component_spec_cache import *
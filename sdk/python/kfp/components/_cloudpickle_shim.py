@@ -0,0 +1,170 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Minimal replacement of the cloudpickle functions that are referenced by the pickled functions.
+# The source of this module is embedded into the lightweight Python components, so that the functions can be unpickled in the containers that do not have cloudpickle installed.
+# The code is executed as a function body by the components, so it only uses the standard library and does not depend on the module globals.
+
+import io
+import pickle
+import sys
+import types
+
+
+def subimport(name):
+    __import__(name)
+    return sys.modules[name]
+
+
+def dynamic_subimport(name, vars):
+    mod = types.ModuleType(name)
+    mod.__dict__.update(vars)
+    return mod
+
+
+def _builtin_type(name):
+    return getattr(types, name)
+
+
+def _restore_attr(obj, attr):
+    for key, val in attr.items():
+        setattr(obj, key, val)
+    return obj
+
+
+def _gen_ellipsis():
+    return Ellipsis
+
+
+def _gen_not_implemented():
+    return NotImplemented
+
+
+class _EmptyCellValue:
+    pass
+
+
+_empty_cell_value = _EmptyCellValue()
+
+
+def _make_empty_cell():
+    if False:
+        cell = None # Makes cell a closure variable
+    return (lambda: cell).__closure__[0]
+
+
+def _make_cell_set_template_code():
+    cell = None
+    def _cell_set(value):
+        nonlocal cell
+        cell = value
+    return _cell_set.__code__
+
+
+_cell_set_template_code = _make_cell_set_template_code()
+
+
+def _cell_set(cell, value):
+    types.FunctionType(_cell_set_template_code, {}, '_cell_set', (), (cell,))(value)
+
+
+def _make_skel_func(code, cell_count, base_globals=None):
+    if base_globals is None or isinstance(base_globals, str):
+        base_globals = {}
+    base_globals['__builtins__'] = __builtins__
+    closure = tuple(_make_empty_cell() for _ in range(cell_count)) if cell_count >= 0 else None
+    return types.FunctionType(code, base_globals, None, None, closure)
+
+
+def _fill_function(func, state):
+    func.__globals__.update(state['globals'])
+    func.__defaults__ = state['defaults']
+    func.__dict__ = state['dict']
+    for key in ['annotations', 'doc', 'name', 'module', 'qualname', 'kwdefaults']:
+        if key in state:
+            setattr(func, '__{}__'.format(key), state[key])
+    if func.__closure__ is not None:
+        for cell, value in zip(func.__closure__, state['closure_values']):
+            if value is not _empty_cell_value:
+                _cell_set(cell, value)
+    return func
+
+
+def _make_skeleton_class(type_constructor, name, bases, type_kwargs, class_tracker_id, extra):
+    return type_constructor(name, bases, type_kwargs)
+
+
+def _rehydrate_skeleton_class(skeleton_class, class_dict):
+    registry = None
+    for attrname, attr in class_dict.items():
+        if attrname == '_abc_impl':
+            registry = attr
+        else:
+            setattr(skeleton_class, attrname, attr)
+    if registry is not None:
+        for subclass in registry:
+            skeleton_class.register(subclass)
+    return skeleton_class
+
+
+def _make_skeleton_enum(bases, name, qualname, members, module, class_tracker_id, extra):
+    metacls = bases[-1].__class__
+    classdict = metacls.__prepare__(name, bases)
+    for member_name, member_value in members.items():
+        classdict[member_name] = member_value
+    enum_class = metacls.__new__(metacls, name, bases, classdict)
+    enum_class.__module__ = module
+    if qualname is not None:
+        enum_class.__qualname__ = qualname
+    return enum_class
+
+
+def _make__new__factory(type_):
+    def _factory():
+        return type_.__new__
+    return _factory
+
+
+_CLOUDPICKLE_FUNCTIONS = {
+    'subimport': subimport,
+    'dynamic_subimport': dynamic_subimport,
+    '_builtin_type': _builtin_type,
+    '_restore_attr': _restore_attr,
+    '_gen_ellipsis': _gen_ellipsis,
+    '_gen_not_implemented': _gen_not_implemented,
+    '_empty_cell_value': _empty_cell_value,
+    '_make_empty_cell': _make_empty_cell,
+    '_make_skel_func': _make_skel_func,
+    '_fill_function': _fill_function,
+    '_make_skeleton_class': _make_skeleton_class,
+    '_rehydrate_skeleton_class': _rehydrate_skeleton_class,
+    '_make_skeleton_enum': _make_skeleton_enum,
+    '_get_dict_new': _make__new__factory(dict),
+    '_get_frozenset_new': _make__new__factory(frozenset),
+    '_get_list_new': _make__new__factory(list),
+    '_get_set_new': _make__new__factory(set),
+    '_get_tuple_new': _make__new__factory(tuple),
+    '_get_object_new': _make__new__factory(object),
+}
+
+
+class _CloudpickleShimUnpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        if module in ('cloudpickle', 'cloudpickle.cloudpickle'):
+            return _CLOUDPICKLE_FUNCTIONS[name]
+        return super().find_class(module, name)
+
+
+def loads(data):
+    return _CloudpickleShimUnpickler(io.BytesIO(data)).load()
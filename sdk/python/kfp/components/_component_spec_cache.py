@@ -0,0 +1,100 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+__all__ = [
+    'configure_component_spec_cache',
+]
+
+import functools
+import hashlib
+import os
+import pickle
+
+from ._http_cache import _write_file_atomically
+from ._structures import ComponentSpec
+
+
+_CACHE_FORMAT_VERSION = '1'
+
+
+@functools.lru_cache(maxsize=None)
+def _get_structures_digest() -> str:
+    '''Digest of the modules that define the component structures. The cached specifications are only valid for the same structure classes.'''
+    from . import _structures, modelbase
+    from .structures.kubernetes import v1
+    h = hashlib.sha256()
+    h.update(_CACHE_FORMAT_VERSION.encode())
+    h.update(str(pickle.HIGHEST_PROTOCOL).encode())
+    for module in [_structures, modelbase, v1]:
+        with open(module.__file__, 'rb') as module_file:
+            h.update(module_file.read())
+    return h.hexdigest()
+
+
+class _ComponentSpecCache:
+    '''On-disk cache of the parsed component specifications keyed by the digest of the component file data.'''
+    def __init__(self, cache_dir: str):
+        self.cache_dir = os.path.expanduser(cache_dir)
+
+    def _entry_path(self, data: bytes) -> str:
+        digest = hashlib.sha256(_get_structures_digest().encode() + data).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest + '.pickle')
+
+    def load(self, data: bytes):
+        '''Returns the cached component specification or None.'''
+        try:
+            with open(self._entry_path(data), 'rb') as entry_file:
+                component_spec = pickle.load(entry_file)
+        except Exception: #Missing or corrupted entry
+            return None
+        return component_spec if isinstance(component_spec, ComponentSpec) else None
+
+    def store(self, data: bytes, component_spec: ComponentSpec):
+        entry_path = self._entry_path(data)
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        _write_file_atomically(entry_path, pickle.dumps(component_spec, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+_component_spec_cache = None
+if os.environ.get('KFP_COMPONENT_SPEC_CACHE_DIR'):
+    _component_spec_cache = _ComponentSpecCache(os.environ['KFP_COMPONENT_SPEC_CACHE_DIR'])
+
+
+def configure_component_spec_cache(cache_dir: str = None):
+    '''
+    Configures the on-disk cache of the parsed component specifications.
+
+    The components loaded from files, URLs and the ComponentStore are parsed once and then loaded from the cache, skipping the YAML parsing and the specification validation. The cache is keyed by the digest of the component file data.
+    The cache is disabled by default unless the KFP_COMPONENT_SPEC_CACHE_DIR environment variable is set.
+
+    Args:
+        cache_dir: Directory of the cache, e.g. ~/.cache/kfp/component_specs. The cache is disabled when not specified.
+    '''
+    global _component_spec_cache
+    _component_spec_cache = _ComponentSpecCache(cache_dir) if cache_dir else None
+
+
+def _load_component_spec_cached(data: bytes, load_component_spec):
+    '''Returns the cached specification of the component file data or loads and caches it using load_component_spec.'''
+    component_spec_cache = _component_spec_cache
+    if component_spec_cache is None:
+        return load_component_spec()
+    component_spec = component_spec_cache.load(data)
+    if component_spec is None:
+        component_spec = load_component_spec()
+        try:
+            component_spec_cache.store(data, component_spec)
+        except OSError:
+            pass #The cache is best-effort
+    return component_spec
@@ -2,22 +2,53 @@ __all__ = [
     'ComponentStore',
 ]
 
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import requests
+from typing import List, Sequence, Union
+from urllib.parse import urlparse
 from . import _components as comp
+from ._http_cache import get_default_http_cache
 from ._structures import ComponentReference
 
 class ComponentStore:
-    def __init__(self, local_search_paths=None, url_search_prefixes=None):
+    def __init__(self, local_search_paths=None, url_search_prefixes=None, http_cache=None):
+        '''
+        Args:
+            local_search_paths: Directories where the components are searched for.
+            url_search_prefixes: URL prefixes where the components are searched for.
+            http_cache: The HttpCache that stores the downloaded component files. The default cache is used when not specified.
+        '''
         self.local_search_paths = local_search_paths or ['.']
         self.url_search_prefixes = url_search_prefixes or []
+        self.http_cache = http_cache
 
         self._component_file_name = 'component.yaml'
         self._digests_subpath = 'versions/sha256'
         self._tags_subpath = 'versions/tags'
 
+        self._max_connections_per_host = 0 #Raised by load_components to the number of its workers
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+
+    def _get_session(self, url):
+        '''Returns the keep-alive session shared by the requests to the host of the URL.'''
+        parsed_url = urlparse(url)
+        host_key = (parsed_url.scheme, parsed_url.netloc)
+        import requests
+        with self._sessions_lock:
+            pool_maxsize = max(requests.adapters.DEFAULT_POOLSIZE, self._max_connections_per_host)
+            session, session_pool_maxsize = self._sessions.get(host_key, (None, 0))
+            if session is None:
+                session = requests.Session()
+            if session_pool_maxsize < pool_maxsize:
+                adapter = requests.adapters.HTTPAdapter(pool_maxsize=pool_maxsize) #Connections kept alive for the concurrent requests
+                session.mount(parsed_url.scheme + '://', adapter)
+                self._sessions[host_key] = (session, pool_maxsize)
+            return session
+
     def load_component_from_url(self, url):
-        return comp.load_component_from_url(url)
+        return comp.load_component_from_url(url, http_cache=self.http_cache)
 
     def load_component_from_file(self, path):
         return comp.load_component_from_file(path)
@@ -78,16 +109,58 @@ class ComponentStore:
                 return comp.load_component_from_file(str(component_path))
 
         #Trying URL prefixes
+        http_cache = self.http_cache or get_default_http_cache()
         for url_search_prefix in self.url_search_prefixes:
             url = url_search_prefix + path_suffix
             tried_locations.append(url)
             try:
-                response = requests.get(url) #Does not throw exceptions on bad status, but throws on dead domains and malformed URLs. Should we log those cases?
-                response.raise_for_status()
-            except:
+                content = http_cache.get(url, session=self._get_session(url)) #Throws on bad status, dead domains, malformed URLs, digest mismatches and offline cache misses. Should we log those cases?
+            except Exception:
                 continue
-            if response.content:
+            if content:
                 component_ref = ComponentReference(name=name, digest=digest, tag=tag, url=url)
-                return comp._load_component_from_yaml_or_zip_bytes(response.content, url, component_ref)
+                return comp._load_component_from_yaml_or_zip_bytes(content, url, component_ref)
 
         raise RuntimeError('Component {} was not found. Tried the following locations:\n{}'.format(name, '\n'.join(tried_locations)))
+
+    def load_components(self, names: Sequence[Union[str, ComponentReference]], max_workers: int = 16) -> List:
+        '''
+        Loads many components concurrently and creates their task factory functions
+
+        The components are searched for the same way as in load_component. Up to max_workers components are loaded at the same time and the requests to the same host reuse the pooled connections.
+
+        Args:
+            names: Names of the components or ComponentReference objects with the name and the digest or tag of the components.
+            max_workers: Maximum number of components that are loaded at the same time.
+
+        Returns:
+            The list of task factory functions in the order of the names.
+
+        Raises:
+            RuntimeError: Some components could not be loaded. The message lists the error of every such component.
+        '''
+        def load_component(name_or_reference):
+            if isinstance(name_or_reference, ComponentReference):
+                return self.load_component(name_or_reference.name, digest=name_or_reference.digest, tag=name_or_reference.tag)
+            return self.load_component(name_or_reference)
+
+        if not names:
+            return []
+        worker_count = min(max_workers, len(names))
+        with self._sessions_lock:
+            self._max_connections_per_host = max(self._max_connections_per_host, worker_count)
+        with ThreadPoolExecutor(max_workers=worker_count) as executor:
+            futures = [executor.submit(load_component, name) for name in names]
+
+        task_factories = []
+        error_lines = []
+        for name, future in zip(names, futures):
+            error = future.exception()
+            if error is not None:
+                name = name.name if isinstance(name, ComponentReference) else name
+                error_lines.append('{}: {}'.format(name, error))
+                continue
+            task_factories.append(future.result())
+        if error_lines:
+            raise RuntimeError('Failed to load {} of {} components:\n{}'.format(len(error_lines), len(names), '\n'.join(error_lines)))
+        return task_factories
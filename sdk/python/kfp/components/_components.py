@@ -25,6 +25,7 @@ from ._naming import _sanitize_file_name, _sanitize_python_function_name, genera
 from ._yaml_utils import load_yaml
 from ._structures import ComponentSpec
 from ._structures import *
+from ._task_factory_cache import _get_or_create_task_factory
 from kfp.dsl import PipelineParam
 from kfp.dsl.types import InconsistentTypeException, check_types
 import kfp
@@ -63,12 +64,13 @@ def load_component(filename=None, url=None, text=None):
         raise ValueError('Need to specify a source')
 
 
-def load_component_from_url(url):
+def load_component_from_url(url, http_cache=None):
     '''
     Loads component from URL and creates a task factory function
     
     Args:
         url: The URL of the component file data
+        http_cache: The HttpCache that stores the downloaded component files. The default cache is used when not specified.
 
     Returns:
         A factory function with a strongly-typed signature.
@@ -82,11 +84,11 @@ def load_component_from_url(url):
         #Replacing the gs:// URI with https:// URI (works for public objects)
         url = 'https://storage.googleapis.com/' + url[len('gs://'):]
 
-    import requests
-    resp = requests.get(url)
-    resp.raise_for_status()
+    from ._http_cache import get_default_http_cache
+    http_cache = http_cache or get_default_http_cache()
+    content = http_cache.get(url)
     component_ref = ComponentReference(url=url)
-    return _load_component_from_yaml_or_zip_bytes(resp.content, url, component_ref)
+    return _load_component_from_yaml_or_zip_bytes(content, url, component_ref)
 
 
 def load_component_from_file(filename):
@@ -103,7 +105,7 @@ def load_component_from_file(filename):
     if filename is None:
         raise TypeError
     with open(filename, 'rb') as component_stream:
-        return _load_component_from_yaml_or_zip_stream(component_stream, filename)
+        return _load_component_from_yaml_or_zip_bytes(component_stream.read(), filename)
 
 
 def load_component_from_text(text):
@@ -119,20 +121,33 @@ def load_component_from_text(text):
     '''
     if text is None:
         raise TypeError
-    return _create_task_factory_from_component_text(text, None)
+    return _get_or_create_task_factory(
+        ('text', text),
+        lambda: _create_task_factory_from_component_text(text, None),
+    )
 
 
 _COMPONENT_FILE_NAME_IN_ARCHIVE = 'component.yaml'
 
 
+def _component_ref_key(component_ref: ComponentReference):
+    return None if component_ref is None else sorted(component_ref.to_dict().items())
+
+
 def _load_component_from_yaml_or_zip_bytes(bytes, component_filename=None, component_ref: ComponentReference = None):
     import io
-    component_stream = io.BytesIO(bytes)
-    return _load_component_from_yaml_or_zip_stream(component_stream, component_filename, component_ref)
+    from ._component_spec_cache import _load_component_spec_cached
+    def create_task_factory():
+        component_spec = _load_component_spec_cached(bytes, lambda: _load_component_spec_from_yaml_or_zip_stream(io.BytesIO(bytes)))
+        return _create_task_factory_from_component_spec(component_spec, component_filename, component_ref)
+    return _get_or_create_task_factory(
+        ('bytes', bytes, component_filename, _component_ref_key(component_ref)),
+        create_task_factory,
+    )
 
 
-def _load_component_from_yaml_or_zip_stream(stream, component_filename=None, component_ref: ComponentReference = None):
-    '''Loads component from a stream and creates a task factory function.
+def _load_component_spec_from_yaml_or_zip_stream(stream) -> ComponentSpec:
+    '''Loads component specification from a stream.
     The stream can be YAML or a zip file with a component.yaml file inside.
     '''
     import zipfile
@@ -141,10 +156,18 @@ def _load_component_from_yaml_or_zip_stream(stream, component_filename=None, com
         stream.seek(0)
         with zipfile.ZipFile(stream) as zip_obj:
             with zip_obj.open(_COMPONENT_FILE_NAME_IN_ARCHIVE) as component_stream:
-                return _create_task_factory_from_component_text(component_stream, component_filename, component_ref)
+                return ComponentSpec.from_dict(load_yaml(component_stream))
     else:
         stream.seek(0)
-        return _create_task_factory_from_component_text(stream, component_filename, component_ref)
+        return ComponentSpec.from_dict(load_yaml(stream))
+
+
+def _load_component_from_yaml_or_zip_stream(stream, component_filename=None, component_ref: ComponentReference = None):
+    '''Loads component from a stream and creates a task factory function.
+    The stream can be YAML or a zip file with a component.yaml file inside.
+    '''
+    component_spec = _load_component_spec_from_yaml_or_zip_stream(stream)
+    return _create_task_factory_from_component_spec(component_spec, component_filename, component_ref)
 
 
 def _create_task_factory_from_component_text(text_or_file, component_filename=None, component_ref: ComponentReference = None):
@@ -193,8 +216,18 @@ from . import _dsl_bridge
 _created_task_transformation_handler.append(_dsl_bridge.create_container_op_from_task)
 
 
-#TODO: Refactor the function to make it shorter
 def _create_task_factory_from_component_spec(component_spec:ComponentSpec, component_filename=None, component_ref: ComponentReference = None):
+    '''Creates a task factory function from the component specification. Returns the cached task factory if an identical specification was already used.'''
+    import json
+    component_spec_json = json.dumps(component_spec.to_dict(), sort_keys=True, default=str)
+    return _get_or_create_task_factory(
+        ('spec', component_spec_json, component_filename, _component_ref_key(component_ref)),
+        lambda: _create_task_factory_from_component_spec_uncached(component_spec, component_filename, component_ref),
+    )
+
+
+#TODO: Refactor the function to make it shorter
+def _create_task_factory_from_component_spec_uncached(component_spec:ComponentSpec, component_filename=None, component_ref: ComponentReference = None):
     name = component_spec.name or _default_component_name
 
     func_docstring_lines = []
@@ -214,22 +247,30 @@ def _create_task_factory_from_component_spec(component_spec:ComponentSpec, compo
         component_ref = ComponentReference(name=component_spec.name or component_filename or _default_component_name)
     component_ref._component_spec = component_spec
 
+    #Indexing the inputs once per factory so that the task creation cost only depends on the number of arguments
+    inputs_dict = {input.name: input for input in inputs_list}
+    expected_input_types = {input.name: '' if input.type is None else input.type for input in inputs_list}
+    type_check_results = {} #(input name, argument type) -> check_types result
+    valid_argument_types = (str, int, float, bool, GraphInputArgument, TaskOutputArgument, PipelineParam) #Hack for passed PipelineParams. TODO: Remove the hack once they're no longer passed here.
+
     def create_task_from_component_and_arguments(pythonic_arguments):
         #Converting the argument names and not passing None arguments
-        valid_argument_types = (str, int, float, bool, GraphInputArgument, TaskOutputArgument, PipelineParam) #Hack for passed PipelineParams. TODO: Remove the hack once they're no longer passed here.
         arguments = {
             pythonic_name_to_input_name[k]: (v if isinstance(v, valid_argument_types) else str(v))
             for k, v in pythonic_arguments.items()
             if v is not None
         }
-        for key in arguments:
-            if isinstance(arguments[key], PipelineParam):
-                if kfp.TYPE_CHECK:
-                    for input_spec in component_spec.inputs:
-                        if input_spec.name == key:
-                            if arguments[key].param_type is not None and not check_types(arguments[key].param_type.to_dict_or_str(), '' if input_spec.type is None else input_spec.type):
-                                raise InconsistentTypeException('Component "' + name + '" is expecting ' + key + ' to be type(' + str(input_spec.type) + '), but the passed argument is type(' + arguments[key].param_type.serialize() + ')')
-                arguments[key] = str(arguments[key])
+        for key, argument in arguments.items():
+            if isinstance(argument, PipelineParam):
+                if kfp.TYPE_CHECK and argument.param_type is not None and key in inputs_dict:
+                    argument_type = argument.param_type.to_dict_or_str()
+                    type_check_key = (key, argument_type if isinstance(argument_type, str) else repr(argument_type))
+                    is_compatible = type_check_results.get(type_check_key, None)
+                    if is_compatible is None:
+                        is_compatible = type_check_results[type_check_key] = check_types(argument_type, expected_input_types[key])
+                    if not is_compatible:
+                        raise InconsistentTypeException('Component "' + name + '" is expecting ' + key + ' to be type(' + str(inputs_dict[key].type) + '), but the passed argument is type(' + argument.param_type.serialize() + ')')
+                arguments[key] = str(argument)
 
         task = TaskSpec(
             component_ref=component_ref,
@@ -247,10 +288,12 @@ def _create_task_factory_from_component_spec(component_spec:ComponentSpec, compo
     input_parameters  = [_dynamic.KwParameter(input_name_to_pythonic[port.name], annotation=(_try_get_object_by_name(str(port.type)) if port.type else inspect.Parameter.empty), default=port.default if port.default is not None else (None if port.optional else inspect.Parameter.empty)) for port in reordered_input_list]
     factory_function_parameters = input_parameters #Outputs are no longer part of the task factory function signature. The paths are always generated by the system.
     
-    return _dynamic.create_function_from_parameters(
+    task_factory = _dynamic.create_function_from_parameters(
         create_task_from_component_and_arguments,        
         factory_function_parameters,
         documentation='\n'.join(func_docstring_lines),
         func_name=name,
         func_filename=component_filename
     )
+    task_factory.component_spec = component_spec
+    return task_factory
@@ -0,0 +1,103 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Serializers of the outputs and deserializers of the inputs of the lightweight Python components.
+# The source of the serializer and deserializer functions is copied into the component program, so the functions must be self-contained and only import the libraries inside their body.
+
+import inspect
+from typing import Callable, List
+
+
+def _serialize_str(obj, output_path: str):
+    with open(output_path, 'w') as output_file:
+        output_file.write(str(obj))
+
+
+def _serialize_json(obj, output_path: str):
+    import json
+    with open(output_path, 'w') as output_file:
+        json.dump(obj, output_file)
+
+
+def _serialize_bytes(obj, output_path: str):
+    with open(output_path, 'wb') as output_file:
+        if hasattr(obj, 'read'): #File-like objects are streamed to the output file
+            while True:
+                chunk = obj.read(1024 * 1024)
+                if not chunk:
+                    break
+                output_file.write(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+        else:
+            output_file.write(obj)
+
+
+def _serialize_numpy_array(obj, output_path: str):
+    import numpy
+    with open(output_path, 'wb') as output_file: #Passing the file object prevents numpy from appending the .npy extension to the path
+        numpy.save(output_file, obj, allow_pickle=False)
+
+
+def _deserialize_json(s: str):
+    import json
+    try:
+        return json.loads(s)
+    except ValueError: #Constant arguments are passed using str(), which produces Python literals
+        import ast
+        return ast.literal_eval(s)
+
+
+class _Converter:
+    '''Serializer and deserializer of the values of the types with the specified fully-qualified names and their subclasses.'''
+    def __init__(self, type_names: List[str], serializer: Callable = None, deserializer: Callable = None):
+        self.type_names = type_names
+        self.serializer = serializer
+        self.deserializer = deserializer
+
+
+_converters = [
+    _Converter(['builtins.dict', 'builtins.list'], serializer=_serialize_json, deserializer=_deserialize_json),
+    _Converter(['builtins.bytes', 'builtins.bytearray', 'typing.IO', 'io.IOBase'], serializer=_serialize_bytes),
+    _Converter(['numpy.ndarray'], serializer=_serialize_numpy_array),
+]
+
+
+def _get_annotation_class(annotation):
+    '''Returns the class of the annotation. For generic types like List[int] it is the origin class - list.'''
+    for attr_name in ['__extra__', '__origin__']: #Python 3.5 and 3.6 store the origin class in __extra__
+        origin = getattr(annotation, attr_name, None)
+        if isinstance(origin, type):
+            return origin
+    return annotation if isinstance(annotation, type) else None
+
+
+def _get_converter(annotation) -> _Converter:
+    '''Returns the converter of the values of the annotated type or None when the values are passed as strings.'''
+    annotation_class = _get_annotation_class(annotation)
+    if annotation_class is None:
+        return None
+    class_names = set(cls.__module__ + '.' + cls.__qualname__ for cls in inspect.getmro(annotation_class))
+    for converter in _converters:
+        if class_names.intersection(converter.type_names):
+            return converter
+    return None
+
+
+def _get_output_serializer(annotation) -> Callable:
+    converter = _get_converter(annotation)
+    return converter.serializer if converter is not None and converter.serializer is not None else _serialize_str
+
+
+def _get_input_deserializer(annotation) -> Callable:
+    converter = _get_converter(annotation)
+    return converter.deserializer if converter is not None else None
@@ -0,0 +1,189 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+__all__ = [
+    'HttpCache',
+]
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import warnings
+from urllib.parse import urlparse
+
+
+_DEFAULT_CACHE_DIR = '~/.cache/kfp/components'
+_DEFAULT_MAX_SIZE_BYTES = 100 * 1024 * 1024
+_IMMUTABLE_URL_PATH_REGEX = re.compile(r'/versions/sha256/([0-9a-fA-F]{64})$')
+
+
+def _get_immutable_url_digest(url: str):
+    '''Returns the sha256 digest of the file at the URL if the URL points to a fixed component version.'''
+    match = _IMMUTABLE_URL_PATH_REGEX.search(urlparse(url).path)
+    return match.group(1).lower() if match else None
+
+
+def _write_file_atomically(path: str, data: bytes):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_path, path)
+    except:
+        os.remove(tmp_path)
+        raise
+
+
+class HttpCache:
+    '''Persistent cache of the files downloaded over HTTP, e.g. the component files.
+
+    The downloaded files are stored under the sha256 digest of their content. Every URL maps to the digest of the file last downloaded from it and to the ETag and Last-Modified response headers, which are used to revalidate the cached file with a conditional request.
+    The files under versions/sha256/<digest> URL paths never change. They are verified against the digest when downloaded and are never revalidated.
+    When the total size of the cached files exceeds max_size_bytes, the least recently used files are evicted.
+
+    Args:
+        cache_dir: Directory of the cache. Defaults to the KFP_COMPONENT_CACHE_DIR environment variable or ~/.cache/kfp/components.
+        max_size_bytes: Maximum total size of the cached files.
+        offline: In offline mode the cached files are returned without revalidation and the files that are not cached cannot be loaded. Defaults to the KFP_COMPONENT_CACHE_OFFLINE environment variable.
+    '''
+    def __init__(self, cache_dir: str = None, max_size_bytes: int = _DEFAULT_MAX_SIZE_BYTES, offline: bool = None):
+        if cache_dir is None:
+            cache_dir = os.environ.get('KFP_COMPONENT_CACHE_DIR', _DEFAULT_CACHE_DIR)
+        if offline is None:
+            offline = os.environ.get('KFP_COMPONENT_CACHE_OFFLINE', '').lower() in ('1', 'true', 'yes')
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.max_size_bytes = max_size_bytes
+        self.offline = offline
+
+        self._urls_dir = os.path.join(self.cache_dir, 'urls')
+        self._blobs_dir = os.path.join(self.cache_dir, 'blobs')
+
+    def get(self, url: str, session=None) -> bytes:
+        '''Returns the content of the file at the URL, downloading or revalidating it when needed.
+
+        Args:
+            url: The URL of the file.
+            session: Optional requests.Session used to send the request.
+        '''
+        entry = self._read_url_entry(url)
+        data = self._read_blob(entry['digest']) if entry is not None else None
+        if data is not None and (self.offline or entry.get('immutable', False)):
+            return data
+        if self.offline:
+            raise RuntimeError('The file at {} is not cached and the component cache is in the offline mode.'.format(url))
+
+        import requests
+        headers = {}
+        if data is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        try:
+            response = (session or requests).get(url, headers=headers)
+        except requests.exceptions.ConnectionError as e:
+            if data is None:
+                raise
+            warnings.warn('Cannot revalidate the cached file at {}. Using the cached file. Error: {}'.format(url, e))
+            return data
+        if data is not None and response.status_code == 304:
+            return data
+        response.raise_for_status()
+
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        immutable_digest = _get_immutable_url_digest(url)
+        if immutable_digest is not None and digest != immutable_digest:
+            raise ValueError('The digest of the file at {} is {}, which does not match the digest in the URL.'.format(url, digest))
+        try:
+            self._write_blob(digest, content)
+            self._write_url_entry(url, {
+                'url': url,
+                'digest': digest,
+                'etag': response.headers.get('ETag', None),
+                'last_modified': response.headers.get('Last-Modified', None),
+                'immutable': immutable_digest is not None,
+            })
+            self._evict()
+        except OSError as e:
+            # The cache is an optimization. The downloaded file is returned even when it cannot be cached.
+            logging.warning('Cannot cache the file at %s in %s: %s', url, self.cache_dir, e)
+        return content
+
+    def _url_entry_path(self, url: str) -> str:
+        return os.path.join(self._urls_dir, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self._blobs_dir, digest)
+
+    def _read_url_entry(self, url: str):
+        try:
+            with open(self._url_entry_path(url), 'r') as entry_file:
+                entry = json.load(entry_file)
+        except (OSError, ValueError):
+            return None
+        return entry if isinstance(entry, dict) and entry.get('url') == url and entry.get('digest') else None
+
+    def _write_url_entry(self, url: str, entry: dict):
+        os.makedirs(self._urls_dir, exist_ok=True)
+        _write_file_atomically(self._url_entry_path(url), json.dumps(entry, sort_keys=True).encode('utf-8'))
+
+    def _read_blob(self, digest: str):
+        blob_path = self._blob_path(digest)
+        try:
+            with open(blob_path, 'rb') as blob_file:
+                data = blob_file.read()
+            os.utime(blob_path) #Marking the file as recently used
+        except OSError:
+            return None
+        if hashlib.sha256(data).hexdigest() != digest: #Corrupted file
+            return None
+        return data
+
+    def _write_blob(self, digest: str, data: bytes):
+        os.makedirs(self._blobs_dir, exist_ok=True)
+        _write_file_atomically(self._blob_path(digest), data)
+
+    def _evict(self):
+        '''Removes the least recently used files until the cache fits into max_size_bytes.'''
+        blobs = []
+        for file_name in os.listdir(self._blobs_dir):
+            try:
+                stat = os.stat(os.path.join(self._blobs_dir, file_name))
+            except OSError:
+                continue
+            blobs.append((stat.st_mtime, stat.st_size, file_name))
+        total_size = sum(size for _, size, _ in blobs)
+        for _, size, file_name in sorted(blobs):
+            if total_size <= self.max_size_bytes:
+                break
+            try:
+                os.remove(os.path.join(self._blobs_dir, file_name))
+            except OSError:
+                pass
+            total_size -= size
+
+
+_default_http_cache = None
+
+
+def get_default_http_cache() -> HttpCache:
+    '''Returns the cache used by load_component_from_url and ComponentStore when no cache is specified.'''
+    global _default_http_cache
+    if _default_http_cache is None:
+        _default_http_cache = HttpCache()
+    return _default_http_cache
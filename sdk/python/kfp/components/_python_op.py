@@ -15,13 +15,22 @@
 __all__ = [
     'func_to_container_op',
     'func_to_component_text',
+    'configure_function_payload_size_budget',
+    'get_function_payload_size_report',
 ]
 
+from . import _data_passing
 from ._yaml_utils import dump_yaml
 from ._components import _create_task_factory_from_component_spec
 from ._structures import *
 
+import functools
 import inspect
+import os
+import textwrap
+import threading
+import warnings
+from collections import OrderedDict
 from pathlib import Path
 from typing import TypeVar, Generic, List
 
@@ -46,52 +55,228 @@ def _python_function_name_to_component_name(name):
     return re.sub(' +', ' ', name.replace('_', ' ')).strip(' ').capitalize()
 
 
+_DEFAULT_FUNCTION_PAYLOAD_SIZE_BUDGET_BYTES = 256 * 1024
+_function_payload_size_budget_bytes = int(os.environ.get('KFP_FUNCTION_PAYLOAD_SIZE_BUDGET_BYTES', _DEFAULT_FUNCTION_PAYLOAD_SIZE_BUDGET_BYTES))
+
+_FUNCTION_CODE_CACHE_MAX_SIZE = 256
+_function_code_cache = OrderedDict() # (function fingerprint, modules_to_capture) -> code
+_function_payload_sizes = OrderedDict() # function qualified name -> sizes of the last captured payload
+_function_code_cache_lock = threading.Lock()
+
+
+def configure_function_payload_size_budget(max_size_bytes: int = _DEFAULT_FUNCTION_PAYLOAD_SIZE_BUDGET_BYTES):
+    '''
+    Configures the size budget of the code payloads captured by func_to_container_op.
+
+    The functions are pickled together with their dependencies and embedded into the component command line. Big payloads slow down the compilation and the submission and can exceed the size limits of the Kubernetes objects.
+    A warning is issued when the compressed payload of a function exceeds the budget.
+    The default budget is 256KiB unless the KFP_FUNCTION_PAYLOAD_SIZE_BUDGET_BYTES environment variable is set.
+
+    Args:
+        max_size_bytes: Maximum size of the embedded payload in bytes. The warning is disabled when set to None.
+    '''
+    global _function_payload_size_budget_bytes
+    _function_payload_size_budget_bytes = max_size_bytes
+
+
+def get_function_payload_size_report() -> dict:
+    '''
+    Returns the sizes of the code payloads captured by func_to_container_op.
+
+    Returns:
+        Dictionary mapping the qualified function names to dictionaries with the size of the pickled function (pickled_bytes), the size of the compressed pickle (compressed_bytes) and the size of the payload embedded into the component (payload_bytes).
+    '''
+    with _function_code_cache_lock:
+        return OrderedDict((name, dict(sizes)) for name, sizes in _function_payload_sizes.items())
+
+
+def _get_code_digest(code) -> str:
+    '''Returns the digest of the bytecode, constants and names of the code object and its nested code objects.'''
+    import hashlib
+    h = hashlib.sha256()
+    h.update(code.co_code)
+    h.update(repr((code.co_names, code.co_varnames, code.co_freevars, code.co_cellvars)).encode())
+    for const in code.co_consts:
+        h.update((_get_code_digest(const) if inspect.iscode(const) else repr(const)).encode())
+    return h.hexdigest()
+
+
+def _get_function_fingerprint(func):
+    '''Returns the digest of the function code, defaults, closure and referenced globals or None if the function cannot be fingerprinted.'''
+    from ..compiler._compile_cache import _Fingerprinter, _UnfingerprintableError
+    try:
+        #The code is always hashed since the functions defined in notebooks or using "python -c" can be redefined under the same name
+        return _Fingerprinter().digest(func) + _get_code_digest(func.__code__)
+    except (_UnfingerprintableError, OSError, TypeError, ValueError, AttributeError):
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def _get_cloudpickle_shim_code() -> str:
+    '''Returns the source of the vendored cloudpickle shim without the header comments.'''
+    from . import _cloudpickle_shim
+    source_lines = Path(_cloudpickle_shim.__file__).read_text().split('\n')
+    while source_lines and (not source_lines[0].strip() or source_lines[0].startswith('#')):
+        source_lines.pop(0)
+    return '\n'.join(source_lines).strip('\n')
+
+
+def _get_cloudpickle_shim_names():
+    from ._cloudpickle_shim import _CLOUDPICKLE_FUNCTIONS
+    return _CLOUDPICKLE_FUNCTIONS.keys()
+
+
+_STRING_OPCODE_NAMES = frozenset(['STRING', 'BINSTRING', 'SHORT_BINSTRING', 'UNICODE', 'SHORT_BINUNICODE', 'BINUNICODE', 'BINUNICODE8'])
+_GET_OPCODE_NAMES = frozenset(['GET', 'BINGET', 'LONG_BINGET'])
+_PUT_OPCODE_NAMES = frozenset(['PUT', 'BINPUT', 'LONG_BINPUT'])
+
+
+def _get_pickled_cloudpickle_names(data: bytes) -> set:
+    '''Returns the names of the cloudpickle globals referenced by the pickle. The names that cannot be resolved are returned as None.'''
+    import pickletools
+    names = set()
+    memo = {}
+    stack_top = [None, None] # Last two pushed values when they are strings. Used to resolve the STACK_GLOBAL arguments.
+    for opcode, arg, _ in pickletools.genops(data):
+        if opcode.name == 'GLOBAL':
+            module, name = arg.split(' ', 1)
+        elif opcode.name == 'STACK_GLOBAL':
+            module, name = stack_top
+        else:
+            if opcode.name in _STRING_OPCODE_NAMES:
+                stack_top = [stack_top[1], arg]
+            elif opcode.name in _GET_OPCODE_NAMES:
+                stack_top = [stack_top[1], memo.get(arg, None)]
+            elif opcode.name in _PUT_OPCODE_NAMES:
+                memo[arg] = stack_top[1]
+            elif opcode.name == 'MEMOIZE':
+                memo[len(memo)] = stack_top[1]
+            elif opcode.name != 'FRAME':
+                stack_top = [None, None]
+            continue
+        stack_top = [None, None]
+        if module is None or name is None:
+            names.add(None)
+        elif module.split('.')[0] == 'cloudpickle':
+            names.add(name)
+    return names
+
+
 def _capture_function_code_using_cloudpickle(func, modules_to_capture: List[str] = None) -> str:
+    if modules_to_capture is None:
+        modules_to_capture = [func.__module__]
+
+    fingerprint = _get_function_fingerprint(func)
+    cache_key = (fingerprint, func.__name__, tuple(modules_to_capture)) if fingerprint is not None else None
+    if cache_key is not None:
+        with _function_code_cache_lock:
+            code = _function_code_cache.get(cache_key, None)
+            if code is not None:
+                _function_code_cache.move_to_end(cache_key)
+                return code
+
+    code = _capture_function_code_using_cloudpickle_uncached(func, modules_to_capture)
+
+    if cache_key is not None:
+        with _function_code_cache_lock:
+            _function_code_cache[cache_key] = code
+            while len(_function_code_cache) > _FUNCTION_CODE_CACHE_MAX_SIZE:
+                _function_code_cache.popitem(last=False)
+    return code
+
+
+def _capture_function_code_using_cloudpickle_uncached(func, modules_to_capture: List[str]) -> str:
     import base64
     import sys
+    import zlib
     import cloudpickle
     import pickle
 
-    if modules_to_capture is None:
-        modules_to_capture = [func.__module__]
-
     # Hack to force cloudpickle to capture the whole function instead of just referencing the code file. See https://github.com/cloudpipe/cloudpickle/blob/74d69d759185edaeeac7bdcb7015cfc0c652f204/cloudpickle/cloudpickle.py#L490
     old_modules = {}
     try: # Try is needed to restore the state if something goes wrong
         for module_name in modules_to_capture:
             if module_name in sys.modules:
                 old_modules[module_name] = sys.modules.pop(module_name)
-        func_pickle = base64.b64encode(cloudpickle.dumps(func, pickle.DEFAULT_PROTOCOL))
+        func_pickle = cloudpickle.dumps(func, pickle.DEFAULT_PROTOCOL)
     finally:
         sys.modules.update(old_modules)
-    func_code = '{func_name} = pickle.loads(base64.b64decode({func_pickle}))'.format(
+    compressed_func_pickle = zlib.compress(func_pickle, 9)
+    func_payload = base64.b64encode(compressed_func_pickle)
+    func_code = '{func_name} = _pickle_loads(zlib.decompress(base64.b64decode({func_payload})))'.format(
         func_name=func.__name__,
-        func_pickle=repr(func_pickle)
+        func_payload=repr(func_payload)
     )
 
+    func_qualified_name = '{}.{}'.format(func.__module__, func.__qualname__)
+    with _function_code_cache_lock:
+        _function_payload_sizes[func_qualified_name] = OrderedDict([
+            ('pickled_bytes', len(func_pickle)),
+            ('compressed_bytes', len(compressed_func_pickle)),
+            ('payload_bytes', len(func_payload)),
+        ])
+        _function_payload_sizes.move_to_end(func_qualified_name)
+        while len(_function_payload_sizes) > _FUNCTION_CODE_CACHE_MAX_SIZE:
+            _function_payload_sizes.popitem(last=False)
+    size_budget_bytes = _function_payload_size_budget_bytes
+    if size_budget_bytes is not None and len(func_payload) > size_budget_bytes:
+        warnings.warn(
+            'The captured code of the function {} is {} bytes ({} bytes before compression), which exceeds the budget of {} bytes. '
+            'Check the function for big global variables and captured modules or set the budget using configure_function_payload_size_budget.'.format(
+                func_qualified_name, len(func_payload), len(func_pickle), size_budget_bytes
+            )
+        )
+
+    if _get_pickled_cloudpickle_names(func_pickle) <= set(_get_cloudpickle_shim_names()):
+        # The vendored shim is used when cloudpickle is not installed in the container.
+        cloudpickle_fallback_code_lines = [
+            '    def _create_cloudpickle_shim():',
+            textwrap.indent(_get_cloudpickle_shim_code(), ' ' * 8),
+            '        return loads',
+            '    _pickle_loads = _create_cloudpickle_shim()',
+            '    _bootstrap_mode = "vendored cloudpickle shim"',
+        ]
+    else:
+        cloudpickle_fallback_code_lines = [
+            '    import os',
+            '    import subprocess',
+            '    _pip_env = dict(os.environ, PIP_DISABLE_PIP_VERSION_CHECK="1")', # Keeps the PIP_* variables of the container, e.g. PIP_FIND_LINKS pointing to a mounted wheel cache.
+            '    try:',
+            '        print("cloudpickle is not installed. Installing it globally", file=sys.stderr)',
+            '        subprocess.run([sys.executable, "-m", "pip", "install", "cloudpickle==1.1.1", "--quiet"], env=_pip_env, check=True)',
+            '        print("Installed cloudpickle globally", file=sys.stderr)',
+            '    except:',
+            '        print("Failed to install cloudpickle globally. Installing for the current user.", file=sys.stderr)',
+            '        subprocess.run([sys.executable, "-m", "pip", "install", "cloudpickle==1.1.1", "--user", "--quiet"], env=_pip_env, check=True)',
+            '        print("Installed cloudpickle for the current user", file=sys.stderr)',
+            '        import site',
+            '        sys.path.append(site.getusersitepackages())', # Enable loading from user-installed package directory. Python does not add it to sys.path if it was empty at start. Running pip does not refresh `sys.path`.
+            '    import cloudpickle as _cloudpickle',
+            '    print("cloudpickle loaded successfully after installing.", file=sys.stderr)',
+            '    _pickle_loads = pickle.loads',
+            '    _bootstrap_mode = "installed cloudpickle"',
+        ]
+
     code_lines = [
-        'try:',
-        '    import cloudpickle as _cloudpickle',
-        'except ImportError:',
-        '    import subprocess',
-        '    import sys',
-        '    try:',
-        '        print("cloudpickle is not installed. Installing it globally", file=sys.stderr)',
-        '        subprocess.run([sys.executable, "-m", "pip", "install", "cloudpickle==1.1.1", "--quiet"], env={"PIP_DISABLE_PIP_VERSION_CHECK": "1"}, check=True)',
-        '        print("Installed cloudpickle globally", file=sys.stderr)',
-        '    except:',
-        '        print("Failed to install cloudpickle globally. Installing for the current user.", file=sys.stderr)',
-        '        subprocess.run([sys.executable, "-m", "pip", "install", "cloudpickle==1.1.1", "--user", "--quiet"], env={"PIP_DISABLE_PIP_VERSION_CHECK": "1"}, check=True)',
-        '        print("Installed cloudpickle for the current user", file=sys.stderr)',
-        '        import site',
-        '        sys.path.append(site.getusersitepackages())', # Enable loading from user-installed package directory. Python does not add it to sys.path if it was empty at start. Running pip does not refresh `sys.path`.
-        '    import cloudpickle as _cloudpickle',
-        '    print("cloudpickle loaded successfully after installing.", file=sys.stderr)',
+        'import time',
+        '_bootstrap_start_time = time.time()',
         '',
         'import base64',
         'import pickle',
+        'import sys',
+        'import zlib',
+        '',
+        'try:',
+        '    import cloudpickle as _cloudpickle',
+        '    _pickle_loads = pickle.loads',
+        '    _bootstrap_mode = "cloudpickle"',
+        'except ImportError:',
+    ] + cloudpickle_fallback_code_lines + [
         '',
         func_code,
+        '',
+        '_bootstrap_seconds = time.time() - _bootstrap_start_time',
+        'print("Loaded the function code in {:.3f} seconds using {}.".format(_bootstrap_seconds, _bootstrap_mode), file=sys.stderr)',
     ]
 
     return '\n'.join(code_lines)
@@ -195,10 +380,31 @@ def _func_to_component_spec(func, extra_code='', base_image=_default_base_image,
     from collections import OrderedDict
     parameter_to_type_name = OrderedDict((input.name, str(input.type)) for input in component_spec.inputs)
 
+    signature = inspect.signature(func)
+    return_ann = signature.return_annotation
+    returns_named_tuple = hasattr(return_ann, '_fields')
+    input_annotations = [parameter.annotation for parameter in signature.parameters.values()]
+    if returns_named_tuple:
+        output_annotations = [getattr(return_ann, '_field_types', {}).get(name, None) for name in return_ann._fields]
+    else:
+        output_annotations = [return_ann] * len(extra_output_names)
+
+    input_deserializers = [_data_passing._get_input_deserializer(annotation) for annotation in input_annotations]
+    output_serializers = [_data_passing._get_output_serializer(annotation) for annotation in output_annotations]
+    converter_functions = OrderedDict.fromkeys(
+        converter_func for converter_func in input_deserializers + output_serializers if converter_func is not None
+    )
+    converter_definitions_code = '\n\n'.join(inspect.getsource(converter_func) for converter_func in converter_functions)
+
+    def get_input_parsing_function_name(type_name, deserializer):
+        if deserializer is not None:
+            return deserializer.__name__
+        return type_name if type_name in ['int', 'float', 'bool'] else 'str'
+
     input_args_parsing_code_lines =(
-        "    '{arg_name}': {arg_type}(sys.argv[{arg_idx}]),".format(
+        "    '{arg_name}': {arg_parser}(sys.argv[{arg_idx}]),".format(
             arg_name=name_type[0],
-            arg_type=name_type[1] if name_type[1] in ['int', 'float', 'bool'] else 'str',
+            arg_parser=get_input_parsing_function_name(name_type[1], input_deserializers[idx]),
             arg_idx=idx + 1
         )
         for idx, name_type in enumerate(parameter_to_type_name.items())
@@ -209,12 +415,27 @@ def _func_to_component_spec(func, extra_code='', base_image=_default_base_image,
         for idx in range(len(extra_output_external_names))
     )
 
+    output_serializers_code_lines = (
+        '    {},'.format(serializer.__name__)
+        for serializer in output_serializers
+    )
+
+    if returns_named_tuple:
+        outputs_wrapping_code = \
+'''\
+if not hasattr(_outputs, '__getitem__') or isinstance(_outputs, str):
+    _outputs = [_outputs]'''
+    else:
+        outputs_wrapping_code = '_outputs = [_outputs]'
+
     full_source = \
 '''\
 {extra_code}
 
 {func_code}
 
+{converter_definitions_code}
+
 import sys
 _args = {{
 {input_args_parsing_code}
@@ -222,23 +443,28 @@ _args = {{
 _output_files = [
 {output_files_parsing_code}
 ]
+_output_serializers = [
+{output_serializers_code}
+]
 
 _outputs = {func_name}(**_args)
 
-if not hasattr(_outputs, '__getitem__') or isinstance(_outputs, str):
-    _outputs = [_outputs]
+{outputs_wrapping_code}
 
 from pathlib import Path
 for idx, filename in enumerate(_output_files):
     _output_path = Path(filename)
     _output_path.parent.mkdir(parents=True, exist_ok=True)
-    _output_path.write_text(str(_outputs[idx]))
+    _output_serializers[idx](_outputs[idx], filename)
 '''.format(
         func_name=func.__name__,
         func_code=func_code,
         extra_code=extra_code,
+        converter_definitions_code=converter_definitions_code,
         input_args_parsing_code='\n'.join(input_args_parsing_code_lines),
         output_files_parsing_code='\n'.join(output_files_parsing_code_lines),
+        output_serializers_code='\n'.join(output_serializers_code_lines),
+        outputs_wrapping_code=outputs_wrapping_code,
     )
 
     #Removing consecutive blank lines
@@ -273,6 +499,9 @@ def func_to_component_text(func, extra_code='', base_image=_default_base_image,
             """Returns sum and product of two arguments"""
             return (a + b, a * b)
 
+    The outputs are serialized based on their return annotations: dict and list outputs are written as JSON, bytes and file-like (typing.BinaryIO) outputs are written or streamed as raw bytes, numpy.ndarray outputs are saved in the .npy format and other outputs are converted using str().
+    The dict and list inputs are parsed from JSON.
+
     Args:
         func: The python function to convert
         base_image: Optional. Specify a custom Docker container image to use in the component. For lightweight components, the image needs to have python 3.5+. Default is tensorflow/tensorflow:1.11.0-py3
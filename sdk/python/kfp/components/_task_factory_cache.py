@@ -0,0 +1,95 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+__all__ = [
+    'configure_task_factory_cache',
+]
+
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Callable
+
+
+_DEFAULT_MAX_SIZE = 256
+
+
+class _TaskFactoryCache:
+    '''In-memory cache of the task factories keyed by the digest of the component text or specification they were created from.
+
+    In the strong mode the cache keeps up to max_size least recently used task factories alive.
+    In the weak mode the cache only holds weak references, so the task factories are freed once the program no longer uses them.
+    '''
+    def __init__(self, enabled: bool = True, weak_references: bool = False, max_size: int = _DEFAULT_MAX_SIZE):
+        self.enabled = enabled
+        self.weak_references = weak_references
+        self.max_size = max_size
+        self._task_factories = weakref.WeakValueDictionary() if weak_references else OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key_parts: tuple, create_task_factory: Callable):
+        if not self.enabled:
+            return create_task_factory()
+        key = _digest(key_parts)
+        with self._lock:
+            task_factory = self._task_factories.get(key, None)
+            if task_factory is not None:
+                if not self.weak_references:
+                    self._task_factories.move_to_end(key)
+                return task_factory
+        task_factory = create_task_factory()
+        with self._lock:
+            self._task_factories[key] = task_factory
+            if not self.weak_references:
+                while len(self._task_factories) > self.max_size:
+                    self._task_factories.popitem(last=False)
+        return task_factory
+
+
+def _digest(key_parts: tuple) -> str:
+    h = hashlib.sha256()
+    for part in key_parts:
+        if part is None:
+            data = b'\0'
+        elif isinstance(part, bytes):
+            data = b'b' + part
+        else:
+            data = b's' + str(part).encode('utf-8')
+        h.update(str(len(data)).encode() + b':')
+        h.update(data)
+    return h.hexdigest()
+
+
+_task_factory_cache = _TaskFactoryCache()
+
+
+def configure_task_factory_cache(enabled: bool = True, weak_references: bool = False, max_size: int = _DEFAULT_MAX_SIZE):
+    '''
+    Configures the cache of the task factories created by the load_component_from_* and func_to_container_op functions.
+
+    Loading the same component text or converting a function to the same component specification returns the previously created task factory instead of parsing the component and creating the factory function again.
+    The previously cached task factories are discarded.
+
+    Args:
+        enabled: Whether the task factories are cached.
+        weak_references: Only keep the task factories that are still used by the program. Use it in long-running processes like notebook kernels.
+        max_size: Maximum number of cached task factories when the weak references are not used.
+    '''
+    global _task_factory_cache
+    _task_factory_cache = _TaskFactoryCache(enabled=enabled, weak_references=weak_references, max_size=max_size)
+
+
+def _get_or_create_task_factory(key_parts: tuple, create_task_factory: Callable):
+    return _task_factory_cache.get_or_create(key_parts, create_task_factory)
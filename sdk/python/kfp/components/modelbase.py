@@ -69,7 +69,7 @@ def verify_object_against_type(x: Any, typ: Type[T]) -> T:
         if generic_type in [list, List, abc.Sequence, abc.MutableSequence, Sequence, MutableSequence] and type(x) is not str: #! str is also Sequence
             if not isinstance(x, generic_type):
                 raise TypeError('Error: Object "{}" is incompatible with type "{}"'.format(x, typ))
-            type_args = typ.__args__ if typ.__args__ is not None else (Any, Any) #Workaround for Python <3.7 (where Mapping.__args__ is None)
+            type_args = _get_generic_type_args(typ)
             inner_type = type_args[0]
             for item in x:
                 verify_object_against_type(item, inner_type)
@@ -78,7 +78,7 @@ def verify_object_against_type(x: Any, typ: Type[T]) -> T:
         elif generic_type in [dict, Dict, abc.Mapping, abc.MutableMapping, Mapping, MutableMapping, OrderedDict]:
             if not isinstance(x, generic_type):
                 raise TypeError('Error: Object "{}" is incompatible with type "{}"'.format(x, typ))
-            type_args = typ.__args__ if typ.__args__ is not None else (Any, Any) #Workaround for Python <3.7 (where Mapping.__args__ is None)
+            type_args = _get_generic_type_args(typ)
             inner_key_type = type_args[0]
             inner_value_type = type_args[1]
             for k, v in x.items():
@@ -157,14 +157,14 @@ def parse_object_from_struct_based_on_type(struct: Any, typ: Type[T]) -> T:
         if generic_type in [list, List, abc.Sequence, abc.MutableSequence, Sequence, MutableSequence] and type(struct) is not str: #! str is also Sequence
             if not isinstance(struct, generic_type):
                 raise TypeError('Error: Structure "{}" is incompatible with type "{}" - it does not have list type.'.format(struct, typ))
-            type_args = typ.__args__ if typ.__args__ is not None else (Any, Any) #Workaround for Python <3.7 (where Mapping.__args__ is None)
+            type_args = _get_generic_type_args(typ)
             inner_type = type_args[0]
             return [parse_object_from_struct_based_on_type(item, inner_type) for item in struct]
 
         elif generic_type in [dict, Dict, abc.Mapping, abc.MutableMapping, Mapping, MutableMapping, OrderedDict]: #in Python <3.7 there is a difference between abc.Mapping and typing.Mapping
             if not isinstance(struct, generic_type):
                 raise TypeError('Error: Structure "{}" is incompatible with type "{}" - it does not have dict type.'.format(struct, typ))
-            type_args = typ.__args__ if typ.__args__ is not None else (Any, Any) #Workaround for Python <3.7 (where Mapping.__args__ is None)
+            type_args = _get_generic_type_args(typ)
             inner_key_type = type_args[0]
             inner_value_type = type_args[1]
             return {parse_object_from_struct_based_on_type(k, inner_key_type): parse_object_from_struct_based_on_type(v, inner_value_type) for k, v in struct.items()}
@@ -181,12 +181,12 @@ def convert_object_to_struct(obj, serialized_names: Mapping[str, str] = {}):
     If the type of some property is a class that has .to_dict class method, that method is used for conversion.
     Used by the ModelBase class.
     '''
-    signature = inspect.signature(obj.__init__) #Needed for default values
+    metadata = _get_class_metadata(obj.__class__) #Needed for default values
     result = {}
-    for python_name in signature.parameters: #TODO: Make it possible to specify the field ordering regardless of the presence of default values
-        value = getattr(obj, python_name)
+    for python_name in metadata.field_names: #TODO: Make it possible to specify the field ordering regardless of the presence of default values
         if python_name.startswith('_'):
             continue
+        value = getattr(obj, python_name)
         attr_name = serialized_names.get(python_name, python_name)
         if hasattr(value, "to_dict"):
             result[attr_name] = value.to_dict()
@@ -195,8 +195,8 @@ def convert_object_to_struct(obj, serialized_names: Mapping[str, str] = {}):
         elif isinstance(value, dict):
             result[attr_name] = {k: (v.to_dict() if hasattr(v, 'to_dict') else v) for k, v in value.items()}
         else:
-            param = signature.parameters.get(python_name, None)
-            if param is None or param.default == inspect.Parameter.empty or value != param.default:
+            default = metadata.field_defaults.get(python_name, inspect.Parameter.empty)
+            if default == inspect.Parameter.empty or value != default:
                 result[attr_name] = value
 
     return result
@@ -211,7 +211,7 @@ def parse_object_from_struct_based_on_class_init(cls : Type[T], struct: Mapping,
 
     serialized_names: specifies the mapping between __init__ parameter names and the structure key names for cases where these names are different (due to language syntax clashes or style differences).
     '''
-    parameter_types = get_type_hints(cls.__init__) #Properlty resolves forward references
+    parameter_types = _get_class_metadata(cls).parameter_types #Properlty resolves forward references
 
     serialized_names_to_pythonic = {v: k for k, v in serialized_names.items()}
     #If a pythonic name has a different original name, we forbid the pythonic name in the structure. Otherwise, this function would accept "python-styled" structures that should be invalid
@@ -230,6 +230,216 @@ def parse_object_from_struct_based_on_class_init(cls : Type[T], struct: Mapping,
     return cls(**args)
 
 
+_LIST_GENERIC_TYPES = [list, List, abc.Sequence, abc.MutableSequence, Sequence, MutableSequence]
+_DICT_GENERIC_TYPES = [dict, Dict, abc.Mapping, abc.MutableMapping, Mapping, MutableMapping, OrderedDict]
+
+
+def _get_generic_type_args(typ) -> tuple:
+    #Bare generics like typing.Dict have __args__ == None in Python <3.7 and do not have __args__ in Python >=3.9
+    type_args = getattr(typ, '__args__', None)
+    return type_args if type_args else (Any, Any)
+
+
+def _supports_isinstance(typ) -> bool:
+    try: #isinstance fails for generics
+        isinstance(None, typ)
+        return True
+    except:
+        return False
+
+
+def _memoize_by_type(fallback_function):
+    '''Caches the functions compiled for a type. Types that cannot be hashed are compiled on every call.
+    The fallback_function is returned for the types that cannot be compiled. It must make the callers use the slow path.
+    '''
+    def decorator(create_function):
+        cache = {}
+        def create_or_fallback(typ):
+            try:
+                return create_function(typ)
+            except Exception:
+                return fallback_function
+        def get_or_create(typ):
+            try:
+                return cache[typ]
+            except TypeError:
+                return create_or_fallback(typ)
+            except KeyError:
+                pass
+            result = cache[typ] = create_or_fallback(typ)
+            return result
+        return get_or_create
+    return decorator
+
+
+def _fail_type_check(x):
+    return False
+
+
+@_memoize_by_type(_fail_type_check)
+def _create_type_checker(typ) -> Callable[[Any], bool]:
+    '''Compiles the type into a function that returns whether an object passes verify_object_against_type.
+    The checker never gives false positives. When it returns False, verify_object_against_type is used to produce the error message.
+    '''
+    if typ is type(None):
+        return lambda x: x is None
+
+    if typ is Any or type(typ) is TypeVar:
+        return lambda x: True
+
+    check_isinstance = _supports_isinstance(typ)
+    if not hasattr(typ, '__origin__'):
+        if check_isinstance:
+            return lambda x: isinstance(x, typ)
+        return _fail_type_check
+
+    if typ.__origin__ is Union:
+        possible_type_checkers = [_create_type_checker(possible_type) for possible_type in typ.__args__]
+        def check_generic(x):
+            return any(check(x) for check in possible_type_checkers)
+    else:
+        generic_type = typ.__origin__ or getattr(typ, '__extra__', None)
+        if generic_type in _LIST_GENERIC_TYPES:
+            check_item = _create_type_checker(_get_generic_type_args(typ)[0])
+            def check_generic(x):
+                return type(x) is not str and isinstance(x, generic_type) and all(check_item(item) for item in x)
+        elif generic_type in _DICT_GENERIC_TYPES:
+            type_args = _get_generic_type_args(typ)
+            check_key = _create_type_checker(type_args[0])
+            check_value = _create_type_checker(type_args[1])
+            def check_generic(x):
+                return isinstance(x, generic_type) and all(check_key(k) and check_value(v) for k, v in x.items())
+        else:
+            check_generic = _fail_type_check
+
+    if check_isinstance:
+        return lambda x: isinstance(x, typ) or check_generic(x)
+    return check_generic
+
+
+class _StructParsingError(Exception):
+    '''Raised by the compiled struct parsers. The error message is produced by the slow path parsing functions.'''
+
+
+def _fail_parsing(struct):
+    raise _StructParsingError()
+
+
+@_memoize_by_type(_fail_parsing)
+def _create_struct_parser(typ) -> Callable[[Any], Any]:
+    '''Compiles the type into a function that parses a structure the same way as parse_object_from_struct_based_on_type.
+    On failure the parser raises an exception without the descriptive error message. Callers reparse the structure with parse_object_from_struct_based_on_type to get it.
+    '''
+    if typ is type(None):
+        def parse_none(struct):
+            if struct is not None:
+                raise _StructParsingError()
+            return None
+        return parse_none
+
+    if typ is Any or type(typ) is TypeVar:
+        return lambda struct: struct
+
+    if hasattr(typ, 'from_dict'):
+        if isinstance(typ, type) and issubclass(typ, ModelBase) and typ.from_dict.__func__ is ModelBase.from_dict.__func__:
+            parse_dict = lambda struct: _get_class_metadata(typ).parse_struct(struct)
+        else:
+            parse_dict = typ.from_dict
+        def parse_object(struct):
+            if type(struct) is typ:
+                return struct
+            return parse_dict(struct)
+        return parse_object
+
+    if not hasattr(typ, '__origin__'):
+        def parse_exact_type(struct):
+            if type(struct) is not typ:
+                raise _StructParsingError()
+            return struct
+        return parse_exact_type
+
+    if typ.__origin__ is Union:
+        possible_types = list(typ.__args__)
+        #Hack for Python <3.7 which for some reason "simplifies" Union[bool, int, ...] to just Union[int, ...]
+        if int in possible_types and bool not in possible_types:
+            possible_types.append(bool)
+        possible_type_parsers = [(possible_type, _create_struct_parser(possible_type)) for possible_type in possible_types]
+        def parse_union(struct):
+            if type(struct) is typ:
+                return struct
+            results = []
+            for possible_type, parse in possible_type_parsers:
+                try:
+                    results.append(parse(struct))
+                except Exception:
+                    pass
+            if len(results) != 1: #Incompatible or ambiguous structure
+                raise _StructParsingError()
+            return results[0]
+        return parse_union
+
+    generic_type = typ.__origin__ or getattr(typ, '__extra__', None)
+    if generic_type in _LIST_GENERIC_TYPES:
+        parse_item = _create_struct_parser(_get_generic_type_args(typ)[0])
+        def parse_list(struct):
+            if type(struct) is str or not isinstance(struct, generic_type):
+                raise _StructParsingError()
+            return [parse_item(item) for item in struct]
+        return parse_list
+
+    if generic_type in _DICT_GENERIC_TYPES:
+        type_args = _get_generic_type_args(typ)
+        parse_key = _create_struct_parser(type_args[0])
+        parse_value = _create_struct_parser(type_args[1])
+        def parse_dict(struct):
+            if not isinstance(struct, generic_type):
+                raise _StructParsingError()
+            return {parse_key(k): parse_value(v) for k, v in struct.items()}
+        return parse_dict
+
+    return _fail_parsing
+
+
+class _ClassMetadata:
+    '''Field names, defaults, types and serialized names of a class, resolved from its __init__ method once per class.'''
+    def __init__(self, cls: type):
+        self.cls = cls
+        parameters = list(inspect.signature(cls.__init__).parameters.values())[1:] #Skipping self
+        self.field_names = [parameter.name for parameter in parameters]
+        self.field_defaults = {parameter.name: parameter.default for parameter in parameters if parameter.default is not inspect.Parameter.empty}
+        self.parameter_types = get_type_hints(cls.__init__) #Properlty resolves forward references
+        self.type_checkers = {name: _create_type_checker(typ) for name, typ in self.parameter_types.items()}
+
+        serialized_names = getattr(cls, '_serialized_names', {})
+        self.serialized_names_to_pythonic = {v: k for k, v in serialized_names.items()}
+        self.forbidden_struct_keys = set(self.serialized_names_to_pythonic.values()).difference(self.serialized_names_to_pythonic.keys())
+        self._field_parsers = None
+
+    def parse_struct(self, struct: Mapping):
+        '''Fast path of parse_object_from_struct_based_on_class_init. Raises an exception without the descriptive error message on failure.'''
+        if self._field_parsers is None:
+            self._field_parsers = {name: _create_struct_parser(typ) for name, typ in self.parameter_types.items()}
+        field_parsers = self._field_parsers
+        args = {}
+        for original_name, value in struct.items():
+            if original_name in self.forbidden_struct_keys:
+                raise _StructParsingError()
+            python_name = self.serialized_names_to_pythonic.get(original_name, original_name)
+            parse = field_parsers.get(python_name, None)
+            args[python_name] = parse(value) if parse is not None else value
+        return self.cls(**args)
+
+
+_class_metadata = {}
+
+
+def _get_class_metadata(cls: type) -> _ClassMetadata:
+    metadata = _class_metadata.get(cls, None)
+    if metadata is None:
+        metadata = _class_metadata[cls] = _ClassMetadata(cls)
+    return metadata
+
+
 class ModelBase:
     '''Base class for types that can be converted to JSON-like dict structures or constructed from such structures.
     The object fields, their types and default values are taken from the __init__ method arguments.
@@ -257,11 +467,12 @@ class ModelBase:
     '''
     _serialized_names = {}
     def __init__(self, args):
-        parameter_types = get_type_hints(self.__class__.__init__)
+        metadata = _get_class_metadata(self.__class__)
         field_values = {k: v for k, v in args.items() if k != 'self' and not k.startswith('_')}
         for k, v in field_values.items():
-            parameter_type = parameter_types.get(k, None)
-            if parameter_type is not None:
+            check_type = metadata.type_checkers.get(k, None)
+            if check_type is not None and not check_type(v):
+                parameter_type = metadata.parameter_types[k]
                 try:
                     verify_object_against_type(v, parameter_type)
                 except Exception as e:
@@ -270,13 +481,17 @@ class ModelBase:
 
     @classmethod
     def from_dict(cls: Type[T], struct: Mapping) -> T:
-        return parse_object_from_struct_based_on_class_init(cls, struct, serialized_names=cls._serialized_names)
+        try:
+            return _get_class_metadata(cls).parse_struct(struct)
+        except Exception:
+            #Parsing again to get the descriptive error message
+            return parse_object_from_struct_based_on_class_init(cls, struct, serialized_names=cls._serialized_names)
 
     def to_dict(self) -> Mapping:
         return convert_object_to_struct(self, serialized_names=self._serialized_names)
     
     def _get_field_names(self):
-        return list(inspect.signature(self.__init__).parameters)
+        return list(_get_class_metadata(self.__class__).field_names)
 
     def __repr__(self):
         return self.__class__.__name__ + '(' + ', '.join(param + '=' + repr(getattr(self, param)) for param in self._get_field_names()) + ')'
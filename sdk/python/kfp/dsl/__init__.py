@@ -15,13 +15,20 @@
 
 from ._pipeline_param import PipelineParam, match_serialized_pipelineparam
 from ._pipeline import Pipeline, pipeline, get_pipeline_conf
-from ._container_op import ContainerOp, Sidecar
-from ._resource_op import ResourceOp
-from ._volume_op import (
-    VolumeOp, VOLUME_MODE_RWO, VOLUME_MODE_RWM, VOLUME_MODE_ROM
-)
-from ._pipeline_volume import PipelineVolume
-from ._volume_snapshot_op import VolumeSnapshotOp
-from ._ops_group import OpsGroup, ExitHandler, Condition
+from ._ops_group import OpsGroup, ExitHandler, Condition, ParallelFor
 from ._component import python_component, graph_component, component
-from ._artifact_location import ArtifactLocation
\ No newline at end of file
+from .. import _lazy_import
+
+# The ops are built on the kubernetes client models, which are imported on first use.
+_lazy_import.install_lazy_attributes(globals(), {
+  'ContainerOp': '._container_op',
+  'Sidecar': '._container_op',
+  'ResourceOp': '._resource_op',
+  'VolumeOp': '._volume_op',
+  'VOLUME_MODE_RWO': '._volume_op',
+  'VOLUME_MODE_RWM': '._volume_op',
+  'VOLUME_MODE_ROM': '._volume_op',
+  'PipelineVolume': '._pipeline_volume',
+  'VolumeSnapshotOp': '._volume_snapshot_op',
+  'ArtifactLocation': '._artifact_location',
+})
@@ -13,9 +13,8 @@
 # limitations under the License.
 
 
-from . import _container_op
 from . import _pipeline
-from ._pipeline_param import ConditionOperator
+from ._pipeline_param import ConditionOperator, PipelineParam, sanitize_k8s_name
 
 class OpsGroup(object):
   """Represents a logical group of ops and group of OpsGroups.
@@ -28,7 +27,7 @@ class OpsGroup(object):
   def __init__(self, group_type: str, name: str=None):
     """Create a new instance of OpsGroup.
     Args:
-      group_type (str): one of 'pipeline', 'exit_handler', 'condition', and 'graph'.
+      group_type (str): one of 'pipeline', 'exit_handler', 'condition', 'for_loop', and 'graph'.
       name (str): name of the opsgroup
     """
     #TODO: declare the group_type to be strongly typed
@@ -51,12 +50,8 @@ class OpsGroup(object):
       raise ValueError('Default pipeline not defined.')
     if name is None:
       return None
-    name_pattern = '^' + (group_type + '-' + name + '-').replace('_', '-') + '[\d]+$'
-    for ops_group in _pipeline.Pipeline.get_default_pipeline().groups:
-      import re
-      if ops_group.type == group_type and re.match(name_pattern ,ops_group.name):
-        return ops_group
-    return None
+    name_prefix = (group_type + '-' + name + '-').replace('_', '-')
+    return _pipeline.Pipeline.get_default_pipeline()._find_open_group(group_type, name_prefix)
 
   def _make_name_unique(self):
     """Generate a unique opsgroup name in the pipeline"""
@@ -98,7 +93,7 @@ class ExitHandler(OpsGroup):
   ```
   """
 
-  def __init__(self, exit_op: _container_op.ContainerOp):
+  def __init__(self, exit_op: '_container_op.ContainerOp'):
     """Create a new instance of ExitHandler.
     Args:
       exit_op: an operator invoked at exiting a group of ops.
@@ -132,6 +127,76 @@ class Condition(OpsGroup):
     super(Condition, self).__init__('condition')
     self.condition = condition
 
+class LoopArguments(PipelineParam):
+  """Pipeline param representing the current item of a ParallelFor loop.
+
+  The fields of the dict items are accessed by indexing: item['field'].
+  """
+
+  def __init__(self, name: str):
+    super(LoopArguments, self).__init__(name)
+    # sanitized name of the field pipeline param -> field name
+    self.item_fields = {}
+
+  def __getitem__(self, field_name: str):
+    field_param = PipelineParam('{}-subvar-{}'.format(self.name, field_name))
+    self.item_fields[sanitize_k8s_name(field_param.name)] = field_name
+    return field_param
+
+  def to_item_references(self):
+    """Returns the names of the item pipeline params mapped to the Argo item expressions."""
+    item_references = {self.name: '{{item}}'}
+    for param_name, field_name in self.item_fields.items():
+      item_references[param_name] = '{{item.%s}}' % field_name
+    return item_references
+
+
+class ParallelFor(OpsGroup):
+  """Represents a group of ops that runs in parallel for every item of a list.
+
+  The ops are compiled once into a loop template, which is run for every item by a single
+  task: static lists are compiled to Argo withItems and pipeline params (e.g. op outputs
+  that contain a JSON list) to withParam.
+
+  Example usage:
+  ```python
+  with ParallelFor([{'a': 1, 'b': 10}, {'a': 2, 'b': 20}]) as item:
+    op1 = ContainerOp(..., args=['echo', item['a'], item['b']])
+
+  with ParallelFor(op0.output) as item:
+    op2 = ContainerOp(..., args=['echo', item])
+  ```
+  """
+
+  def __init__(self, loop_args):
+    """Create a new instance of ParallelFor.
+    Args:
+      loop_args: the items to loop over. Either a list of JSON-serializable values or a
+        PipelineParam with a JSON list.
+
+    Raises:
+      TypeError if the loop_args is neither a list nor a PipelineParam.
+      ValueError if the list is empty or contains PipelineParams.
+    """
+    super(ParallelFor, self).__init__('for_loop')
+    if isinstance(loop_args, PipelineParam):
+      self.items = loop_args
+    elif not isinstance(loop_args, (list, tuple)):
+      raise TypeError('ParallelFor expects a list or a PipelineParam, got {}.'.format(type(loop_args).__name__))
+    else:
+      self.items = list(loop_args)
+      if not self.items:
+        raise ValueError('ParallelFor requires at least one item.')
+      if any(isinstance(item, PipelineParam) for item in self.items):
+        raise ValueError('The ParallelFor items cannot contain PipelineParams. Pass a PipelineParam with a JSON list instead.')
+    self.loop_args = None
+
+  def __enter__(self):
+    super(ParallelFor, self).__enter__()
+    self.loop_args = LoopArguments(self.name + '-item')
+    return self.loop_args
+
+
 class Graph(OpsGroup):
   """Graph DAG with inputs, recursive_inputs, and outputs.
   This is not used directly by the users but auto generated when the graph_component decoration exists
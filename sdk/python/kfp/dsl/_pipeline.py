@@ -13,10 +13,7 @@
 # limitations under the License.
 
 
-from . import _container_op
-from . import _resource_op
 from . import _ops_group
-from ..components._naming import _make_name_unique_by_adding_index
 import sys
 
 
@@ -173,8 +170,14 @@ class Pipeline():
     self.group_id = 0
     self.conf = PipelineConf()
     self._metadata = None
+    # Next index to try when making each op name unique. Ops are never removed
+    # while the pipeline is being built, so the used indices only grow.
+    self._op_name_indices = {}
+    # Groups on the stack keyed by the name prefix they were made unique with.
+    self._open_groups_by_prefix = {}
 
   def __enter__(self):
+    from . import _container_op
     if Pipeline._default_pipeline:
       raise Exception('Nested pipelines are not allowed.')
 
@@ -188,10 +191,11 @@ class Pipeline():
     return self
 
   def __exit__(self, *args):
+    from . import _container_op
     Pipeline._default_pipeline = None
     _container_op._register_op_handler = self._old__register_op_handler
 
-  def add_op(self, op: _container_op.BaseOp, define_only: bool):
+  def add_op(self, op: '_container_op.BaseOp', define_only: bool):
     """Add a new operator.
 
     Args:
@@ -201,7 +205,7 @@ class Pipeline():
       op_name: a unique op name.
     """
     #If there is an existing op with this name then generate a new name.
-    op_name = _make_name_unique_by_adding_index(op.human_name, list(self.ops.keys()), ' ')
+    op_name = self._make_op_name_unique(op.human_name)
 
     self.ops[op_name] = op
     if not define_only:
@@ -209,6 +213,25 @@ class Pipeline():
 
     return op_name
 
+  def _make_op_name_unique(self, name):
+    """Returns the name or the name with the lowest free index, e.g. "name 2", "name 3", ..."""
+    if name not in self.ops:
+      return name
+    index = self._op_name_indices.get(name, 2)
+    while name + ' ' + str(index) in self.ops:
+      index += 1
+    self._op_name_indices[name] = index + 1
+    return name + ' ' + str(index)
+
+  @staticmethod
+  def _get_group_key(group):
+    """Key of a group made unique by OpsGroup._make_name_unique: (type, name without the trailing id)."""
+    name = group.name or ''
+    prefix = name.rstrip('0123456789')
+    if prefix == name or not prefix.endswith('-'):
+      return None
+    return (group.type, prefix)
+
   def push_ops_group(self, group: _ops_group.OpsGroup):
     """Push an OpsGroup into the stack.
 
@@ -217,10 +240,24 @@ class Pipeline():
     """
     self.groups[-1].groups.append(group)
     self.groups.append(group)
+    key = self._get_group_key(group)
+    if key:
+      self._open_groups_by_prefix.setdefault(key, []).append(group)
 
   def pop_ops_group(self):
     """Remove the current OpsGroup from the stack."""
-    del self.groups[-1]
+    group = self.groups.pop()
+    key = self._get_group_key(group)
+    if key:
+      open_groups = self._open_groups_by_prefix[key]
+      open_groups.pop()
+      if not open_groups:
+        del self._open_groups_by_prefix[key]
+
+  def _find_open_group(self, group_type, name_prefix):
+    """Returns the outermost group on the stack with the type and the name prefix or None."""
+    open_groups = self._open_groups_by_prefix.get((group_type, name_prefix))
+    return open_groups[0] if open_groups else None
 
   def get_next_group_id(self):
     """Get next id for a new group. """
@@ -24,6 +24,14 @@ from ._metadata import TypeMeta
 ConditionOperator = namedtuple('ConditionOperator', 'operator operand1 operand2')
 PipelineParamTuple = namedtuple('PipelineParamTuple', 'name op value type pattern')
 
+# Every serialized pipelineparam starts with this marker. Strings without it are skipped.
+_SERIALIZED_PIPELINEPARAM_MARKER = '{{pipelineparam:'
+_SERIALIZED_PIPELINEPARAM_REGEX = re.compile(
+    r'{{pipelineparam:op=([\w\s_-]*);name=([\w\s_-]+);value=(.*?);type=(.*?);}}')
+# Serialized pipelineparams without type. Only matched when a string has no typed ones.
+_UNTYPED_SERIALIZED_PIPELINEPARAM_REGEX = re.compile(
+    r'{{pipelineparam:op=([\w\s_-]*);name=([\w\s_-]+);value=(.*?)}}')
+
 
 def sanitize_k8s_name(name):
     """From _make_kubernetes_name
@@ -40,9 +48,11 @@ def match_serialized_pipelineparam(payload: str):
   Returns:
     PipelineParamTuple
   """
-  matches = re.findall(r'{{pipelineparam:op=([\w\s_-]*);name=([\w\s_-]+);value=(.*?);type=(.*?);}}', payload)
+  if _SERIALIZED_PIPELINEPARAM_MARKER not in payload:
+    return []
+  matches = _SERIALIZED_PIPELINEPARAM_REGEX.findall(payload)
   if len(matches) == 0:
-    matches = re.findall(r'{{pipelineparam:op=([\w\s_-]*);name=([\w\s_-]+);value=(.*?)}}', payload)
+    matches = _UNTYPED_SERIALIZED_PIPELINEPARAM_REGEX.findall(payload)
   param_tuples = []
   for match in matches:
     if len(match) == 3:
@@ -63,6 +73,26 @@ def match_serialized_pipelineparam(payload: str):
                             pattern=pattern))
   return param_tuples
 
+def _substitute_serialized_pipelineparams(payload: str, substitutions: dict):
+  """Replaces all serialized pipelineparams in the payload in a single pass.
+
+  Args:
+    payload (str): a string that may contain serialized pipelineparams.
+    substitutions (dict): maps serialized pipelineparams (PipelineParamTuple.pattern)
+        to their replacement strings.
+  Returns:
+    The payload with all serialized pipelineparams replaced.
+  Raises:
+    KeyError if a serialized pipelineparam has no substitution.
+  """
+  if _SERIALIZED_PIPELINEPARAM_MARKER not in payload:
+    return payload
+  substitute = lambda match: substitutions[match.group(0)]
+  result, count = _SERIALIZED_PIPELINEPARAM_REGEX.subn(substitute, payload)
+  if count == 0:
+    result = _UNTYPED_SERIALIZED_PIPELINEPARAM_REGEX.sub(substitute, payload)
+  return result
+
 def _extract_pipelineparams(payloads: str or List[str]):
   """_extract_pipelineparam extract a list of PipelineParam instances from the payload string.
   Note: this function removes all duplicate matches.
@@ -37,12 +37,17 @@ REQUIRES = [
     'click == 7.0'
 ]
 
+EXTRAS_REQUIRE = {
+    'async': ['aiohttp >= 3.3'], #kfp.AsyncClient
+}
+
 setup(
     name=NAME,
     version=VERSION,
     description='KubeFlow Pipelines SDK',
     author='google',
     install_requires=REQUIRES,
+    extras_require=EXTRAS_REQUIRE,
     packages=[
         'kfp',
         'kfp.compiler',
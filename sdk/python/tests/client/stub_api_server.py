@@ -0,0 +1,161 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""In-memory stub of the Kubeflow Pipelines API server used by the client tests."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, urlparse
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+  daemon_threads = True
+
+
+class StubApiServer(object):
+  """Serves the experiment, pipeline upload and run APIs from memory.
+
+  The runs succeed after they are returned by run_polls_to_complete get or list
+  requests. The statuses in the failures list are returned (and removed) before
+  serving the next requests. The experiments can be filtered by name unless
+  supports_name_filter is False.
+  """
+
+  def __init__(self, run_polls_to_complete=1, response_delay_seconds=0, supports_name_filter=True):
+    self.run_polls_to_complete = run_polls_to_complete
+    self.supports_name_filter = supports_name_filter
+    self.response_delay_seconds = response_delay_seconds
+    self.failures = []
+    self.requests = []
+    self.experiments = []
+    self.pipelines = []
+    self.runs = {}
+    self.active_requests = 0
+    self.max_active_requests = 0
+    self._lock = threading.Lock()
+    self._server = _ThreadingHTTPServer(('127.0.0.1', 0), self._create_handler_class())
+    self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+  @property
+  def host(self):
+    return 'http://127.0.0.1:{}'.format(self._server.server_address[1])
+
+  def __enter__(self):
+    self._thread.start()
+    return self
+
+  def __exit__(self, *args):
+    self._server.shutdown()
+    self._server.server_close()
+
+  def _create_handler_class(self):
+    stub = self
+
+    class _Handler(BaseHTTPRequestHandler):
+      def log_message(self, *args):
+        pass
+
+      def _handle(self):
+        url = urlparse(self.path)
+        content_length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(content_length) if content_length else None
+        if body and self.headers.get('Content-Type', '').startswith('application/json'):
+          body = json.loads(body.decode('utf-8'))
+        status, response, headers = stub._serve(self.command, url.path, parse_qs(url.query), body)
+        data = json.dumps(response).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers.items():
+          self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+      do_GET = _handle
+      do_POST = _handle
+
+    return _Handler
+
+  def _serve(self, method, path, query, body):
+    with self._lock:
+      self.requests.append((method, path))
+      self.active_requests += 1
+      self.max_active_requests = max(self.max_active_requests, self.active_requests)
+    try:
+      if self.response_delay_seconds:
+        time.sleep(self.response_delay_seconds)
+      with self._lock:
+        if self.failures:
+          return self.failures.pop(0), {'error': 'injected failure'}, {'Retry-After': '0'}
+        return self._serve_api(method, path, query, body)
+    finally:
+      with self._lock:
+        self.active_requests -= 1
+
+  def _serve_api(self, method, path, query, body):
+    if path == '/apis/v1beta1/experiments':
+      if method == 'POST':
+        experiment = dict(body, id='experiment-{}'.format(len(self.experiments)))
+        self.experiments.append(experiment)
+        return 200, experiment, {}
+      experiments = self.experiments
+      if self.supports_name_filter and 'filter' in query:
+        predicate = json.loads(query['filter'][0])['predicates'][0]
+        experiments = [experiment for experiment in experiments if experiment[predicate['key']] == predicate['string_value']]
+      return 200, self._page('experiments', experiments, query), {}
+    if path.startswith('/apis/v1beta1/experiments/'):
+      for experiment in self.experiments:
+        if experiment['id'] == path.rsplit('/', 1)[1]:
+          return 200, experiment, {}
+      return 404, {'error': 'not found'}, {}
+    if path == '/apis/v1beta1/pipelines/upload':
+      pipeline = {'id': 'pipeline-{}'.format(len(self.pipelines)), 'name': query.get('name', ['pipeline'])[0]}
+      self.pipelines.append(dict(pipeline, package=body))
+      return 200, pipeline, {}
+    if path == '/apis/v1beta1/runs':
+      if method == 'POST':
+        run = dict(body, id='run-{}'.format(len(self.runs)), status='Running')
+        self.runs[run['id']] = {'run': run, 'polls': 0}
+        return 200, {'run': run}, {}
+      entries = list(self.runs.values())
+      if 'resource_reference_key.id' in query:
+        experiment_id = query['resource_reference_key.id'][0]
+        entries = [entry for entry in entries if entry['run']['resource_references'][0]['key']['id'] == experiment_id]
+      response = self._page('runs', entries, query)
+      response['runs'] = [self._poll_run(entry) for entry in response['runs']]
+      return 200, response, {}
+    if path.startswith('/apis/v1beta1/runs/'):
+      entry = self.runs.get(path.rsplit('/', 1)[1])
+      if entry is None:
+        return 404, {'error': 'not found'}, {}
+      return 200, {'run': self._poll_run(entry)}, {}
+    return 404, {'error': 'not found'}, {}
+
+  def _poll_run(self, entry):
+    entry['polls'] += 1
+    if entry['polls'] >= self.run_polls_to_complete:
+      entry['run']['status'] = 'Succeeded'
+    return entry['run']
+
+  @staticmethod
+  def _page(name, items, query):
+    page_size = int(query.get('page_size', ['10'])[0])
+    start = int(query.get('page_token', ['0'])[0] or 0)
+    response = {name: items[start:start + page_size]}
+    if start + page_size < len(items):
+      response['next_page_token'] = str(start + page_size)
+    return response
@@ -0,0 +1,135 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import os
+import tempfile
+import unittest
+
+from kfp_server_api.rest import ApiException
+
+from .stub_api_server import StubApiServer
+
+try:
+  import aiohttp
+except ImportError:
+  aiohttp = None
+
+
+def _run(coroutine):
+  return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+@unittest.skipIf(aiohttp is None, 'aiohttp is not installed')
+class AsyncClientTestCase(unittest.TestCase):
+
+  def setUp(self):
+    from kfp import AsyncClient
+    self.AsyncClient = AsyncClient
+    self.pipeline_file = tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False)
+    self.pipeline_file.write('apiVersion: argoproj.io/v1alpha1\nkind: Workflow\n')
+    self.pipeline_file.close()
+
+  def tearDown(self):
+    os.remove(self.pipeline_file.name)
+
+  def test_experiments(self):
+    async def scenario(client):
+      experiment = await client.create_experiment('exp1')
+      existing_experiment = await client.create_experiment('exp1')
+      fetched_experiment = await client.get_experiment(experiment_id=experiment.id)
+      with self.assertRaises(ValueError):
+        await client.get_experiment(experiment_name='missing')
+      return experiment, existing_experiment, fetched_experiment
+
+    with StubApiServer() as server:
+      async def main():
+        async with self.AsyncClient(server.host) as client:
+          return await scenario(client)
+      experiment, existing_experiment, fetched_experiment = _run(main())
+      self.assertEqual(experiment.name, 'exp1')
+      self.assertEqual(existing_experiment.id, experiment.id)
+      self.assertEqual(fetched_experiment.id, experiment.id)
+      self.assertEqual(len(server.experiments), 1)
+
+  def test_run_pipelines_concurrently(self):
+    with StubApiServer(run_polls_to_complete=2, response_delay_seconds=0.05) as server:
+      async def main():
+        async with self.AsyncClient(server.host, max_concurrency=3) as client:
+          experiment = await client.create_experiment('exp1')
+          runs = await asyncio.gather(*[
+              client.run_pipeline(experiment.id, 'job-{}'.format(i), self.pipeline_file.name, {'param_a': i})
+              for i in range(10)])
+          run_details = await asyncio.gather(*[
+              client.wait_for_run_completion(run.id, timeout=60, poll_interval_seconds=0.01)
+              for run in runs])
+          list_runs_response = await client.list_runs(experiment_id=experiment.id)
+          return runs, run_details, list_runs_response
+      runs, run_details, list_runs_response = _run(main())
+
+      self.assertEqual(len(set(run.id for run in runs)), 10)
+      self.assertEqual([run_detail.run.status for run_detail in run_details], ['Succeeded'] * 10)
+      self.assertEqual(runs[3].pipeline_spec.parameters[0].value, '3')
+      self.assertEqual(len(list_runs_response.runs), 10)
+      self.assertGreater(server.max_active_requests, 1)
+      self.assertLessEqual(server.max_active_requests, 3)
+
+  def test_retries_throttled_and_failed_requests(self):
+    with StubApiServer() as server:
+      server.failures = [429, 503, 500]
+      async def main():
+        async with self.AsyncClient(server.host, retry_backoff_seconds=0.01) as client:
+          return await client.list_experiments()
+      _run(main())
+      self.assertEqual(len(server.requests), 4)
+
+  def test_retries_non_idempotent_requests_only_when_rejected(self):
+    with StubApiServer() as server:
+      async def main():
+        async with self.AsyncClient(server.host, retry_backoff_seconds=0.01) as client:
+          experiment = await client.create_experiment('exp1')
+          server.failures = [429, 503]
+          await client.run_pipeline(experiment.id, 'job1', self.pipeline_file.name)
+          server.failures = [502]
+          await client.run_pipeline(experiment.id, 'job2', self.pipeline_file.name)
+      with self.assertRaises(ApiException) as context:
+        _run(main())
+      self.assertEqual(context.exception.status, 502)
+      self.assertEqual(len(server.runs), 1)
+      self.assertEqual([method for method, _ in server.requests[-4:]], ['POST'] * 4)
+
+  def test_does_not_retry_client_errors(self):
+    with StubApiServer() as server:
+      async def main():
+        async with self.AsyncClient(server.host, retry_backoff_seconds=0.01) as client:
+          await client.get_run('missing')
+      with self.assertRaises(ApiException) as context:
+        _run(main())
+      self.assertEqual(context.exception.status, 404)
+      self.assertEqual(len(server.requests), 1)
+
+  def test_gives_up_after_max_retries(self):
+    with StubApiServer() as server:
+      server.failures = [503] * 10
+      async def main():
+        async with self.AsyncClient(server.host, max_retries=2, retry_backoff_seconds=0.01) as client:
+          await client.list_runs()
+      with self.assertRaises(ApiException) as context:
+        _run(main())
+      self.assertEqual(context.exception.status, 503)
+      self.assertEqual(len(server.requests), 3)
+
+
+if __name__ == '__main__':
+  unittest.main()
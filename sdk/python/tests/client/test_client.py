@@ -0,0 +1,200 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import time
+import unittest
+
+from kfp import Client, dsl
+
+from .stub_api_server import StubApiServer
+
+
+@dsl.pipeline(name='sweep')
+def sweep_pipeline(learning_rate='0.1'):
+  dsl.ContainerOp(name='train', image='trainer', arguments=['--learning-rate', learning_rate])
+
+
+class ClientTestCase(unittest.TestCase):
+
+  def setUp(self):
+    self.pipeline_file = tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False)
+    self.pipeline_file.write('apiVersion: argoproj.io/v1alpha1\nkind: Workflow\n')
+    self.pipeline_file.close()
+
+  def tearDown(self):
+    os.remove(self.pipeline_file.name)
+
+  def test_run_pipeline_batch_uploads_pipeline_once(self):
+    with StubApiServer(response_delay_seconds=0.02) as server:
+      client = Client(server.host)
+      result = client.run_pipeline_batch('experiment-0', self.pipeline_file.name,
+                                         [{'learning_rate': i / 10} for i in range(20)],
+                                         job_name_prefix='sweep', max_parallelism=4)
+
+      self.assertEqual(len(server.pipelines), 1)
+      self.assertEqual(result.pipeline_id, 'pipeline-0')
+      self.assertEqual(result.failures, {})
+      self.assertEqual(len(set(run.id for run in result.runs)), 20)
+      self.assertEqual(result.runs[3].name, 'sweep 3')
+      self.assertEqual(result.runs[3].pipeline_spec.parameters[0].value, '0.3')
+      for entry in server.runs.values():
+        self.assertEqual(entry['run']['pipeline_spec']['pipeline_id'], 'pipeline-0')
+        self.assertNotIn('workflow_manifest', entry['run']['pipeline_spec'])
+      self.assertGreater(server.max_active_requests, 1)
+      self.assertLessEqual(server.max_active_requests, 4)
+
+  def test_run_pipeline_batch_compiles_pipeline_function(self):
+    with StubApiServer() as server:
+      client = Client(server.host)
+      result = client.run_pipeline_batch('experiment-0', sweep_pipeline, [{'learning_rate': 0.1}])
+
+      self.assertEqual(len(result.runs), 1)
+      self.assertTrue(server.pipelines[0]['name'].startswith('sweep_pipeline '))
+      self.assertIn(b'pipeline.yaml', server.pipelines[0]['package'])
+
+  def test_run_pipeline_batch_reports_failed_runs(self):
+    with StubApiServer() as server:
+      client = Client(server.host)
+      def upload_pipeline_and_fail_next_request(*args):
+        pipeline = Client.upload_pipeline(client, *args)
+        server.failures.append(400)
+        return pipeline
+      client.upload_pipeline = upload_pipeline_and_fail_next_request
+      result = client.run_pipeline_batch('experiment-0', self.pipeline_file.name, [{}] * 5, max_parallelism=1)
+
+      self.assertEqual(list(result.failures.keys()), [0])
+      self.assertEqual(result.failures[0].status, 400)
+      self.assertIsNone(result.runs[0])
+      self.assertEqual(len([run for run in result.runs if run is not None]), 4)
+
+  def test_wait_for_runs_lists_runs_of_experiment(self):
+    with StubApiServer(run_polls_to_complete=3) as server:
+      client = Client(server.host)
+      experiment = client.create_experiment('sweep')
+      runs = client.run_pipeline_batch(experiment.id, self.pipeline_file.name, [{}] * 5).runs
+      finished_run_ids = []
+      del server.requests[:]
+      results = client.wait_for_runs(runs, timeout=60, callback=lambda run: finished_run_ids.append(run.id),
+                                     min_poll_interval_seconds=0.01)
+
+      self.assertEqual(sorted(results.keys()), sorted(run.id for run in runs))
+      self.assertEqual(sorted(finished_run_ids), sorted(run.id for run in runs))
+      self.assertEqual([run.status for run in results.values()], ['Succeeded'] * 5)
+      self.assertEqual(set(server.requests), {('GET', '/apis/v1beta1/runs')})
+      self.assertEqual(len(server.requests), 3)
+
+  def test_wait_for_runs_fetches_experiments_of_run_ids(self):
+    with StubApiServer(run_polls_to_complete=3) as server:
+      client = Client(server.host)
+      runs = client.run_pipeline_batch('experiment-0', self.pipeline_file.name, [{}] * 2).runs
+      del server.requests[:]
+      results = client.wait_for_runs([run.id for run in runs], timeout=60, min_poll_interval_seconds=0.01)
+
+      self.assertEqual(len(results), 2)
+      self.assertEqual(len([request for request in server.requests if request[1].startswith('/apis/v1beta1/runs/')]), 2)
+
+  def test_wait_for_runs_timeout(self):
+    with StubApiServer(run_polls_to_complete=1000) as server:
+      client = Client(server.host)
+      runs = client.run_pipeline_batch('experiment-0', self.pipeline_file.name, [{}] * 2).runs
+      with self.assertRaises(TimeoutError):
+        client.wait_for_runs(runs, timeout=0.05, min_poll_interval_seconds=0.01)
+
+  def test_create_run_from_pipeline_func_wait_for_run_completion(self):
+    with StubApiServer() as server:
+      client = Client(server.host)
+      result = client.create_run_from_pipeline_func(sweep_pipeline, {'learning_rate': 0.1})
+      run_detail = result.wait_for_run_completion()
+
+      self.assertEqual(run_detail.run.id, result.run_id)
+      self.assertEqual(run_detail.run.status, 'Succeeded')
+
+  def test_get_experiment_by_name_uses_name_filter_and_cache(self):
+    with StubApiServer() as server:
+      server.experiments = [{'id': 'experiment-{}'.format(i), 'name': 'exp-{}'.format(i)} for i in range(250)]
+      client = Client(server.host)
+
+      self.assertEqual(client.get_experiment(experiment_name='exp-200').id, 'experiment-200')
+      self.assertEqual(len(server.requests), 1)
+      self.assertEqual(client.get_experiment(experiment_name='exp-200').id, 'experiment-200')
+      self.assertEqual(len(server.requests), 1)
+      with self.assertRaises(ValueError):
+        client.get_experiment(experiment_name='missing')
+      self.assertEqual(len(server.requests), 2)
+
+  def test_get_experiment_by_name_scans_experiments_without_name_filter(self):
+    with StubApiServer(supports_name_filter=False) as server:
+      server.experiments = [{'id': 'experiment-{}'.format(i), 'name': 'exp-{}'.format(i)} for i in range(250)]
+      client = Client(server.host)
+
+      self.assertEqual(client.get_experiment(experiment_name='exp-200').id, 'experiment-200')
+      self.assertEqual(len(server.requests), 4)
+      self.assertEqual(client.get_experiment(experiment_name='exp-50').id, 'experiment-50')
+      self.assertEqual(len(server.requests), 4)
+      self.assertEqual(client.get_experiment(experiment_name='exp-210').id, 'experiment-210')
+      self.assertEqual(len(server.requests), 7)
+
+  def test_create_experiment_updates_cache(self):
+    with StubApiServer() as server:
+      client = Client(server.host)
+      experiment = client.create_experiment('new')
+      del server.requests[:]
+
+      self.assertEqual(client.create_experiment('new').id, experiment.id)
+      self.assertEqual(server.requests, [])
+      self.assertEqual(len(server.experiments), 1)
+
+  def test_experiment_cache_can_be_disabled(self):
+    with StubApiServer() as server:
+      server.experiments = [{'id': 'experiment-0', 'name': 'exp-0'}]
+      client = Client(server.host, experiment_cache_ttl_seconds=0)
+      client.get_experiment(experiment_name='exp-0')
+      client.get_experiment(experiment_name='exp-0')
+      self.assertEqual(len(server.requests), 2)
+
+  def test_iter_runs(self):
+    with StubApiServer() as server:
+      for i in range(250):
+        experiment_id = 'experiment-{}'.format(i % 2)
+        server.runs['run-{}'.format(i)] = {'polls': 0, 'run': {
+            'id': 'run-{}'.format(i), 'resource_references': [{'key': {'id': experiment_id, 'type': 'EXPERIMENT'}}]}}
+      client = Client(server.host)
+
+      self.assertEqual([run.id for run in client.iter_runs(page_size=100)], ['run-{}'.format(i) for i in range(250)])
+      self.assertEqual(len(server.requests), 3)
+      del server.requests[:]
+      runs = list(client.iter_runs(experiment_id='experiment-1', limit=60, page_size=50))
+      self.assertEqual([run.id for run in runs], ['run-{}'.format(i) for i in range(1, 121, 2)])
+      self.assertEqual(len(server.requests), 2)
+
+  def test_iter_experiments_prefetches_next_page(self):
+    with StubApiServer() as server:
+      server.experiments = [{'id': 'experiment-{}'.format(i), 'name': 'exp-{}'.format(i)} for i in range(25)]
+      client = Client(server.host)
+      experiments = client.iter_experiments(page_size=10)
+
+      self.assertEqual(next(experiments).id, 'experiment-0')
+      deadline = time.time() + 5
+      while len(server.requests) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+      self.assertEqual(len(server.requests), 2)
+      self.assertEqual(len(list(experiments)), 24)
+      self.assertEqual(len(server.requests), 3)
+      self.assertEqual(list(client.iter_experiments(limit=0)), [])
+
+
+if __name__ == '__main__':
+  unittest.main()
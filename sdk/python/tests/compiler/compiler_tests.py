@@ -15,6 +15,7 @@
 import kfp
 import kfp.compiler as compiler
 import kfp.dsl as dsl
+import json
 import os
 import shutil
 import subprocess
@@ -282,6 +283,77 @@ class TestCompiler(unittest.TestCase):
     finally:
       shutil.rmtree(tmpdir)
 
+  def test_py_compile_batch(self):
+    """Test compiling a directory of py files in the batch mode."""
+    test_data_dir = os.path.join(os.path.dirname(__file__), 'testdata')
+    tmpdir = tempfile.mkdtemp()
+    try:
+      src_dir = os.path.join(tmpdir, 'src')
+      os.makedirs(os.path.join(src_dir, 'sub'))
+      shutil.copy(os.path.join(test_data_dir, 'basic.py'), src_dir)
+      shutil.copy(os.path.join(test_data_dir, 'compose.py'), os.path.join(src_dir, 'sub'))
+      with open(os.path.join(src_dir, 'broken.py'), 'w') as f:
+        f.write('import kfp.dsl as dsl\nraise RuntimeError("broken")\n@dsl.pipeline(name="Broken")\ndef broken(): pass\n')
+      for file_name in ['setup.py', 'script.py']:
+        with open(os.path.join(src_dir, file_name), 'w') as f:
+          f.write('import sys\nsys.exit("usage")\n')
+      with open(os.path.join(src_dir, 'helpers.py'), 'w') as f:
+        f.write('IMAGE = "alpine"\n')
+      output_dir = os.path.join(tmpdir, 'out')
+      exit_code = subprocess.call([
+          'dsl-compile', '--batch', src_dir, '--output-dir', output_dir, '--jobs', '2'])
+      self.assertEqual(exit_code, 1)
+
+      with open(os.path.join(output_dir, 'compile_report.json')) as f:
+        report = json.load(f)
+      self.assertEqual(report['succeeded'], 3)
+      self.assertEqual(report['failed'], 1)
+      failures = [pipeline for pipeline in report['pipelines'] if pipeline['error']]
+      self.assertEqual(failures[0]['module'], os.path.join(src_dir, 'broken.py'))
+      self.assertIn('RuntimeError', failures[0]['error'])
+      self.assertEqual([entry['module'] for entry in report['skipped']],
+                       [os.path.join(src_dir, 'helpers.py'), os.path.join(src_dir, 'script.py')])
+      self.assertIn('usage', report['skipped'][1]['reason'])
+
+      with open(os.path.join(test_data_dir, 'basic.yaml'), 'r') as f:
+        golden = yaml.safe_load(f)
+      with open(os.path.join(output_dir, 'basic.save_most_frequent_word.yaml'), 'r') as f:
+        self.assertEqual(golden, yaml.safe_load(f))
+      self.assertTrue(os.path.exists(os.path.join(output_dir, 'sub.compose.download_save_most_frequent_word.yaml')))
+    finally:
+      shutil.rmtree(tmpdir)
+
+  def test_py_compile_batch_isolates_sibling_modules(self):
+    """Test that the batch workers do not reuse the modules imported for the py files in other directories."""
+    tmpdir = tempfile.mkdtemp()
+    try:
+      src_dir = os.path.join(tmpdir, 'src')
+      for sub_dir in ['a', 'b']:
+        os.makedirs(os.path.join(src_dir, sub_dir))
+        with open(os.path.join(src_dir, sub_dir, 'helpers.py'), 'w') as f:
+          f.write('IMAGE = "image-%s"\n' % sub_dir)
+        with open(os.path.join(src_dir, sub_dir, 'pipeline_%s.py' % sub_dir), 'w') as f:
+          f.write('''
+import kfp.dsl as dsl
+import helpers
+
+@dsl.pipeline(name='Pipeline')
+def some_pipeline():
+  dsl.ContainerOp(name='echo', image=helpers.IMAGE)
+''')
+      output_dir = os.path.join(tmpdir, 'out')
+      exit_code = subprocess.call([
+          'dsl-compile', '--batch', os.path.join(src_dir, '*', 'pipeline_*.py'), '--output-dir', output_dir,
+          '--output-format', 'yaml', '--jobs', '1'])
+      self.assertEqual(exit_code, 0)
+
+      for sub_dir in ['a', 'b']:
+        with open(os.path.join(output_dir, '{0}.pipeline_{0}.some_pipeline.yaml'.format(sub_dir))) as f:
+          workflow = yaml.safe_load(f)
+        self.assertEqual(workflow['spec']['templates'][0]['container']['image'], 'image-' + sub_dir)
+    finally:
+      shutil.rmtree(tmpdir)
+
   def test_py_compile_artifact_location(self):
     """Test configurable artifact location pipeline."""
     self._test_py_compile_yaml('artifact_location')
@@ -302,6 +374,10 @@ class TestCompiler(unittest.TestCase):
     """Test a pipeline with conditions."""
     self._test_py_compile_zip('coin')
 
+  def test_py_compile_parallelfor(self):
+    """Test a pipeline with loops over static items and op outputs."""
+    self._test_py_compile_yaml('parallelfor')
+
   def test_py_compile_immediate_value(self):
     """Test a pipeline with immediate value parameter."""
     self._test_py_compile_targz('immediate_value')
@@ -548,3 +624,241 @@ implementation:
       container = template.get('container', None)
       if container:
         self.assertEqual(template['retryStrategy']['limit'], 5)
+
+  def test_package_formats(self):
+    """Test that all package formats contain the same workflow."""
+    test_data_dir = os.path.join(os.path.dirname(__file__), 'testdata')
+    sys.path.append(test_data_dir)
+    import basic
+    tmpdir = tempfile.mkdtemp()
+    try:
+      with open(os.path.join(test_data_dir, 'basic.yaml'), 'r') as f:
+        golden = yaml.safe_load(f)
+
+      compiled = {}
+      for extension in ['zip', 'tar.gz', 'yaml', 'json']:
+        package_path = os.path.join(tmpdir, 'workflow.' + extension)
+        compiler.Compiler().compile(basic.save_most_frequent_word, package_path)
+        compiled[extension] = package_path
+      self.assertEqual(golden, self._get_yaml_from_zip(compiled['zip']))
+      self.assertEqual(golden, self._get_yaml_from_tar(compiled['tar.gz']))
+      with open(compiled['yaml'], 'r') as f:
+        self.assertEqual(golden, yaml.safe_load(f))
+      with open(compiled['json'], 'r') as f:
+        self.assertEqual(golden, json.load(f))
+
+      with self.assertRaises(ValueError):
+        compiler.Compiler().compile(basic.save_most_frequent_word, os.path.join(tmpdir, 'workflow.txt'))
+    finally:
+      shutil.rmtree(tmpdir)
+
+  def test_deduplicate_templates(self):
+    """Test that identical op templates are shared."""
+    @dsl.pipeline(name='fan-out')
+    def fan_out_pipeline(message):
+      producer = dsl.ContainerOp(name='producer', image='image', command=['echo', message],
+                                 file_outputs={'out': '/out.txt'})
+      for index in range(3):
+        worker = dsl.ContainerOp(name='worker', image='image:%d' % index, command=['echo', producer.output],
+                                 file_outputs={'out': '/out.txt'})
+        with dsl.Condition(worker.output == 'done'):
+          dsl.ContainerOp(name='printer', image='image', command=['echo', message])
+
+    workflow = compiler.Compiler(deduplicate_templates=True)._compile(fan_out_pipeline)
+    templates = {template['name']: template for template in workflow['spec']['templates']}
+    self.assertEqual(
+      sorted(templates.keys()),
+      ['condition-1', 'condition-2', 'condition-3', 'fan-out', 'printer', 'producer', 'worker'])
+
+    worker_template = templates['worker']
+    self.assertEqual(worker_template['container']['image'], '{{inputs.parameters.shared-value-1}}')
+    self.assertEqual(worker_template['container']['command'], ['echo', '{{inputs.parameters.producer-out}}'])
+    self.assertEqual(worker_template['inputs'], {'parameters': [{'name': 'producer-out'}, {'name': 'shared-value-1'}]})
+    self.assertEqual(worker_template['outputs']['parameters'], [{'name': 'out', 'valueFrom': {'path': '/out.txt'}}])
+    # The producer template is not shared and keeps its output names.
+    self.assertEqual(templates['producer']['outputs']['parameters'][0]['name'], 'producer-out')
+
+    tasks = {task['name']: task for task in templates['fan-out']['dag']['tasks']}
+    self.assertEqual(tasks['worker-2']['template'], 'worker')
+    self.assertEqual(tasks['worker-2']['arguments']['parameters'], [
+      {'name': 'producer-out', 'value': '{{tasks.producer.outputs.parameters.producer-out}}'},
+      {'name': 'shared-value-1', 'value': 'image:1'},
+    ])
+    self.assertEqual(tasks['condition-2']['when'], '{{tasks.worker-2.outputs.parameters.out}} == done')
+    printer_tasks = [templates['condition-%d' % index]['dag']['tasks'][0] for index in range(1, 4)]
+    self.assertEqual([task['template'] for task in printer_tasks], ['printer'] * 3)
+
+    # Without deduplication every op has its own template.
+    workflow = compiler.Compiler()._compile(fan_out_pipeline)
+    self.assertEqual(len(workflow['spec']['templates']), 11)
+
+  def test_parallelfor_compiles_to_single_task(self):
+    """Test that a loop is compiled to one task regardless of the number of items."""
+    def sweep_pipeline_with_items(count):
+      @dsl.pipeline(name='sweep')
+      def sweep_pipeline():
+        with dsl.ParallelFor([{'lr': index / 1000} for index in range(count)]) as item:
+          dsl.ContainerOp(name='train', image='image', command=['train', item['lr']])
+      return sweep_pipeline
+
+    workflows = [compiler.Compiler()._compile(sweep_pipeline_with_items(count)) for count in [2, 5000]]
+    for workflow in workflows:
+      templates = {template['name']: template for template in workflow['spec']['templates']}
+      self.assertEqual(sorted(templates.keys()), ['for-loop-1', 'sweep', 'train'])
+      self.assertEqual(templates['train']['container']['command'], ['train', '{{inputs.parameters.for-loop-1-item-subvar-lr}}'])
+      loop_task = templates['sweep']['dag']['tasks'][0]
+      self.assertEqual(loop_task['arguments']['parameters'], [{'name': 'for-loop-1-item-subvar-lr', 'value': '{{item.lr}}'}])
+    self.assertEqual(len(workflows[1]['spec']['templates'][1]['dag']['tasks'][0]['withItems']), 5000)
+
+    @dsl.pipeline(name='invalid')
+    def item_used_outside_of_loop_pipeline():
+      with dsl.ParallelFor([1, 2]) as item:
+        pass
+      dsl.ContainerOp(name='print', image='image', command=['echo', item])
+
+    with self.assertRaises(ValueError):
+      compiler.Compiler()._compile(item_used_outside_of_loop_pipeline)
+
+  def test_parallelfor_items_are_not_loop_inputs(self):
+    """Test that the loop iterations do not receive the whole list of the items."""
+    @dsl.pipeline(name='nested')
+    def nested_loops_pipeline(items='[1, 2]', flag='on'):
+      generate = dsl.ContainerOp(name='generate', image='image', file_outputs={'out': '/tmp/out'})
+      with dsl.Condition(flag == 'on'):
+        with dsl.ParallelFor(items) as item:
+          dsl.ContainerOp(name='print', image='image', command=['echo', item])
+        with dsl.ParallelFor(generate.output) as item:
+          dsl.ContainerOp(name='print-generated', image='image', command=['echo', item])
+
+    workflow = compiler.Compiler()._compile(nested_loops_pipeline)
+    templates = {template['name']: template for template in workflow['spec']['templates']}
+    self.assertEqual(templates['condition-1']['inputs']['parameters'],
+                     [{'name': 'flag'}, {'name': 'generate-out'}, {'name': 'items'}])
+    loop_tasks = {task['name']: task for task in templates['condition-1']['dag']['tasks']}
+    self.assertEqual(loop_tasks['for-loop-2']['withParam'], '{{inputs.parameters.items}}')
+    self.assertEqual(loop_tasks['for-loop-3']['withParam'], '{{inputs.parameters.generate-out}}')
+    for loop_name in ['for-loop-2', 'for-loop-3']:
+      self.assertEqual(templates[loop_name]['inputs']['parameters'], [{'name': 'flag'}, {'name': loop_name + '-item'}])
+      self.assertEqual([argument['name'] for argument in loop_tasks[loop_name]['arguments']['parameters']],
+                       ['flag', loop_name + '-item'])
+
+  def test_compile_cache(self):
+    """Test that unchanged pipelines are served from the compile cache."""
+    test_data_dir = os.path.join(os.path.dirname(__file__), 'testdata')
+    sys.path.append(test_data_dir)
+    import basic
+    tmpdir = tempfile.mkdtemp()
+    try:
+      cache_dir = os.path.join(tmpdir, 'cache')
+      compiler1 = compiler.Compiler(cache_dir=cache_dir)
+      package_path1 = os.path.join(tmpdir, 'workflow1.zip')
+      compiler1.compile(basic.save_most_frequent_word, package_path1)
+      self.assertEqual(compiler1.cache_stats.to_dict(), {'hits': 0, 'misses': 1})
+
+      compiler2 = compiler.Compiler(cache_dir=cache_dir)
+      package_path2 = os.path.join(tmpdir, 'workflow2.zip')
+      compiler2.compile(basic.save_most_frequent_word, package_path2)
+      self.assertEqual(compiler2.cache_stats.to_dict(), {'hits': 1, 'misses': 0})
+      self.assertEqual(self._get_yaml_from_zip(package_path1), self._get_yaml_from_zip(package_path2))
+
+      # Each package format is cached separately.
+      compiler2.compile(basic.save_most_frequent_word, os.path.join(tmpdir, 'workflow.yaml'))
+      self.assertEqual(compiler2.cache_stats.to_dict(), {'hits': 1, 'misses': 1})
+      # The type_check flag is a part of the fingerprint.
+      compiler2.compile(basic.save_most_frequent_word, package_path2, type_check=False)
+      self.assertEqual(compiler2.cache_stats.to_dict(), {'hits': 1, 'misses': 2})
+      self.assertIsNone(compiler.Compiler().cache_stats)
+    finally:
+      shutil.rmtree(tmpdir)
+
+  def test_compile_cache_invalidation(self):
+    """Test that the fingerprint covers the closure and the loaded components."""
+    def create_pipeline(image):
+      task_factory = kfp.components.load_component_from_text(
+        '''
+name: Component name
+implementation:
+  container:
+    image: %s
+''' % image
+      )
+      tag = 'v1'
+
+      @dsl.pipeline(name='Pipeline')
+      def some_pipeline():
+        task_factory().add_pod_label('tag', tag)
+      return some_pipeline
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+      package_path = os.path.join(tmpdir, 'workflow.yaml')
+      cache_compiler = compiler.Compiler(cache_dir=os.path.join(tmpdir, 'cache'))
+      cache_compiler.compile(create_pipeline('busybox'), package_path)
+      cache_compiler.compile(create_pipeline('busybox'), package_path)
+      self.assertEqual(cache_compiler.cache_stats.to_dict(), {'hits': 1, 'misses': 1})
+
+      cache_compiler.compile(create_pipeline('alpine'), package_path)
+      self.assertEqual(cache_compiler.cache_stats.to_dict(), {'hits': 1, 'misses': 2})
+      with open(package_path) as f:
+        workflow = yaml.safe_load(f)
+      self.assertEqual(workflow['spec']['templates'][0]['container']['image'], 'alpine')
+    finally:
+      shutil.rmtree(tmpdir)
+
+  def test_compile_cache_invalidation_for_main_module_without_file(self):
+    """Test that the pipelines defined in notebooks or using "python -c" are fingerprinted by content."""
+    program = '''
+import sys
+import kfp.compiler as compiler
+import kfp.dsl as dsl
+
+def create_op():
+  return dsl.ContainerOp(name='echo', image='%s')
+
+@dsl.pipeline(name='Pipeline')
+def some_pipeline():
+  create_op()
+
+compiler.Compiler(cache_dir=sys.argv[1]).compile(some_pipeline, sys.argv[2])
+'''
+    tmpdir = tempfile.mkdtemp()
+    try:
+      package_path = os.path.join(tmpdir, 'workflow.yaml')
+      env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+      for image in ['busybox', 'alpine']:
+        subprocess.run([sys.executable, '-c', program % image, os.path.join(tmpdir, 'cache'), package_path], check=True, env=env)
+        with open(package_path) as f:
+          workflow = yaml.safe_load(f)
+        self.assertEqual(workflow['spec']['templates'][0]['container']['image'], image)
+      # Both pipelines are cacheable.
+      self.assertEqual(sum(len(files) for _, _, files in os.walk(os.path.join(tmpdir, 'cache'))), 2)
+    finally:
+      shutil.rmtree(tmpdir)
+
+  def test_group_ancestry(self):
+    """Test the first uncommon ancestors lookup of nested groups."""
+    from kfp.compiler.compiler import _GroupAncestry
+
+    with dsl.Pipeline('somename') as p:
+      param = dsl.PipelineParam('param')
+      op1 = dsl.ContainerOp(name='op1', image='image')
+      with dsl.Condition(param == 'a') as group1:
+        with dsl.Condition(param == 'b') as group2:
+          op2 = dsl.ContainerOp(name='op2', image='image')
+        op3 = dsl.ContainerOp(name='op3', image='image')
+      with dsl.Condition(param == 'c') as group3:
+        op4 = dsl.ContainerOp(name='op4', image='image')
+
+    group_ancestry = _GroupAncestry(p.groups[0])
+    def first_uncommon_ancestors(name1, name2):
+      id1, id2 = group_ancestry.get_first_uncommon_ancestors(
+          group_ancestry.get_node_id(name1), group_ancestry.get_node_id(name2))
+      return group_ancestry.names[id1], group_ancestry.names[id2]
+
+    self.assertEqual(first_uncommon_ancestors(op1.name, op2.name), (op1.name, group1.name))
+    self.assertEqual(first_uncommon_ancestors(op2.name, op3.name), (group2.name, op3.name))
+    self.assertEqual(first_uncommon_ancestors(op2.name, op4.name), (group1.name, group3.name))
+    with self.assertRaises(ValueError):
+      first_uncommon_ancestors(group1.name, op2.name)
+    with self.assertRaises(ValueError):
+      group_ancestry.get_node_id('missing')
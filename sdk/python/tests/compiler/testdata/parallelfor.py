@@ -0,0 +1,52 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import kfp.dsl as dsl
+
+
+class GenerateItemsOp(dsl.ContainerOp):
+
+  def __init__(self, name):
+    super(GenerateItemsOp, self).__init__(
+      name=name,
+      image='python:alpine3.6',
+      command=['sh', '-c'],
+      arguments=['python -c "import json; print(json.dumps([1, 2, 3]))" | tee /tmp/output'],
+      file_outputs={'output': '/tmp/output'})
+
+
+class PrintOp(dsl.ContainerOp):
+
+  def __init__(self, name, msg):
+    super(PrintOp, self).__init__(
+      name=name,
+      image='alpine:3.6',
+      command=['echo', msg])
+
+
+@dsl.pipeline(
+  name='pipeline parallel for',
+  description='shows how to use dsl.ParallelFor.'
+)
+def parallelfor(greeting='hello'):
+  generate = GenerateItemsOp('generate')
+
+  with dsl.ParallelFor([{'a': 1, 'b': 'one'}, {'a': 2, 'b': 'two'}]) as item:
+    print_a = PrintOp('print-a', item['a'])
+    PrintOp('print-b', '%s %s' % (greeting, item['b'])).after(print_a)
+
+  with dsl.ParallelFor(generate.output) as item:
+    with dsl.Condition(item != '2'):
+      PrintOp('print-item', item)
@@ -12,10 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import gc
 import os
 import sys
+import tempfile
 import unittest
+import weakref
 from pathlib import Path
+from unittest import mock
 
 sys.path.insert(0, __file__ + '/../../../')
 
@@ -217,6 +221,48 @@ implementation:
     def test_load_component_fail_on_no_sources(self):
         comp.load_component()
 
+    def test_task_factories_are_cached(self):
+        component_text = '''\
+name: Cached component
+implementation:
+  container:
+    image: busybox
+'''
+        task_factory1 = comp.load_component_from_text(component_text)
+        self.assertIs(comp.load_component_from_text(component_text), task_factory1)
+        self.assertIsNot(comp.load_component_from_text(component_text.replace('busybox', 'alpine')), task_factory1)
+        self.assertIs(comp._components._create_task_factory_from_component_spec(task_factory1.component_spec), task_factory1)
+
+        try:
+            comp.configure_task_factory_cache(enabled=False)
+            self.assertIsNot(comp.load_component_from_text(component_text), comp.load_component_from_text(component_text))
+
+            comp.configure_task_factory_cache(weak_references=True)
+            task_factory2 = comp.load_component_from_text(component_text)
+            self.assertIs(comp.load_component_from_text(component_text), task_factory2)
+            task_factory2_ref = weakref.ref(task_factory2)
+            del task_factory2
+            gc.collect()
+            self.assertIsNone(task_factory2_ref())
+        finally:
+            comp.configure_task_factory_cache()
+
+    def test_component_spec_cache(self):
+        component_path = str(Path(__file__).resolve().parent.joinpath('test_data', 'python_add.component.yaml'))
+        with tempfile.TemporaryDirectory() as cache_dir:
+            try:
+                comp.configure_task_factory_cache(enabled=False)
+                comp.configure_component_spec_cache(cache_dir)
+                task_factory1 = comp.load_component_from_file(component_path)
+                with mock.patch.object(comp._components, 'load_yaml') as load_yaml:
+                    task_factory2 = comp.load_component_from_file(component_path)
+                load_yaml.assert_not_called()
+                self.assertEqual(task_factory2.component_spec, task_factory1.component_spec)
+                self.assertEqual(task_factory2(3, 5).human_name, 'Add')
+            finally:
+                comp.configure_component_spec_cache()
+                comp.configure_task_factory_cache()
+
     @unittest.expectedFailure
     def test_load_component_fail_on_multiple_sources(self):
         comp.load_component(filename='', text='')
@@ -750,6 +796,33 @@ implementation:
         with self.assertRaises(InconsistentTypeException):
             b_task = task_factory_b(in1=a_task.outputs['out1'])
 
+    def test_type_compatibility_check_results_are_reused_per_argument_type(self):
+        component_a = '''\
+outputs:
+  - {name: out1, type: {parametrized_type: {property_a: value_a}}}
+  - {name: out2, type: {parametrized_type: {property_a: DIFFERENT VALUE}}}
+implementation:
+  container:
+    image: busybox
+    command: [bash, -c, 'mkdir -p "$(dirname "$0")"; date > "$0"', {outputPath: out1}, {outputPath: out2}]
+'''
+        component_b = '''\
+inputs:
+  - {name: in1, type: {parametrized_type: {property_a: value_a}}}
+implementation:
+  container:
+    image: busybox
+    command: [echo, {inputValue: in1}]
+'''
+        kfp.TYPE_CHECK = True
+        task_factory_a = comp.load_component_from_text(component_a)
+        task_factory_b = comp.load_component_from_text(component_b)
+        a_task = task_factory_a()
+        for _ in range(2):
+            task_factory_b(in1=a_task.outputs['out1'])
+            with self.assertRaises(InconsistentTypeException):
+                task_factory_b(in1=a_task.outputs['out2'])
+
     @unittest.skip('Type compatibility check currently works the opposite way')
     def test_type_compatibility_check_when_argument_type_has_extra_type_parameters(self):
         component_a = '''\
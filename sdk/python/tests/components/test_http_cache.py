@@ -0,0 +1,158 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, __file__ + '/../../../')
+
+import requests
+
+import kfp.components as comp
+from kfp.components import HttpCache
+
+
+class _FakeResponse:
+    def __init__(self, content=b'', status_code=200, headers=None):
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(str(self.status_code))
+
+
+class HttpCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self._cache_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = self._cache_dir.name
+
+    def tearDown(self):
+        self._cache_dir.cleanup()
+
+    def test_revalidates_with_etag_and_last_modified(self):
+        url = 'https://example.com/components/add/component.yaml'
+        cache = HttpCache(self.cache_dir)
+        headers = {'ETag': '"v1"', 'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT'}
+        with mock.patch('requests.get', return_value=_FakeResponse(b'v1', headers=headers)) as get:
+            self.assertEqual(cache.get(url), b'v1')
+        get.assert_called_once_with(url, headers={})
+
+        with mock.patch('requests.get', return_value=_FakeResponse(status_code=304)) as get:
+            self.assertEqual(HttpCache(self.cache_dir).get(url), b'v1')
+        get.assert_called_once_with(url, headers={'If-None-Match': '"v1"', 'If-Modified-Since': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+
+        with mock.patch('requests.get', return_value=_FakeResponse(b'v2', headers={'ETag': '"v2"'})):
+            self.assertEqual(cache.get(url), b'v2')
+        with mock.patch('requests.get', side_effect=requests.exceptions.ConnectionError()):
+            with self.assertWarns(UserWarning):
+                self.assertEqual(cache.get(url), b'v2')
+
+    def test_digest_urls_are_immutable(self):
+        content = b'name: Add\n'
+        digest = hashlib.sha256(content).hexdigest()
+        url = 'https://example.com/components/add/versions/sha256/' + digest
+        cache = HttpCache(self.cache_dir)
+        with mock.patch('requests.get', return_value=_FakeResponse(content)):
+            self.assertEqual(cache.get(url), content)
+        with mock.patch('requests.get') as get:
+            self.assertEqual(cache.get(url), content)
+        get.assert_not_called()
+
+        with mock.patch('requests.get', return_value=_FakeResponse(b'tampered')):
+            with self.assertRaises(ValueError):
+                cache.get('https://example.com/components/add/versions/sha256/' + hashlib.sha256(b'other').hexdigest())
+
+    def test_offline_mode(self):
+        url = 'https://example.com/components/add/component.yaml'
+        with mock.patch('requests.get', return_value=_FakeResponse(b'v1')):
+            HttpCache(self.cache_dir).get(url)
+        offline_cache = HttpCache(self.cache_dir, offline=True)
+        with mock.patch('requests.get') as get:
+            self.assertEqual(offline_cache.get(url), b'v1')
+            with self.assertRaises(RuntimeError):
+                offline_cache.get('https://example.com/components/other/component.yaml')
+        get.assert_not_called()
+
+    def test_unwritable_cache_dir(self):
+        url = 'https://example.com/components/add/component.yaml'
+        cache = HttpCache('/proc/kfpcache')
+        with mock.patch('requests.get', return_value=_FakeResponse(b'v1')):
+            with self.assertLogs(level='WARNING'):
+                self.assertEqual(cache.get(url), b'v1')
+
+    def test_evicts_least_recently_used_files(self):
+        cache = HttpCache(self.cache_dir, max_size_bytes=25)
+        for i in range(3):
+            url = 'https://example.com/{}/component.yaml'.format(i)
+            with mock.patch('requests.get', return_value=_FakeResponse(str(i).encode() * 10)):
+                cache.get(url)
+            blob_path = os.path.join(self.cache_dir, 'blobs', hashlib.sha256(str(i).encode() * 10).hexdigest())
+            os.utime(blob_path, (i, i))
+        blobs = os.listdir(os.path.join(self.cache_dir, 'blobs'))
+        self.assertEqual(len(blobs), 2)
+        self.assertNotIn(hashlib.sha256(b'0' * 10).hexdigest(), blobs)
+
+    def test_component_store_uses_cache(self):
+        _this_dir = Path(__file__).resolve().parent
+        component_bytes = _this_dir.joinpath('test_data', 'python_add.component.yaml').read_bytes()
+        url_prefixes = ['https://example.com/missing/', 'https://example.com/components/']
+        store = comp.ComponentStore(local_search_paths=[], url_search_prefixes=url_prefixes, http_cache=HttpCache(self.cache_dir))
+
+        def fake_get(url, headers):
+            if url.startswith(url_prefixes[0]):
+                return _FakeResponse(status_code=404)
+            return _FakeResponse(component_bytes)
+        with mock.patch('requests.Session.get', side_effect=fake_get):
+            store.load_component('add')
+
+        offline_store = comp.ComponentStore(local_search_paths=[], url_search_prefixes=url_prefixes, http_cache=HttpCache(self.cache_dir, offline=True))
+        with mock.patch('requests.Session.get') as get:
+            task_factory = offline_store.load_component('add')
+        get.assert_not_called()
+        self.assertEqual(task_factory(3, 5).human_name, 'Add')
+
+    def test_component_store_load_components(self):
+        _this_dir = Path(__file__).resolve().parent
+        component_text = _this_dir.joinpath('test_data', 'python_add.component.yaml').read_text()
+        url_prefix = 'https://example.com/components/'
+        store = comp.ComponentStore(local_search_paths=[], url_search_prefixes=[url_prefix], http_cache=HttpCache(self.cache_dir))
+
+        def fake_get(url, headers):
+            time.sleep(0.2)
+            name = url[len(url_prefix):].split('/')[0]
+            if name == 'missing':
+                return _FakeResponse(status_code=404)
+            return _FakeResponse(component_text.replace('name: Add', 'name: ' + name).encode())
+        names = ['component-{}'.format(i) for i in range(20)]
+        with mock.patch('requests.Session.get', side_effect=fake_get):
+            start_time = time.time()
+            task_factories = store.load_components(names, max_workers=20)
+            self.assertLess(time.time() - start_time, 2)
+            self.assertEqual([task_factory(3, 5).human_name for task_factory in task_factories], names)
+            self.assertEqual(store._get_session(url_prefix).get_adapter(url_prefix)._pool_maxsize, 20)
+
+            with self.assertRaisesRegex(RuntimeError, 'Failed to load 1 of 2 components:\nmissing: Component missing was not found'):
+                store.load_components(['component-1', 'missing'])
+
+
+if __name__ == '__main__':
+    unittest.main()
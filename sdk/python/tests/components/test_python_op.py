@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import subprocess
+import sys
 import tempfile
 import unittest
 from contextlib import contextmanager
@@ -270,6 +271,129 @@ class PythonOpTestCase(unittest.TestCase):
         self.assertEqual(component_spec.inputs[0].default, '3')
         self.assertEqual(component_spec.inputs[1].default, '5')
 
+    def test_captured_function_code_is_compressed_and_cached(self):
+        from kfp.components import _python_op
+
+        captured_values = [1, 2, 3]
+        def sum_of_captured_values(a: float, b: float) -> float:
+            return a + b + sum(captured_values)
+
+        func_code = _python_op._capture_function_code_using_cloudpickle(sum_of_captured_values)
+        self.assertIn('zlib.decompress', func_code)
+        self.assertIs(_python_op._capture_function_code_using_cloudpickle(sum_of_captured_values), func_code)
+
+        captured_values.append(4)
+        changed_func_code = _python_op._capture_function_code_using_cloudpickle(sum_of_captured_values)
+        self.assertNotEqual(changed_func_code, func_code)
+
+        sizes = comp.get_function_payload_size_report()[__name__ + '.' + sum_of_captured_values.__qualname__]
+        self.assertLess(sizes['compressed_bytes'], sizes['pickled_bytes'])
+
+        op = comp.func_to_container_op(sum_of_captured_values)
+        self.helper_test_2_in_1_out_component_using_local_call(sum_of_captured_values, op)
+
+    def test_redefined_main_module_function_is_not_served_from_cache(self):
+        import types
+        from unittest import mock
+        from kfp.compiler import _compile_cache
+
+        main_module = types.ModuleType('__main__') #Notebooks and "python -c" do not set __main__.__file__
+        _compile_cache._is_library_module.cache_clear()
+        try:
+            with mock.patch.dict(sys.modules, {'__main__': main_module}):
+                exec('def calculate(a: float, b: float) -> float:\n    return a + b', main_module.__dict__)
+                add_op = comp.func_to_container_op(main_module.calculate)
+                self.helper_test_2_in_1_out_component_using_local_call(main_module.calculate, add_op)
+
+                exec('def calculate(a: float, b: float) -> float:\n    return a * b', main_module.__dict__)
+                multiply_op = comp.func_to_container_op(main_module.calculate)
+                self.helper_test_2_in_1_out_component_using_local_call(main_module.calculate, multiply_op)
+        finally:
+            _compile_cache._is_library_module.cache_clear()
+
+    def test_function_payload_size_budget_warning(self):
+        from kfp.components import _python_op
+
+        big_value = bytes(range(256)) * 100
+        def func_with_big_global(a: float, b: float) -> float:
+            return a + b + len(big_value)
+
+        old_budget = _python_op._function_payload_size_budget_bytes
+        try:
+            comp.configure_function_payload_size_budget(1000)
+            with self.assertWarnsRegex(UserWarning, 'exceeds the budget of 1000 bytes'):
+                _python_op._capture_function_code_using_cloudpickle(func_with_big_global)
+        finally:
+            comp.configure_function_payload_size_budget(old_budget)
+
+    def test_func_to_container_op_without_cloudpickle_installed(self):
+        from unittest import mock
+        from kfp.components import _python_op
+
+        multiplier = 3
+        def multiply_and_add(a: float, b: float) -> float:
+            return ModuleLevelClass().class_method(a) * multiplier + b
+
+        op = comp.func_to_container_op(multiply_and_add)
+        with tempfile.TemporaryDirectory() as temp_dir_name:
+            output_path = str(Path(temp_dir_name).joinpath('output'))
+            program_code = op.component_spec.implementation.container.command[-1]
+            # Running without the site packages, so cloudpickle cannot be imported
+            result = subprocess.run([sys.executable, '-S', '-c', program_code, '3', '5', output_path], check=True, stderr=subprocess.PIPE, universal_newlines=True)
+            self.assertIn('using vendored cloudpickle shim', result.stderr)
+            self.assertEqual(float(Path(output_path).read_text()), multiply_and_add(3, 5))
+
+        def add_one(a: float) -> float:
+            return a + 1
+        with mock.patch.object(_python_op, '_get_cloudpickle_shim_names', return_value=set()):
+            func_code = _python_op._capture_function_code_using_cloudpickle(add_one)
+        self.assertNotIn('_create_cloudpickle_shim', func_code)
+        self.assertIn('pip', func_code)
+
+    def test_typed_output_serializers_and_input_deserializers(self):
+        import io
+        from typing import BinaryIO, Dict, List, NamedTuple
+        def process_collections(mapping: dict, numbers: List[int]) -> NamedTuple('Outputs', [('mapping', Dict[str, int]), ('numbers', list), ('data', bytes), ('stream', BinaryIO), ('text', str)]):
+            import io
+            doubled = {key: value * 2 for key, value in mapping.items()}
+            return (doubled, numbers[::-1], bytes(numbers), io.BytesIO(b'streamed'), str(len(numbers)))
+
+        op = comp.func_to_container_op(process_collections)
+        with tempfile.TemporaryDirectory() as temp_dir_name:
+            with components_local_output_dir_context(temp_dir_name):
+                task = op({'a': 1}, '[1, 2, 255]')
+            subprocess.run(task.command + task.arguments, check=True)
+            outputs = {name: Path(path).read_bytes() for name, path in task.file_outputs.items()}
+
+        self.assertEqual(outputs['mapping'], b'{"a": 2}')
+        self.assertEqual(outputs['numbers'], b'[255, 2, 1]')
+        self.assertEqual(outputs['data'], b'\x01\x02\xff')
+        self.assertEqual(outputs['stream'], b'streamed')
+        self.assertEqual(outputs['text'], b'3')
+
+    def test_single_list_output_is_serialized_as_json(self):
+        def get_numbers(count: int) -> list:
+            return list(range(count))
+
+        op = comp.func_to_container_op(get_numbers)
+        with tempfile.TemporaryDirectory() as temp_dir_name:
+            with components_local_output_dir_context(temp_dir_name):
+                task = op(3)
+            subprocess.run(task.command + task.arguments, check=True)
+            output_path = list(task.file_outputs.values())[0]
+            self.assertEqual(Path(output_path).read_text(), '[0, 1, 2]')
+
+    def test_output_serializer_selection(self):
+        from typing import List
+        from kfp.components import _data_passing
+
+        ndarray = type('ndarray', (), {'__module__': 'numpy'})
+        self.assertIs(_data_passing._get_output_serializer(ndarray), _data_passing._serialize_numpy_array)
+        self.assertIs(_data_passing._get_output_serializer(List[float]), _data_passing._serialize_json)
+        self.assertIs(_data_passing._get_output_serializer(bytearray), _data_passing._serialize_bytes)
+        self.assertIs(_data_passing._get_output_serializer(float), _data_passing._serialize_str)
+        self.assertIs(_data_passing._get_output_serializer('GcsPath'), _data_passing._serialize_str)
+
     def test_end_to_end_python_component_pipeline_compilation(self):
         import kfp.components as comp
 
@@ -18,6 +18,8 @@ import unittest
 from pathlib import Path
 
 from typing import List, Dict, Union, Optional
+from unittest import mock
+from kfp.components import modelbase
 from kfp.components.modelbase import ModelBase
 
 class TestModel1(ModelBase):
@@ -39,6 +41,17 @@ class TestModel1(ModelBase):
         super().__init__(locals())
 
 
+class TestModel2(ModelBase):
+    def __init__(self,
+        operand: Union[int, TestModel1],
+    ):
+        super().__init__(locals())
+
+
+class TestModel2WithSerializedNames(TestModel2):
+    _serialized_names = {'operand': 'op'}
+
+
 class StructureModelBaseTestCase(unittest.TestCase):
     def test_handle_type_check_for_simple_builtin(self):
         self.assertEqual(TestModel1(prop_0='value 0').prop_0, 'value 0')
@@ -229,6 +242,64 @@ class StructureModelBaseTestCase(unittest.TestCase):
         with self.assertRaises(TypeError):
             TestModel1.from_dict({'prop_0': '', 'prop_5': [val5.to_dict(), None]})
 
+    def test_class_metadata_is_resolved_once(self):
+        struct = {'prop_0': '', 'prop_4': {'val 4': {'prop_0': 'value 0'}}}
+        TestModel1.from_dict(struct)
+        with mock.patch.object(modelbase, 'get_type_hints', wraps=modelbase.get_type_hints) as get_type_hints:
+            obj = TestModel1.from_dict(struct)
+            self.assertDictEqual(obj.to_dict(), struct)
+            self.assertEqual(repr(obj), repr(TestModel1.from_dict(struct)))
+        get_type_hints.assert_not_called()
+
+    def test_subclass_serialized_names(self):
+        self.assertDictEqual(TestModel2(operand=1).to_dict(), {'operand': 1})
+        self.assertDictEqual(TestModel2WithSerializedNames(operand=1).to_dict(), {'op': 1})
+        self.assertEqual(TestModel2WithSerializedNames.from_dict({'op': {'prop_0': ''}}).operand, TestModel1(prop_0=''))
+
+        with self.assertRaises(ValueError):
+            TestModel2WithSerializedNames.from_dict({'operand': 1})
+
+    def test_from_dict_errors_match_slow_path(self):
+        invalid_structs = [
+            {'prop0': ''},
+            {'prop_0': '', 'prop_1': ''},
+            {'prop_0': '', '@@': {'prop_0': 3}},
+            {'prop_0': '', 'prop_5': [{'prop_0': ''}, {'prop_0': 1}]},
+        ]
+        for struct in invalid_structs:
+            with self.assertRaises(Exception) as slow_path_context:
+                modelbase.parse_object_from_struct_based_on_class_init(TestModel1, struct, TestModel1._serialized_names)
+            with self.assertRaises(Exception) as context:
+                TestModel1.from_dict(struct)
+            self.assertEqual(type(context.exception), type(slow_path_context.exception))
+            self.assertEqual(str(context.exception), str(slow_path_context.exception))
+
+    def test_type_check_errors_match_verify_object_against_type(self):
+        prop_5_type = Optional[Union[TestModel1, List[TestModel1]]]
+        for value in [22.22, [TestModel1(prop_0=''), 3]]:
+            with self.assertRaises(TypeError) as slow_path_context:
+                modelbase.verify_object_against_type(value, prop_5_type)
+            with self.assertRaises(TypeError) as context:
+                TestModel1(prop_0='', prop_5=value)
+            expected_message = 'Argument for prop_5 is not compatible with type "{}". Exception: {}'.format(prop_5_type, slow_path_context.exception)
+            self.assertEqual(str(context.exception), expected_message)
+
+    def test_bare_generic_types(self):
+        bare_generic_type = Optional[Union[str, Dict, List]]
+        for value in ['', {'a': 1}, [1, 'b'], None]:
+            self.assertTrue(modelbase._create_type_checker(bare_generic_type)(value))
+            self.assertEqual(modelbase._create_struct_parser(bare_generic_type)(value), value)
+        self.assertFalse(modelbase._create_type_checker(bare_generic_type)(3))
+
+    def test_uncompilable_types_use_slow_path(self):
+        with mock.patch.object(modelbase, '_get_generic_type_args', side_effect=RuntimeError):
+            type_checker = modelbase._create_type_checker(List[bytearray])
+            struct_parser = modelbase._create_struct_parser(List[bytearray])
+        self.assertFalse(type_checker([bytearray()]))
+        with self.assertRaises(Exception):
+            struct_parser([bytearray()])
+        self.assertEqual(modelbase.parse_object_from_struct_based_on_type([bytearray()], List[bytearray]), [bytearray()])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,71 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import subprocess
+import sys
+import time
+import unittest
+
+# Modules that must not be imported by "import kfp" and its subpackages.
+HEAVY_MODULES = ['kfp_server_api', 'kubernetes', 'requests', 'cloudpickle', 'tarfile', 'zipfile']
+# Cold start budget of importing kfp and its subpackages (on top of the interpreter startup).
+IMPORT_TIME_BUDGET_SECONDS = float(os.environ.get('KFP_IMPORT_TIME_BUDGET_SECONDS', '0.5'))
+
+
+def _run_python(code):
+  start_time = time.time()
+  output = subprocess.check_output([sys.executable, '-c', code])
+  return output.decode(), time.time() - start_time
+
+
+class TestImport(unittest.TestCase):
+
+  def test_heavy_dependencies_are_deferred(self):
+    """Test that importing kfp does not import its heavy dependencies."""
+    output, _ = _run_python(
+      'import json, sys; import kfp, kfp.dsl, kfp.compiler, kfp.components; '
+      'print(json.dumps([module for module in %r if module in sys.modules]))' % HEAVY_MODULES)
+    self.assertEqual(json.loads(output), [])
+
+  def test_lazy_attributes_without_module_getattr(self):
+    """Test the lazy attributes on the Python versions before 3.7, which do not support the module __getattr__."""
+    output, _ = _run_python(
+      'import json, sys; version_info, sys.version_info = sys.version_info, (3, 6, 0); '
+      'import kfp, kfp.dsl, kfp.compiler, kfp.components; sys.version_info = version_info; '
+      'heavy_modules = [module for module in %r if module in sys.modules]; '
+      'from kfp.dsl import ContainerOp; '
+      'print(json.dumps([heavy_modules, "ContainerOp" in dir(kfp.dsl), ContainerOp.__name__, kfp.Client.__name__, hasattr(kfp.dsl, "NoSuchOp")]))' % HEAVY_MODULES)
+    self.assertEqual(json.loads(output), [[], True, 'ContainerOp', 'Client', False])
+
+  def test_public_names(self):
+    """Test that the lazily imported names are available."""
+    import kfp
+    from kfp import Client
+    from kfp.dsl import ContainerOp, Sidecar, ResourceOp, VolumeOp, VOLUME_MODE_RWO, PipelineVolume, VolumeSnapshotOp, ArtifactLocation
+    from kfp.compiler import Compiler, build_python_component, VersionedDependency
+    self.assertIs(kfp.Client, Client)
+    self.assertIs(kfp.dsl.ContainerOp, ContainerOp)
+    self.assertIs(kfp.compiler.Compiler, Compiler)
+    self.assertIn('ContainerOp', dir(kfp.dsl))
+    self.assertIn('ContainerOp', kfp.dsl.__all__)
+    with self.assertRaises(AttributeError):
+      kfp.dsl.NoSuchOp
+
+  def test_import_time_budget(self):
+    """Test that importing kfp and its subpackages stays within the cold start budget."""
+    import_time = min(_run_python('import kfp, kfp.dsl, kfp.compiler, kfp.components')[1] for _ in range(3))
+    startup_time = min(_run_python('pass')[1] for _ in range(3))
+    self.assertLess(import_time - startup_time, IMPORT_TIME_BUDGET_SECONDS)
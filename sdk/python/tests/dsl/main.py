@@ -29,6 +29,7 @@ import resource_op_tests
 import volume_op_tests
 import pipeline_volume_tests
 import volume_snapshotop_tests
+import import_tests
 
 
 if __name__ == '__main__':
@@ -54,6 +55,7 @@ if __name__ == '__main__':
   suite.addTests(
     unittest.defaultTestLoader.loadTestsFromModule(volume_snapshotop_tests)
   )
+  suite.addTests(unittest.defaultTestLoader.loadTestsFromModule(import_tests))
 
   runner = unittest.TextTestRunner()
   if not runner.run(suite).wasSuccessful():
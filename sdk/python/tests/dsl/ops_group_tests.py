@@ -13,7 +13,7 @@
 # limitations under the License.
 
 import kfp.dsl as dsl
-from kfp.dsl import Pipeline, PipelineParam, ContainerOp, ExitHandler, OpsGroup
+from kfp.dsl import Pipeline, PipelineParam, ContainerOp, ExitHandler, OpsGroup, ParallelFor
 import unittest
 
 
@@ -105,3 +105,30 @@ class TestExitHandler(unittest.TestCase):
         exit_op.after(op1)
         with ExitHandler(exit_op=exit_op):
           pass
+
+
+class TestParallelFor(unittest.TestCase):
+
+  def test_basic(self):
+    """Test basic usage."""
+    with Pipeline('somename') as p:
+      with ParallelFor([{'a': 1}, {'a': 2}]) as item:
+        op1 = ContainerOp(name='op1', image='image', arguments=[item['a'], item])
+
+    loop = p.groups[0].groups[0]
+    self.assertEqual('for_loop', loop.type)
+    self.assertEqual('for-loop-1', loop.name)
+    self.assertEqual([{'a': 1}, {'a': 2}], loop.items)
+    self.assertEqual(['op1'], [op.name for op in loop.ops])
+    self.assertEqual({'for-loop-1-item': '{{item}}', 'for-loop-1-item-subvar-a': '{{item.a}}'},
+                     item.to_item_references())
+    self.assertEqual(['for-loop-1-item', 'for-loop-1-item-subvar-a'], sorted(param.name for param in op1.inputs))
+
+  def test_invalid_items(self):
+    with Pipeline('somename'):
+      with self.assertRaises(ValueError):
+        ParallelFor([])
+      with self.assertRaises(ValueError):
+        ParallelFor([PipelineParam('param')])
+      with self.assertRaises(TypeError):
+        ParallelFor('items')
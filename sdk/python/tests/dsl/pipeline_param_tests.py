@@ -14,7 +14,7 @@
 
 from kubernetes.client.models import V1Container, V1EnvVar
 from kfp.dsl import PipelineParam
-from kfp.dsl._pipeline_param import _extract_pipelineparams, extract_pipelineparams_from_any
+from kfp.dsl._pipeline_param import _extract_pipelineparams, _substitute_serialized_pipelineparams, extract_pipelineparams_from_any
 from kfp.dsl._metadata import TypeMeta
 import unittest
 
@@ -80,3 +80,19 @@ class TestPipelineParam(unittest.TestCase):
     payload = [str(p1) + stuff_chars + str(p2), str(p2) + stuff_chars + str(p3)]
     params = _extract_pipelineparams(payload)
     self.assertListEqual([p1, p2, p3], params)
+
+  def test_substitute_serialized_pipelineparams(self):
+    """Test _substitute_serialized_pipelineparams."""
+    p1 = PipelineParam(name='param1', op_name='op1')
+    p2 = PipelineParam(name='param2', value='a.b(c*')
+    substitutions = {str(p1): '{{p1}}', str(p2): '{{p2}}'}
+    payload = 'echo ' + str(p1) + ' ' + str(p2) + ' ' + str(p1)
+    self.assertEqual(_substitute_serialized_pipelineparams(payload, substitutions), 'echo {{p1}} {{p2}} {{p1}}')
+    self.assertEqual(_substitute_serialized_pipelineparams('no params', substitutions), 'no params')
+
+    # Untyped pipelineparams are replaced when there are no typed ones.
+    untyped_payload = '{{pipelineparam:op=op1;name=param1;value=}}'
+    self.assertEqual(_substitute_serialized_pipelineparams(untyped_payload, {untyped_payload: '{{p1}}'}), '{{p1}}')
+
+    with self.assertRaises(KeyError):
+      _substitute_serialized_pipelineparams(str(PipelineParam(name='param3')), substitutions)
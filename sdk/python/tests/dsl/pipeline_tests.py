@@ -32,6 +32,19 @@ class TestPipeline(unittest.TestCase):
     self.assertEqual(p.ops['op1'].name, 'op1')
     self.assertEqual(p.ops['op2'].name, 'op2')
 
+  def test_unique_op_names(self):
+    """Test that ops with the same name get the lowest free index."""
+    with Pipeline('somename') as p:
+      op1 = ContainerOp(name='op', image='image')
+      op2 = ContainerOp(name='op', image='image')
+      op3 = ContainerOp(name='op 4', image='image')
+      op4 = ContainerOp(name='op', image='image')
+      op5 = ContainerOp(name='op', image='image')
+      op6 = ContainerOp(name='op 2', image='image')
+
+    self.assertEqual([op1.name, op2.name, op3.name, op4.name, op5.name, op6.name],
+                     ['op', 'op 2', 'op 4', 'op 3', 'op 5', 'op 2 2'])
+
   def test_nested_pipelines(self):
     """Test nested pipelines"""
     with self.assertRaises(Exception):